@@ -1,9 +1,149 @@
-from bs4 import BeautifulSoup
+import argparse
+import json
+import sys
 
+from souptools import instrument
+from souptools.builders import BUILDERS, CALIBRATION_SIZES, calibrate, load_calibration
+from souptools.benchmark import (OPERATIONS, SCALING, SOUP_CLASSES, load_corpus, measure_memory, measure_snapshot,
+                                 run_benchmark, run_scaling)
+from souptools.generator import generate_document, write_document
 
-# do experiments here
-def main():
-    pass
+
+# The fixtures the test suite parses, used when no corpus is given
+def default_corpus():
+    from tests.testsuite import TreeFindTest, TreeModificationTests, TreeNavigationBlackboxTest
+    return [
+        ('TreeNavigationBlackboxTest.html_text', TreeNavigationBlackboxTest.html_text),
+        ('TreeFindTest.html_text_gabe', TreeFindTest.html_text_gabe),
+        ('TreeModificationTests.test_tree', TreeModificationTests.test_tree),
+    ]
+
+
+def write_json(report, output):
+    if output:
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+
+
+def bench(args):
+    if args.calibration:
+        load_calibration(args.calibration)
+    corpus = load_corpus(args.paths) if args.paths else default_corpus()
+    if args.instrument:
+        instrument.reset()
+        instrument.enable()
+    try:
+        report = run_benchmark(corpus, args.ops, args.parser, args.repeat, args.soup)
+    finally:
+        instrument.disable()
+    if args.instrument == 'json':
+        report['instrumentation'] = instrument.as_dict()
+    write_json(report, args.output)
+    if args.instrument == 'prometheus':
+        sys.stdout.write(instrument.to_prometheus())
+
+
+def generate(args):
+    written = write_document(args.output, size=args.size, depth=args.depth, fanout=args.fanout,
+                             attr_density=args.attr_density, text_ratio=args.text_ratio, seed=args.seed)
+    print('Wrote %d bytes to %s' % (written, args.output))
+
+
+def memory(args):
+    if args.paths:
+        corpus = load_corpus(args.paths)
+    else:
+        corpus = [('generated %s' % args.size, generate_document(size=args.size, seed=args.seed))]
+    report = dict((name, measure_memory(markup, args.parser)) for name, markup in corpus)
+    write_json(report, args.output)
+
+
+def snapshot(args):
+    if args.paths:
+        corpus = load_corpus(args.paths)
+    else:
+        corpus = [('generated %s' % args.size, generate_document(size=args.size, seed=args.seed))]
+    report = dict((name, measure_snapshot(markup, args.parser, args.repeat)) for name, markup in corpus)
+    write_json(report, args.output)
+
+
+def calibrate_builders(args):
+    write_json(calibrate(args.sizes.split(','), args.builders, args.repeat, args.seed), args.output)
+
+
+def scale(args):
+    sizes = [int(size) for size in args.sizes.split(',')]
+    write_json(run_scaling(args.ops, sizes, args.repeat), args.output)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Benchmarks for BeautifulSoup parsing and tree operations.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    bench_cmd = commands.add_parser('bench', help='time parse/query operations over a corpus of HTML files')
+    bench_cmd.add_argument('paths', nargs='*', help='HTML files or directories (default: the test suite fixtures)')
+    bench_cmd.add_argument('--parser', default='html.parser',
+                           help="tree builder to use, or 'auto' for the fastest conformant one (default: html.parser)")
+    bench_cmd.add_argument('--calibration', help="a saved 'calibrate' report for --parser auto to choose by")
+    bench_cmd.add_argument('--ops', nargs='+', choices=list(OPERATIONS), help='operations to run (default: all)')
+    bench_cmd.add_argument('--soup', choices=list(SOUP_CLASSES), default='bs4', help='tree flavour to benchmark (default: bs4)')
+    bench_cmd.add_argument('--repeat', type=int, default=5, help='passes over the corpus per operation')
+    bench_cmd.add_argument('--output', help='write the JSON report to this file instead of stdout')
+    bench_cmd.add_argument('--instrument', choices=['json', 'prometheus'],
+                           help='count nodes, merges, searches, relinks and output (see souptools.instrument) '
+                                'and add the totals to the report, or print them after it as Prometheus text')
+    bench_cmd.set_defaults(func=bench)
+
+    generate_cmd = commands.add_parser('generate', help='write a synthetic HTML document grown from the test fixtures')
+    generate_cmd.add_argument('output', help='file to write')
+    generate_cmd.add_argument('--size', default='1MB', help='document size, e.g. 1KB, 20MB (1KB to 500MB)')
+    generate_cmd.add_argument('--depth', type=int, default=6, help='maximum nesting depth')
+    generate_cmd.add_argument('--fanout', type=int, default=4, help='maximum children per element')
+    generate_cmd.add_argument('--attr-density', type=float, default=1.0, help='average attributes per tag')
+    generate_cmd.add_argument('--text-ratio', type=float, default=0.5, help='probability that a child is text')
+    generate_cmd.add_argument('--seed', type=int, default=0)
+    generate_cmd.set_defaults(func=generate)
+
+    memory_cmd = commands.add_parser('memory', help='compare bytes per node of bs4 trees and compact trees')
+    memory_cmd.add_argument('paths', nargs='*', help='HTML files or directories (default: a generated document)')
+    memory_cmd.add_argument('--size', default='2MB', help='size of the generated document (default: 2MB)')
+    memory_cmd.add_argument('--seed', type=int, default=0)
+    memory_cmd.add_argument('--parser', default='html.parser', help='tree builder to use (default: html.parser)')
+    memory_cmd.add_argument('--output', help='write the JSON report to this file instead of stdout')
+    memory_cmd.set_defaults(func=memory)
+
+    snapshot_cmd = commands.add_parser('snapshot', help='compare parsing with loading a saved snapshot')
+    snapshot_cmd.add_argument('paths', nargs='*', help='HTML files or directories (default: a generated document)')
+    snapshot_cmd.add_argument('--size', default='2MB', help='size of the generated document (default: 2MB)')
+    snapshot_cmd.add_argument('--seed', type=int, default=0)
+    snapshot_cmd.add_argument('--parser', default='html.parser', help='tree builder to use (default: html.parser)')
+    snapshot_cmd.add_argument('--repeat', type=int, default=3, help='runs of each step; the fastest is kept')
+    snapshot_cmd.add_argument('--output', help='write the JSON report to this file instead of stdout')
+    snapshot_cmd.set_defaults(func=snapshot)
+
+    calibrate_cmd = commands.add_parser('calibrate', help="time each tree builder, for --parser auto to choose by")
+    calibrate_cmd.add_argument('--sizes', default=','.join(CALIBRATION_SIZES), help='comma-separated document sizes')
+    calibrate_cmd.add_argument('--builders', nargs='+', choices=list(BUILDERS), help='builders to time (default: all)')
+    calibrate_cmd.add_argument('--repeat', type=int, default=3, help='parses of each document; the fastest is kept')
+    calibrate_cmd.add_argument('--seed', type=int, default=0)
+    calibrate_cmd.add_argument('--output', help='write the JSON report to this file instead of stdout')
+    calibrate_cmd.set_defaults(func=calibrate_builders)
+
+    scale_cmd = commands.add_parser('scale', help='check how operations grow with input size')
+    scale_cmd.add_argument('--ops', nargs='+', choices=list(SCALING), help='operations to run (default: all)')
+    scale_cmd.add_argument('--sizes', default='1000,2000,4000,8000,16000', help='comma-separated input sizes')
+    scale_cmd.add_argument('--repeat', type=int, default=3, help='runs per size; the fastest is kept')
+    scale_cmd.add_argument('--output', help='write the JSON report to this file instead of stdout')
+    scale_cmd.set_defaults(func=scale)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,22 @@
+"""Performance tooling built on top of Beautiful Soup."""
+from souptools.benchmark import OPERATIONS, load_corpus, measure_memory, measure_snapshot, run_benchmark
+from souptools.bulk import clear, decompose_many, detach_many, extend, insert_many
+from souptools.compact import CompactTree
+from souptools.smooth import smooth
+from souptools.generator import generate_document, iter_document, write_document
+from souptools.index import IndexedSoup, SoupIndex
+from souptools.query import Query, compile_query, find_all_many
+from souptools.feed import IncrementalParser, parse_chunks, parse_file
+from souptools.stream import iter_matches
+from souptools.batch import parse_many
+from souptools.reparse import apply_edit, reparse
+from souptools.output import iter_markup, write_to
+from souptools.snapshot import SnapshotTree, load_snapshot, load_soup, save_snapshot
+from souptools.cache import ParseCache
+from souptools.clone import clone
+from souptools.compare import tree_equal
+from souptools.tokenizer import FastHTMLParser, FastHTMLParserTreeBuilder
+from souptools.builders import BUILDERS, calibrate, load_calibration, parse, select_builder, set_calibration
+from souptools.aio import iter_matches_async, parse_async
+from souptools.instrument import as_dict, disable, enable, instrumented, to_prometheus
+from souptools.columns import Columns, columns, find_columns
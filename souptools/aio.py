@@ -0,0 +1,104 @@
+"""Parse without blocking an asyncio event loop.
+
+Parsing is CPU-bound pure Python: ``BeautifulSoup(markup)`` on a few
+megabytes keeps the loop from running anything else until it's done.
+`parse_async` feeds an `IncrementalParser` one chunk at a time instead and
+yields to the loop between chunks, so other tasks wait at most for one
+chunk's worth of parsing. The markup can come straight from the network,
+as an async iterable of chunks or a stream with an async ``read``, and
+parsing then keeps pace with the download rather than waiting for it.
+
+Above ``offload_threshold`` characters or bytes, the parsing itself moves
+to an executor thread: a document given whole is parsed there in one go,
+and a stream is parsed there chunk by chunk once that much of it has
+arrived. The tree is the same one the constructor builds either way.
+
+`iter_matches_async` is souptools.stream.iter_matches for the same kinds of
+input: only the parts matching a strainer are built, and each is yielded
+as soon as its end tag has been parsed.
+"""
+import asyncio
+import functools
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from souptools.feed import IncrementalParser, iter_chunks, parse_chunks
+from souptools.stream import StreamingSoup
+
+# Small enough that one chunk parses in a few milliseconds.
+ASYNC_CHUNK_SIZE = 16 * 1024
+
+
+async def parse_async(source, soup_class=BeautifulSoup, chunk_size=ASYNC_CHUNK_SIZE, encoding=None,
+                      offload_threshold=None, executor=None, **soup_kwargs):
+    """Build a soup from ``source`` without holding up the event loop.
+
+    :param source: A string or bytestring, an async iterable of string or
+        bytestring chunks, an object with an async ``read(n)`` (such as an
+        ``asyncio.StreamReader``), or anything `iter_chunks` accepts.
+    :param chunk_size: The most markup parsed between two chances for
+        other tasks to run.
+    :param encoding: Encoding of byte input; see `IncrementalParser`.
+    :param offload_threshold: Parse in ``executor`` from this many
+        characters or bytes on; None (the default) never does.
+    :param executor: The executor to offload to (default: the loop's).
+    """
+    loop = asyncio.get_running_loop()
+    if offload_threshold is not None and _size(source) >= offload_threshold:
+        parse = functools.partial(parse_chunks, source, soup_class, chunk_size, encoding, **soup_kwargs)
+        return await loop.run_in_executor(executor, parse)
+    parser = IncrementalParser(soup_class, encoding, **soup_kwargs)
+    fed = 0
+    async for chunk in _aiter_chunks(source, chunk_size):
+        if offload_threshold is not None and fed >= offload_threshold:
+            await loop.run_in_executor(executor, parser.feed, chunk)
+        else:
+            parser.feed(chunk)
+            await asyncio.sleep(0)
+        fed += len(chunk)
+    return parser.close()
+
+
+async def iter_matches_async(source, strainer, chunk_size=ASYNC_CHUNK_SIZE, encoding=None):
+    """Yield the parts of ``source`` (see `parse_async`) that match
+    ``strainer``, in document order, yielding to the event loop between
+    chunks."""
+    if not isinstance(strainer, SoupStrainer):
+        strainer = SoupStrainer(strainer)
+    parser = IncrementalParser(StreamingSoup, encoding, parse_only=strainer)
+    completed = parser.soup.completed
+    async for chunk in _aiter_chunks(source, chunk_size):
+        parser.feed(chunk)
+        while completed:
+            yield completed.pop(0)
+        await asyncio.sleep(0)
+    parser.close()
+    while completed:
+        yield completed.pop(0)
+
+
+def _size(source):
+    try:
+        return len(source)
+    except TypeError:
+        # A stream; its size isn't known up front.
+        return -1
+
+
+async def _aiter_chunks(source, chunk_size):
+    # Chunks of at most chunk_size, however big the pieces source gives.
+    # A read() comes first: iterating over an asyncio.StreamReader gives
+    # lines, and a long enough line is an error.
+    if asyncio.iscoroutinefunction(getattr(source, 'read', None)):
+        while True:
+            chunk = await source.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    elif hasattr(source, '__aiter__'):
+        async for piece in source:
+            for chunk in iter_chunks(piece, chunk_size):
+                yield chunk
+    else:
+        for chunk in iter_chunks(source, chunk_size):
+            yield chunk
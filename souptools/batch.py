@@ -0,0 +1,96 @@
+"""Parse many independent documents in parallel.
+
+Parsing is pure Python and holds the GIL, so threads don't help; `parse_many`
+fans the documents out over a pool of worker processes instead. Each worker
+parses a chunk of documents and runs the caller's ``extract`` function on
+each soup, so only the (small) extracted results travel back between
+processes, never the trees.
+"""
+import collections
+import itertools
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from souptools.builders import parse
+
+
+def _parse_chunk(extract, features, documents):
+    return [extract(parse(markup, features)) for markup in documents]
+
+
+def _chunks(documents, chunksize):
+    iterator = iter(documents)
+    while True:
+        chunk = list(itertools.islice(iterator, chunksize))
+        if not chunk:
+            return
+        yield chunk
+
+
+def parse_many(documents, extract, features='html.parser', processes=None, chunksize=16, max_pending=None, ordered=True):
+    """Parse every document in ``documents`` and run ``extract`` on each soup.
+
+    :param documents: Any iterable of markup. It is consumed lazily, so it
+        can be a generator over millions of files.
+    :param extract: A picklable function (defined at module level) that
+        takes a soup and returns a picklable result.
+    :param features: The tree builder the workers use: a name
+        souptools.builders.parse accepts, such as ``'auto'``.
+    :param processes: Number of worker processes (default: one per CPU).
+        With 1, everything runs in this process.
+    :param chunksize: Number of documents sent to a worker at a time.
+    :param max_pending: Maximum number of chunks in flight at once; no more
+        input is read until one of them is done. Defaults to twice the
+        number of processes.
+    :param ordered: If True, yield results in input order. If False, yield
+        ``(index, result)`` pairs as soon as their chunk is done.
+    """
+    if chunksize < 1:
+        raise ValueError("chunksize must be at least 1")
+    processes = processes or os.cpu_count() or 1
+    chunks = _chunks(documents, chunksize)
+    if processes == 1:
+        return _parse_inline(chunks, extract, features, ordered)
+    return _parse_in_pool(chunks, extract, features, processes, max_pending or 2 * processes, ordered)
+
+
+def _parse_inline(chunks, extract, features, ordered):
+    index = 0
+    for chunk in chunks:
+        for result in _parse_chunk(extract, features, chunk):
+            yield result if ordered else (index, result)
+            index += 1
+
+
+def _parse_in_pool(chunks, extract, features, processes, max_pending, ordered):
+    executor = ProcessPoolExecutor(max_workers=processes)
+    # Futures in submission order, each with the index of its first document.
+    pending = collections.deque()
+    start = 0
+    try:
+        for chunk in chunks:
+            pending.append((start, executor.submit(_parse_chunk, extract, features, chunk)))
+            start += len(chunk)
+            while len(pending) >= max_pending:
+                for item in _collect(pending, ordered):
+                    yield item
+        while pending:
+            for item in _collect(pending, ordered):
+                yield item
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _collect(pending, ordered):
+    """Take finished work off ``pending``: the oldest chunk if ``ordered``,
+    otherwise whichever chunks are done first."""
+    if ordered:
+        start, future = pending.popleft()
+        return future.result()
+    done, not_done = wait([future for start, future in pending], return_when=FIRST_COMPLETED)
+    results = []
+    for start, future in list(pending):
+        if future in done:
+            pending.remove((start, future))
+            results.extend(enumerate(future.result(), start))
+    return results
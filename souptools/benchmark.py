@@ -0,0 +1,501 @@
+"""Timing helpers behind the ``bench`` command in main.py.
+
+Every operation mirrors something tests/testsuite.py already covers, so a
+change in the numbers can be traced back to a behaviour we test.
+"""
+import collections
+import copy
+import functools
+import gc
+import math
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import bs4
+from bs4 import BeautifulSoup
+
+from souptools import instrument
+from souptools.builders import parse
+from souptools.bulk import decompose_many, insert_many
+from souptools.cache import ParseCache
+from souptools.clone import clone
+from souptools.columns import find_columns
+from souptools.compact import CompactTree
+from souptools.element import TrackedSoup
+from souptools.index import IndexedSoup
+from souptools.output import write_to
+from souptools.query import compile_query, find_all_many
+from souptools.reparse import reparse
+from souptools.smooth import smooth
+from souptools.snapshot import load_snapshot, load_soup, save_snapshot
+
+HTML_SUFFIXES = ('.html', '.htm', '.xhtml')
+
+# Tree flavours the benchmark can be run against.
+SOUP_CLASSES = {
+    'bs4': BeautifulSoup,
+    'tracked': TrackedSoup,
+    'indexed': IndexedSoup,
+}
+
+
+# Each operation takes a freshly parsed soup (plus the markup it came from)
+# and returns a zero-argument callable. Only the callable is timed, so any
+# setup the operation needs happens outside the measurement. A callable
+# with a ``verify`` attribute is checked afterwards: ``verify()`` returns
+# whether the soup ended up as it should.
+def _prepare_parse(soup, markup, features):
+    return functools.partial(parse, markup, features, type(soup))
+
+
+def _prepare_cached_parse(soup, markup, features):
+    # A parse of markup the cache has already seen
+    cache = ParseCache(soup_class=type(soup))
+    cache.parse(markup, features)
+    return functools.partial(cache.parse, markup, features)
+
+
+def _prepare_copy(soup, markup, features):
+    return functools.partial(copy.copy, soup)
+
+
+def _prepare_clone(soup, markup, features):
+    return functools.partial(clone, soup)
+
+
+def _prepare_find_all(soup, markup, features):
+    def run():
+        soup.find_all('a')
+        soup.find(id='test_id')
+    return run
+
+
+def _prepare_queries(soup, markup, features):
+    # A page's worth of extractor queries against the same soup
+    def run():
+        for i in range(25):
+            soup.find_all('a')
+            soup.find(id='test_id')
+            soup.find_all(class_='p_class1')
+            soup.find_all('p')
+    return run
+
+
+def _prepare_compiled_queries(soup, markup, features):
+    # The same queries, compiled once
+    links = compile_query('a')
+    test_id = compile_query(id='test_id')
+    p_class1 = compile_query(class_='p_class1')
+    paragraphs = compile_query('p')
+
+    def run():
+        for i in range(25):
+            links.find_all(soup)
+            test_id.find(soup)
+            p_class1.find_all(soup)
+            paragraphs.find_all(soup)
+    return run
+
+
+def _prepare_batched_queries(soup, markup, features):
+    # The same queries, answered together in one pass per round
+    batch = ['a', dict(id='test_id', limit=1), dict(class_='p_class1'), 'p']
+
+    def run():
+        for i in range(25):
+            find_all_many(soup, batch)
+    return run
+
+
+def _prepare_attribute_loop(soup, markup, features):
+    # Links' and images' attributes, read tag by tag
+    def run():
+        for i in range(25):
+            [link.get('href') for link in soup.find_all('a')]
+            [(img.get('src'), img.get('width')) for img in soup.find_all('img')]
+    return run
+
+
+def _prepare_attribute_columns(soup, markup, features):
+    # The same attributes, as columns
+    def run():
+        for i in range(25):
+            find_columns(soup, 'a', 'href')
+            find_columns(soup, 'img', ['src', 'width'])
+    return run
+
+
+def _prepare_smooth(soup, markup, features):
+    target = soup.body or soup
+    for i in range(100):
+        target.append(str(i))
+    return target.smooth
+
+
+def _prepare_get_text(soup, markup, features):
+    return soup.get_text
+
+
+def _prepare_insert(soup, markup, features):
+    target = soup.body or soup
+    new_tags = [soup.new_tag('p') for i in range(100)]
+
+    def run():
+        for tag in new_tags:
+            target.insert(0, tag)
+    return run
+
+
+def _prepare_clear(soup, markup, features):
+    return (soup.body or soup).clear
+
+
+def _prepare_encode(soup, markup, features):
+    return soup.encode
+
+
+def _prepare_write_to(soup, markup, features):
+    # The same bytes, streamed into a file that discards them
+    sink = open(os.devnull, 'wb')
+
+    def run():
+        with sink:
+            write_to(soup, sink, encoding='utf-8')
+    return run
+
+
+def _prepare_reparse(soup, markup, features):
+    # An edit to the text after a tag halfway through the document
+    middle = markup.find('>', len(markup) // 2) + 1
+    edited = markup[:middle] + 'edited <b>text</b> ' + markup[middle:]
+    run = functools.partial(reparse, soup, markup, edited)
+
+    def verify():
+        expected = parse(edited, features, type(soup))
+        return soup.decode() == expected.decode() and _positions(soup) == _positions(expected)
+    run.verify = verify
+    return run
+
+
+def _positions(soup):
+    return [(tag.name, tag.sourceline, tag.sourcepos) for tag in soup.find_all(True)]
+
+
+OPERATIONS = {
+    'parse': _prepare_parse,
+    'cached_parse': _prepare_cached_parse,
+    'copy': _prepare_copy,
+    'clone': _prepare_clone,
+    'find_all': _prepare_find_all,
+    'queries': _prepare_queries,
+    'compiled_queries': _prepare_compiled_queries,
+    'batched_queries': _prepare_batched_queries,
+    'attribute_loop': _prepare_attribute_loop,
+    'attribute_columns': _prepare_attribute_columns,
+    'smooth': _prepare_smooth,
+    'get_text': _prepare_get_text,
+    'insert': _prepare_insert,
+    'clear': _prepare_clear,
+    'encode': _prepare_encode,
+    'write_to': _prepare_write_to,
+    'reparse': _prepare_reparse,
+}
+
+
+# Scaling operations take a size n and return a zero-argument callable that
+# does O(n) worth of work if the implementation is linear.
+def _fragments(n):
+    # One tag holding n adjacent strings, as streaming appends leave it.
+    soup = BeautifulSoup('<p></p>', 'html.parser')
+    for i in range(n):
+        soup.p.append(str(i))
+    return soup.p
+
+
+def _scale_smooth(n):
+    return functools.partial(smooth, _fragments(n))
+
+
+def _scale_bs4_smooth(n):
+    return _fragments(n).smooth
+
+
+def _new_tags(n):
+    soup = BeautifulSoup('<div><p>anchor</p></div>', 'html.parser')
+    return soup.p, [soup.new_tag('b') for i in range(n)]
+
+
+def _scale_insert_many(n):
+    anchor, tags = _new_tags(n)
+    return functools.partial(insert_many, anchor.parent, 0, tags)
+
+
+def _scale_bs4_insert_before(n):
+    anchor, tags = _new_tags(n)
+    return functools.partial(anchor.insert_before, *tags)
+
+
+def _regions(n):
+    # n boilerplate blocks to drop, interleaved with n to keep.
+    markup = '<nav><a>link</a> <b>x</b></nav><p>keep</p>' * n
+    soup = BeautifulSoup('<body>%s</body>' % markup, 'html.parser')
+    return soup.find_all('nav')
+
+
+def _scale_decompose_many(n):
+    return functools.partial(decompose_many, _regions(n))
+
+
+def _scale_bs4_decompose(n):
+    regions = _regions(n)
+
+    def run():
+        for region in regions:
+            region.decompose()
+    return run
+
+
+def _wide(soup_class, n):
+    # A tag with n children, and n new tags to put after its last one.
+    soup = soup_class('<div>%s</div>' % ('<p>x</p>' * n), 'html.parser')
+    return soup.div.contents[-1], [soup.new_tag('b') for i in range(n)]
+
+
+def _insert_after_each(anchor, tags):
+    def run():
+        for tag in tags:
+            anchor.insert_after(tag)
+    return run
+
+
+def _scale_tracked_insert_after(n):
+    return _insert_after_each(*_wide(TrackedSoup, n))
+
+
+def _scale_bs4_insert_after(n):
+    return _insert_after_each(*_wide(BeautifulSoup, n))
+
+
+SCALING = {
+    'smooth': _scale_smooth,
+    'bs4-smooth': _scale_bs4_smooth,
+    'insert_many': _scale_insert_many,
+    'bs4-insert_before': _scale_bs4_insert_before,
+    'decompose_many': _scale_decompose_many,
+    'bs4-decompose': _scale_bs4_decompose,
+    'tracked-insert_after': _scale_tracked_insert_after,
+    'bs4-insert_after': _scale_bs4_insert_after,
+}
+
+
+def load_corpus(paths):
+    """Read every HTML file under ``paths`` into a list of (name, text)."""
+    corpus = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for filename in sorted(files):
+                    if filename.lower().endswith(HTML_SUFFIXES):
+                        corpus.append(_read_document(os.path.join(root, filename)))
+        else:
+            corpus.append(_read_document(path))
+    return corpus
+
+
+def _read_document(path):
+    with open(path, encoding='utf-8', errors='replace') as f:
+        return (path, f.read())
+
+
+def corpus_bytes(corpus):
+    return sum(len(markup.encode('utf-8')) for name, markup in corpus)
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not samples:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(samples)))
+    return samples[rank - 1]
+
+
+def peak_rss_kb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux reports kilobytes.
+    if sys.platform == 'darwin':
+        peak //= 1024
+    return peak
+
+
+def time_operation(name, corpus, features='html.parser', repeat=5, soup_class='bs4'):
+    """Run one operation ``repeat`` times over every document in ``corpus``."""
+    prepare = OPERATIONS[name]
+    soup_class = SOUP_CLASSES[soup_class]
+    samples = []
+    verified = []
+    counted = collections.Counter()
+    for i in range(repeat):
+        for doc_name, markup in corpus:
+            soup = parse(markup, features, soup_class)
+            run = prepare(soup, markup, features)
+            before = instrument.totals() if instrument.enabled else None
+            start = time.perf_counter()
+            run()
+            samples.append(time.perf_counter() - start)
+            if before is not None:
+                # Only what the timed call itself did, not the setup.
+                counted.update(instrument.totals())
+                counted.subtract(before)
+            verify = getattr(run, 'verify', None)
+            if verify is not None:
+                verified.append(verify())
+    stats = summarize(samples, corpus_bytes(corpus) * repeat)
+    if verified:
+        stats['verified'] = all(verified)
+    if instrument.enabled:
+        stats['instrumentation'] = dict((name, value) for name, value in counted.items() if value)
+    return stats
+
+
+def summarize(samples, total_bytes):
+    total = sum(samples)
+    ordered = sorted(samples)
+    return {
+        'samples': len(samples),
+        'total_s': total,
+        'ops_per_s': len(samples) / total if total else 0.0,
+        'mb_per_s': total_bytes / total / 1e6 if total else 0.0,
+        'p50_ms': percentile(ordered, 0.50) * 1000,
+        'p99_ms': percentile(ordered, 0.99) * 1000,
+    }
+
+
+def run_benchmark(corpus, operations=None, features='html.parser', repeat=5, soup_class='bs4'):
+    """Time ``operations`` (default: all of them) and return a JSON-able report."""
+    if operations is None:
+        operations = list(OPERATIONS)
+    report = {
+        'bs4_version': bs4.__version__,
+        'python': sys.version.split()[0],
+        'parser': features,
+        'soup': soup_class,
+        'documents': len(corpus),
+        'bytes': corpus_bytes(corpus),
+        'repeat': repeat,
+        'operations': {},
+    }
+    for name in operations:
+        report['operations'][name] = time_operation(name, corpus, features, repeat, soup_class)
+    report['peak_rss_kb'] = peak_rss_kb()
+    return report
+
+
+def _traced_size(build):
+    """Bytes still allocated after ``build()``, and the peak while it ran."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = build()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, current, peak
+
+
+def measure_memory(markup, features='html.parser'):
+    """Compare the memory held by a BeautifulSoup tree and a CompactTree
+    of the same document."""
+    soup, soup_bytes, soup_peak = _traced_size(lambda: BeautifulSoup(markup, features))
+    nodes = sum(1 for element in soup.descendants) + 1
+    del soup
+    tree, tree_bytes, tree_peak = _traced_size(lambda: CompactTree.parse(markup, features))
+    del tree
+    return {
+        'bytes': len(markup.encode('utf-8')),
+        'nodes': nodes,
+        'bs4': {'bytes': soup_bytes, 'peak_bytes': soup_peak, 'bytes_per_node': soup_bytes / nodes},
+        'compact': {'bytes': tree_bytes, 'peak_bytes': tree_peak, 'bytes_per_node': tree_bytes / nodes},
+        'ratio': soup_bytes / tree_bytes if tree_bytes else 0.0,
+    }
+
+
+def _best_time(run, repeat):
+    best = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        result = run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def _open_and_find(path):
+    with load_snapshot(path) as tree:
+        return tree.root.find('a') is not None
+
+
+def measure_snapshot(markup, features='html.parser', repeat=3):
+    """Compare parsing a document with loading it back from a snapshot
+    (best of ``repeat`` each)."""
+    parse_s, soup = _best_time(lambda: BeautifulSoup(markup, features), repeat)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'soup.snapshot')
+        save_s, size = _best_time(lambda: save_snapshot(soup, path), repeat)
+        load_soup_s, loaded = _best_time(lambda: load_soup(path), repeat)
+        # Opening the snapshot plus one lookup, which is all a lazy load does
+        open_s, found = _best_time(lambda: _open_and_find(path), repeat)
+    return {
+        'bytes': len(markup.encode('utf-8')),
+        'snapshot_bytes': size,
+        'parse_s': parse_s,
+        'save_s': save_s,
+        'load_soup_s': load_soup_s,
+        'load_snapshot_s': open_s,
+        'speedup': parse_s / load_soup_s if load_soup_s else 0.0,
+        'identical': loaded.decode() == soup.decode(),
+    }
+
+
+def growth_exponent(sizes, seconds):
+    """Least-squares slope of log(seconds) against log(size): about 1 for
+    linear work, about 2 for quadratic."""
+    points = [(math.log(n), math.log(t)) for n, t in zip(sizes, seconds) if t > 0]
+    if len(points) < 2:
+        return 0.0
+    mean_x = sum(x for x, y in points) / len(points)
+    mean_y = sum(y for x, y in points) / len(points)
+    spread = sum((x - mean_x) ** 2 for x, y in points)
+    if not spread:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / spread
+
+
+def run_scaling(operations=None, sizes=(1000, 2000, 4000, 8000, 16000), repeat=3):
+    """Time each scaling operation at every size (best of ``repeat``) and
+    report how the time grows with the size."""
+    if operations is None:
+        operations = list(SCALING)
+    report = {'sizes': list(sizes), 'repeat': repeat, 'operations': {}}
+    for name in operations:
+        prepare = SCALING[name]
+        seconds = []
+        for n in sizes:
+            best = None
+            for i in range(repeat):
+                run = prepare(n)
+                start = time.perf_counter()
+                run()
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            seconds.append(best)
+        report['operations'][name] = {
+            'seconds': seconds,
+            'us_per_item': [t / n * 1e6 for n, t in zip(sizes, seconds)],
+            'exponent': growth_exponent(sizes, seconds),
+        }
+    return report
@@ -0,0 +1,114 @@
+"""Pick a tree builder by name, or let the fastest one be picked.
+
+`BUILDERS` maps a name to a bs4 tree builder class: ``'html.parser'``,
+the bundled ``'souptools.fast'`` (see souptools.tokenizer), and ``'lxml'``
+and ``'html5lib'`` when they're installed. `parse` takes one of those
+names, or ``'auto'``, or any other features string BeautifulSoup itself
+understands.
+
+With ``'auto'``, `select_builder` picks among the builders in
+`AUTO_BUILDERS`: the ones that build exactly the tree html.parser builds,
+so that switching between them never changes a result. lxml and html5lib
+aren't among them -- they wrap fragments in <html><body> and recover from
+broken markup differently -- and have to be asked for by name. Which
+builder is fastest depends on the document's size and on the machine;
+`calibrate` times each builder on generated documents of a few sizes, and
+once its results are installed with `set_calibration` (or
+`load_calibration`) ``'auto'`` picks the builder with the best measured
+throughput at the calibrated size closest to the input's. Without a
+calibration the first available builder in `AUTO_BUILDERS` is used.
+"""
+import json
+import math
+import sys
+import time
+
+import bs4
+from bs4 import BeautifulSoup
+from bs4.builder import HTMLParserTreeBuilder, builder_registry
+
+from souptools.generator import generate_document
+from souptools.tokenizer import FastHTMLParserTreeBuilder
+
+BUILDERS = {
+    'html.parser': HTMLParserTreeBuilder,
+    FastHTMLParserTreeBuilder.NAME: FastHTMLParserTreeBuilder,
+}
+for _name in ('lxml', 'html5lib'):
+    if builder_registry.lookup(_name) is not None:
+        BUILDERS[_name] = builder_registry.lookup(_name)
+
+#: The builders ``'auto'`` may choose, best guess first.
+AUTO_BUILDERS = (FastHTMLParserTreeBuilder.NAME, 'html.parser')
+
+CALIBRATION_SIZES = ('1KB', '32KB', '1MB')
+
+_calibration = None
+
+
+def parse(markup, parser='auto', soup_class=BeautifulSoup, **kwargs):
+    """Parse ``markup`` into a ``soup_class`` with the builder named by
+    ``parser``: a key of `BUILDERS`, ``'auto'``, or anything else
+    BeautifulSoup accepts as ``features``."""
+    if parser == 'auto':
+        parser = select_builder(len(markup))
+    builder = BUILDERS.get(parser) if isinstance(parser, str) else None
+    if builder is None:
+        return soup_class(markup, parser, **kwargs)
+    return soup_class(markup, builder=builder, **kwargs)
+
+
+def select_builder(size, calibration=None):
+    """The name of the builder ``'auto'`` uses for a document of ``size``
+    characters, by ``calibration`` (default: the installed one)."""
+    calibration = calibration or _calibration
+    candidates = [name for name in AUTO_BUILDERS if name in BUILDERS]
+    if not calibration:
+        return candidates[0]
+    # The point measured at the size nearest this one, on a log scale.
+    point = min(calibration['points'], key=lambda point: abs(math.log(max(size, 1) / point['bytes'])))
+    measured = [name for name in candidates if name in point['mb_per_s']]
+    if not measured:
+        return candidates[0]
+    return max(measured, key=lambda name: point['mb_per_s'][name])
+
+
+def calibrate(sizes=CALIBRATION_SIZES, builders=None, repeat=3, seed=0):
+    """Time each of ``builders`` (default: every available builder) on a
+    generated document of each of ``sizes``, and return a JSON-able report
+    of throughputs that `set_calibration` accepts."""
+    builders = builders or list(BUILDERS)
+    points = []
+    for size in sizes:
+        markup = generate_document(size=size, seed=seed)
+        mb_per_s = {}
+        for name in builders:
+            best = min(_time_parse(markup, name) for i in range(repeat))
+            mb_per_s[name] = len(markup) / best / 1e6 if best else 0.0
+        points.append({'size': size, 'bytes': len(markup), 'mb_per_s': mb_per_s})
+    return {
+        'bs4_version': bs4.__version__,
+        'python': sys.version.split()[0],
+        'points': points,
+    }
+
+
+def _time_parse(markup, name):
+    start = time.perf_counter()
+    parse(markup, name)
+    return time.perf_counter() - start
+
+
+def set_calibration(calibration):
+    """Make ``'auto'`` choose by ``calibration`` (a `calibrate` report), or
+    by `AUTO_BUILDERS` order again if it's None."""
+    global _calibration
+    _calibration = calibration
+
+
+def load_calibration(path):
+    """Install the calibration saved as JSON at ``path``; return it."""
+    with open(path) as f:
+        calibration = json.load(f)
+    set_calibration(calibration)
+    return calibration
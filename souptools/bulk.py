@@ -0,0 +1,242 @@
+"""Insert or remove whole sequences of elements in one pass.
+
+``Tag.insert(position, *items)``, ``Tag.extend`` and ``insert_before`` /
+``insert_after`` add items one at a time. Each one is linked in separately,
+shifts ``contents`` along, and (for ``insert_before``/``insert_after``)
+first looks up the anchor's position with a linear scan, so building a tag
+with n children that way costs O(n^2).
+
+`insert_many` does the same job in one pass: elements that are already in
+a tree are detached first, grouped by parent, then the new children are
+linked to each other, the element chain is fixed once at each end of the
+run, and ``contents`` is spliced once.
+
+Removal has the same problem in reverse: ``Tag.clear`` extracts the
+children one by one, and ``decompose`` looks its element up in the
+parent's ``contents`` before unlinking it. `clear` cuts all of a tag's
+children loose at the two ends of the run, and `decompose_many` detaches
+any number of subtrees with `detach_many`; either way the destroyed
+elements are then released in a single sweep along the element chain.
+"""
+from bs4 import BeautifulSoup, NavigableString, Tag
+
+from souptools import instrument
+
+
+def insert_many(tag, position, elements, string_class=NavigableString):
+    """Insert ``elements`` into ``tag`` at ``position``, as
+    ``tag.insert(position, *elements)`` would.
+
+    Plain strings are converted to ``string_class``, a BeautifulSoup
+    object contributes its children, and elements that are already
+    somewhere in a tree are moved. ``position`` is an index into
+    ``tag.contents`` as it is before the call: children of ``tag`` that
+    are in ``elements`` are taken out, and the elements go, in order, where
+    ``tag.contents[position]`` was. (``Tag.insert`` recounts the position
+    after each move, so it can split such a run up.)
+
+    :return: The elements that were inserted.
+    """
+    new_children = _prepare(tag, elements, string_class)
+    if position < 0:
+        position = max(0, len(tag.contents) + position)
+    position = min(position, len(tag.contents))
+    if not new_children:
+        return []
+    # Children of tag that are being moved no longer count towards the
+    # position once they've been taken out.
+    moving = set(id(child) for child in new_children if child.parent is tag)
+    if moving:
+        position -= sum(1 for child in tag.contents[:position] if id(child) in moving)
+    detach_many(new_children)
+    _splice(tag, position, new_children)
+    return new_children
+
+
+def extend(tag, elements, string_class=NavigableString):
+    """Append ``elements`` to ``tag`` in one splice; see `insert_many`."""
+    if isinstance(elements, Tag):
+        elements = list(elements.contents)
+    return insert_many(tag, len(tag.contents), elements, string_class)
+
+
+def _prepare(tag, elements, string_class):
+    # Check everything before touching the tree.
+    prepared = []
+    seen = set()
+    for element in elements:
+        if element is None:
+            raise ValueError("Cannot insert None into a tag.")
+        if element is tag:
+            raise ValueError("Cannot insert a tag into itself.")
+        if isinstance(element, BeautifulSoup):
+            # One BeautifulSoup object can't contain another; take its
+            # children instead, as Tag.insert does.
+            children = list(element.contents)
+        elif isinstance(element, str) and not isinstance(element, NavigableString):
+            children = [string_class(element)]
+        else:
+            children = [element]
+        for child in children:
+            # An element can only be in one place: inserting it twice
+            # leaves it where it was first put.
+            if id(child) not in seen:
+                seen.add(id(child))
+                prepared.append(child)
+    return prepared
+
+
+def detach_many(elements):
+    """Take every element in ``elements`` out of its tree, as ``extract()``
+    would, updating each parent's ``contents`` only once.
+
+    :return: The tags that lost children, in the order they were first seen.
+    """
+    removed = {}
+    parents = []
+    for element in elements:
+        parent = element.parent
+        if parent is None:
+            continue
+        if id(parent) not in removed:
+            removed[id(parent)] = set()
+            parents.append(parent)
+        removed[id(parent)].add(id(element))
+        _unlink(element)
+    for parent in parents:
+        ids = removed[id(parent)]
+        parent.contents[:] = [child for child in parent.contents if id(child) not in ids]
+        if instrument.enabled:
+            instrument.counters['relinks'] += len(ids)
+    return parents
+
+
+def _unlink(element):
+    # PageElement.extract without the lookup in (and the deletion from) the
+    # parent's contents, which detach_many does in bulk.
+    last_descendant = element._last_descendant()
+    next_element = last_descendant.next_element
+    previous_element = element.previous_element
+    if previous_element is not None and previous_element is not next_element:
+        previous_element.next_element = next_element
+    if next_element is not None and next_element is not previous_element:
+        next_element.previous_element = previous_element
+    element.previous_element = None
+    last_descendant.next_element = None
+    previous_sibling = element.previous_sibling
+    next_sibling = element.next_sibling
+    if previous_sibling is not None and previous_sibling is not next_sibling:
+        previous_sibling.next_sibling = next_sibling
+    if next_sibling is not None and next_sibling is not previous_sibling:
+        next_sibling.previous_sibling = previous_sibling
+    element.previous_sibling = element.next_sibling = None
+    element.parent = None
+
+
+def clear(tag, decompose=False):
+    """Remove every child of ``tag``, as ``tag.clear(decompose)`` would.
+
+    The children are cut loose from the rest of the tree at the two ends
+    of ``contents`` only. With ``decompose``, everything under ``tag`` is
+    then destroyed in one sweep; otherwise each child is left detached,
+    as if it had been extracted.
+    """
+    children = list(tag.contents)
+    if not children:
+        return
+    last_descendant = tag._last_descendant()
+    following = last_descendant.next_element
+    tag.next_element = following
+    if following is not None:
+        following.previous_element = tag
+    last_descendant.next_element = None
+    del tag.contents[:]
+    if instrument.enabled:
+        instrument.counters['relinks'] += len(children)
+    if decompose:
+        _destroy(children[0])
+        return
+    for i, child in enumerate(children):
+        child.parent = None
+        child.previous_sibling = child.next_sibling = None
+        if i:
+            # Cut the element chain between one child's subtree and the
+            # previous one's.
+            child.previous_element.next_element = None
+        child.previous_element = None
+
+
+def decompose_many(elements):
+    """Decompose every element in ``elements``, as calling ``decompose()``
+    on each would, detaching them with `detach_many`.
+
+    :return: The tags that lost children.
+    """
+    elements = list(elements)
+    parents = detach_many(elements)
+    for element in elements:
+        # An element nested inside an earlier one is already gone. (Not
+        # element.decomposed: on a live Tag, that looks for a child tag
+        # called '_decomposed'.)
+        if not element.__dict__.get('_decomposed'):
+            _destroy(element)
+    return parents
+
+
+def _destroy(element):
+    # The sweep PageElement.decompose makes, from element to the end of
+    # its (already detached) element chain.
+    while element is not None:
+        next_up = element.next_element
+        element.__dict__.clear()
+        if isinstance(element, Tag):
+            element.name = ''
+            element.contents = []
+        element._decomposed = True
+        element = next_up
+
+
+def _splice(tag, position, new_children):
+    contents = tag.contents
+    if position:
+        previous_child = contents[position - 1]
+        previous_element = previous_child._last_descendant(is_initialized=False)
+    else:
+        previous_child = None
+        previous_element = tag
+    if position < len(contents):
+        next_child = contents[position]
+        next_element = next_child
+    else:
+        next_child = None
+        next_element = _following_element(tag)
+
+    for child in new_children:
+        child.parent = tag
+        child.previous_sibling = previous_child
+        if previous_child is not None:
+            previous_child.next_sibling = child
+        child.previous_element = previous_element
+        previous_element.next_element = child
+        previous_child = child
+        previous_element = child._last_descendant(is_initialized=False)
+
+    previous_child.next_sibling = next_child
+    if next_child is not None:
+        next_child.previous_sibling = previous_child
+    previous_element.next_element = next_element
+    if next_element is not None:
+        next_element.previous_element = previous_element
+    contents[position:position] = new_children
+    if instrument.enabled:
+        instrument.counters['relinks'] += len(new_children)
+
+
+def _following_element(tag):
+    # The first element after everything inside tag: the next sibling of
+    # the closest tag (tag itself included) that has one.
+    while tag is not None:
+        if tag.next_sibling is not None:
+            return tag.next_sibling
+        tag = tag.parent
+    return None
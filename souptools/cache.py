@@ -0,0 +1,116 @@
+"""Reuse the parse of markup that has been seen before.
+
+A `ParseCache` keeps parsed soups keyed by a hash of the markup plus the
+parser name, and hands out a copy of the cached tree whenever the same
+markup comes in again. Copies are made with souptools.clone, and the
+cached trees themselves are never given out, so nothing a caller does to
+its copy -- ``append``, ``insert``, ``clear``, ``decompose`` -- can reach
+the cache or any other caller's copy.
+
+The cache is bounded both by number of entries and by the total size of
+the markup they were parsed from; the least recently used entries are
+dropped first. It is safe to share between threads.
+"""
+import collections
+import hashlib
+import threading
+
+from bs4 import BeautifulSoup
+
+from souptools.builders import parse
+from souptools.clone import clone
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class ParseCache(object):
+    """An LRU cache of parsed documents.
+
+    :param max_entries: How many documents to keep at most.
+    :param max_bytes: How much markup (in bytes, as UTF-8 for strings) the
+        kept documents may add up to. A document bigger than this is
+        parsed but never cached.
+    :param soup_class: The BeautifulSoup subclass to build.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES, soup_class=BeautifulSoup):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.soup_class = soup_class
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def parse(self, markup, features='html.parser'):
+        """Return a soup of ``markup``: a copy of the cached tree if this
+        markup has been parsed with ``features`` before, otherwise a new
+        parse (which is then cached). ``features`` is anything
+        souptools.builders.parse accepts."""
+        data = markup.encode('utf-8', 'surrogatepass') if isinstance(markup, str) else bytes(markup)
+        key = (_digest(data, isinstance(markup, str)), features)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+        if entry is not None:
+            return self._clone(entry[0])
+
+        soup = parse(markup, features, self.soup_class)
+        size = len(data)
+        if size > self.max_bytes:
+            return soup
+        cached = self._clone(soup)
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = (cached, size)
+                self.bytes += size
+                self._evict()
+        return soup
+
+    def _clone(self, soup):
+        return clone(soup)
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            key, (soup, size) = self._entries.popitem(last=False)
+            self.bytes -= size
+            self.evictions += 1
+
+    def clear(self):
+        """Drop every cached document. The counters are kept."""
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        """The counters, as a JSON-able dict."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+def _digest(data, is_text):
+    # Text and the same bytes can parse differently (bytes have their
+    # encoding detected), so they don't share entries.
+    digest = hashlib.blake2b(data, digest_size=20)
+    digest.update(b't' if is_text else b'b')
+    return digest.digest()
@@ -0,0 +1,103 @@
+"""Copy a tree in one pass.
+
+``copy.copy(tag)`` builds its copy by calling ``append`` once per element,
+and every ``append`` looks for the end of the parent's subtree and relinks
+the element chain around the new child. `clone` walks the original's
+element chain once instead and builds the copy as it goes: each new
+element is linked to the previous one, to its parent and to its previous
+sibling, and nothing else is looked up. There's no recursion, so
+nesting depth doesn't matter.
+
+Tags are copied field by field, the same fields ``copy_self`` gives a new
+tag, so names, settings and source positions are shared with the original
+rather than computed again; only attribute dicts and multi-valued
+attribute lists are new. Strings need new objects, since a string's
+position in the tree is stored on the string itself.
+"""
+import gc
+
+from bs4 import Tag
+
+from souptools import instrument
+
+
+def clone(element):
+    """A copy of ``element`` and everything below it, unconnected to any
+    tree, as ``copy.copy(element)`` would make it. Cloning a BeautifulSoup
+    gives a new BeautifulSoup with the same tree builder."""
+    if not isinstance(element, Tag):
+        return type(element)(element)
+    # As in souptools.snapshot: nothing made here is garbage, so don't
+    # let the collector walk it over and over while it's being made.
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        return _clone_tree(element)
+    finally:
+        if collecting:
+            gc.enable()
+
+
+def _clone_tree(tag):
+    root = tag.copy_self()
+    if not tag.contents:
+        return root
+    fields = {}
+    clones = {id(tag): root}
+    stop = tag._last_descendant().next_element
+    # A parsed soup isn't part of its own element chain; keep it that way.
+    previous = root if tag.next_element is tag.contents[0] else None
+    element = tag.contents[0]
+    while element is not stop:
+        parent = clones[id(element.parent)]
+        cls = type(element)
+        if isinstance(element, Tag):
+            new = cls.__new__(cls)
+            state = _tag_state(element, fields)
+            clones[id(element)] = new
+        else:
+            new = str.__new__(cls, element)
+            state = element.__dict__.copy()
+        state['parent'] = parent
+        state['next_sibling'] = state['next_element'] = None
+        siblings = parent.contents
+        if siblings:
+            sibling = siblings[-1]
+            state['previous_sibling'] = sibling
+            sibling.next_sibling = new
+        else:
+            state['previous_sibling'] = None
+        state['previous_element'] = previous
+        if previous is not None:
+            previous.next_element = new
+        new.__dict__ = state
+        siblings.append(new)
+        previous = new
+        element = element.next_element
+    if instrument.enabled:
+        # Everything made here is a child of exactly one clone; the root
+        # was counted by copy_self.
+        instrument.counters['nodes_created'] += sum(len(new.contents) for new in clones.values())
+    return root
+
+
+def _tag_state(tag, fields):
+    # A new tag's __dict__: the fields copy_self would give it, with a new
+    # attribute dict and contents.
+    cls = type(tag)
+    keys = fields.get(cls)
+    if keys is None:
+        # Caches kept on the original don't carry over.
+        keys = fields[cls] = frozenset(tag.copy_self().__dict__)
+    source = tag.__dict__
+    if source.keys() == keys:
+        state = source.copy()
+    else:
+        state = {key: source[key] for key in keys if key in source}
+    attrs = tag.attrs
+    new_attrs = attrs.__class__()
+    for key, value in attrs.items():
+        new_attrs[key] = value.__class__(value) if isinstance(value, list) else value
+    state['attrs'] = new_attrs
+    state['contents'] = []
+    return state
@@ -0,0 +1,127 @@
+"""Attributes of many tags at once, as columns.
+
+Pulling ``href`` out of every link is usually written as a loop over
+``find_all`` results calling ``tag['href']`` or ``tag.get('href')`` once
+per tag and attribute. `columns` collects the tags' attribute dicts once
+and builds each column by mapping ``dict.get`` over them, so the loops run
+in C and there's no Python-level call per tag at all; `find_columns` runs
+the search itself, through souptools.query.
+
+The result is a `Columns`: a dict from attribute name to column, which
+``pandas.DataFrame(result)`` takes as it is, with a `Columns.missing` mask
+per column. When NumPy is installed the columns and masks are NumPy
+arrays (text in object arrays, numbers in float arrays with NaN where a
+value is missing); otherwise, or with ``arrays=False``, they're lists,
+with None where a value is missing.
+
+Multi-valued attributes such as ``class`` are joined with spaces, as they
+appear in the markup. Columns named in ``numeric`` hold the number each
+value starts with -- 200.0 for ``width="200px"`` -- and a value with no
+number at its start counts as missing.
+"""
+import operator
+import re
+from itertools import repeat
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from bs4 import Tag
+
+from souptools.query import Query, compile_query
+
+_attrs = operator.attrgetter('attrs')
+_NUMBER = re.compile(r'\s*([-+]?(?:[0-9]+(?:\.[0-9]*)?|\.[0-9]+)(?:[eE][-+]?[0-9]+)?)')
+
+
+class Columns(dict):
+    """One column per attribute, in the order they were asked for."""
+
+    def __init__(self, data, missing, rows):
+        super(Columns, self).__init__(data)
+        #: Maps each attribute to a mask, true where its value is missing.
+        self.missing = missing
+        #: How many tags (rows) the columns cover.
+        self.rows = rows
+
+
+def columns(elements, attributes, numeric=(), arrays=None):
+    """The ``attributes`` of every tag in ``elements`` as a `Columns`.
+
+    :param elements: Tags, such as a ``find_all`` result; anything with an
+        ``attrs`` dict will do, including souptools.compact nodes.
+    :param attributes: An attribute name, or a list of them.
+    :param numeric: Attribute names whose values are read as numbers, or
+        True for all of them.
+    :param arrays: True for NumPy arrays, False for lists; None (the
+        default) for arrays if NumPy is installed.
+    """
+    if isinstance(attributes, str):
+        attributes = [attributes]
+    if numeric is True:
+        numeric = attributes
+    numeric = frozenset(numeric)
+    if arrays is None:
+        arrays = numpy is not None
+    elif arrays and numpy is None:
+        raise ImportError('arrays=True needs NumPy')
+    dicts = list(map(_attrs, elements))
+    # souptools.compact nodes' attrs are read-only views, not dicts.
+    get = dict.get if all(map(isinstance, dicts, repeat(dict))) else _get
+    data = {}
+    missing = {}
+    for name in attributes:
+        values = list(map(get, dicts, repeat(name)))
+        if any(map(isinstance, values, repeat(list))):
+            values = [' '.join(value) if isinstance(value, list) else value for value in values]
+        if name in numeric:
+            values = list(map(_number, values))
+        mask = list(map(operator.is_, values, repeat(None)))
+        if arrays:
+            if name in numeric:
+                values = numpy.array([numpy.nan if value is None else value for value in values], dtype=float)
+            else:
+                values = numpy.array(values, dtype=object)
+            mask = numpy.array(mask, dtype=bool)
+        data[name] = values
+        missing[name] = mask
+    return Columns(data, missing, len(dicts))
+
+
+def find_columns(tag, query, attributes, numeric=(), arrays=None, recursive=True):
+    """`columns` for the tags below ``tag`` that ``query`` finds.
+
+    :param tag: A bs4 Tag or BeautifulSoup, or a souptools.compact node.
+    :param query: A tag name, or a dict of ``find_all`` keyword arguments
+        (which may include ``limit``); below a bs4 tag it may also be a
+        souptools.query `Query`.
+    """
+    if isinstance(query, Query):
+        if not isinstance(tag, Tag):
+            raise TypeError("a Query only searches bs4 trees; pass a tag name or a dict of find_all arguments")
+        return columns(query.find_all(tag, recursive=recursive), attributes, numeric, arrays)
+    kwargs = dict(query) if isinstance(query, dict) else {'name': query}
+    if 'recursive' in kwargs:
+        raise ValueError("pass recursive to find_columns(), not in the query")
+    if isinstance(tag, Tag):
+        limit = kwargs.pop('limit', None)
+        found = compile_query(**kwargs).find_all(tag, limit, recursive)
+    else:
+        # A souptools.compact node searches its own tree.
+        found = tag.find_all(recursive=recursive, **kwargs)
+    return columns(found, attributes, numeric, arrays)
+
+
+def _get(attrs, name):
+    return attrs.get(name)
+
+
+def _number(value):
+    if value is None:
+        return None
+    match = _NUMBER.match(value)
+    if match is None:
+        return None
+    return float(match.group(1))
@@ -0,0 +1,540 @@
+"""A memory-lean, read-only tree for large documents.
+
+A `CompactTree` stores a parsed document as a handful of flat arrays
+indexed by node number, with nodes numbered in document order. That makes
+``next_element``/``previous_element`` plain arithmetic and leaves only the
+parent and sibling links to store. Tag and attribute names are interned,
+so a page with a million ``<div class="...">`` tags holds one copy of each
+name.
+
+Nodes are handed out as `TagNode`/`TextNode` views with ``__slots__`` and
+support the navigation API of `Tag`/`NavigableString` (parent, contents,
+children, descendants, the sibling and element chains, name, attrs,
+string, get_text, find/find_all with find_all's filters). They are created
+on demand and hold nothing but the tree and a node number, so they are
+cheap to throw away. Use `CompactTree.to_soup` to get a regular, mutable
+BeautifulSoup back.
+"""
+import sys
+from array import array
+from types import MappingProxyType
+
+from bs4 import BeautifulSoup, CData, NavigableString, SoupStrainer, Tag
+
+TAG = 0
+NO_NODE = -1
+_NO_ATTRS = MappingProxyType({})
+_MAIN_CONTENT_STRING_TYPES = (NavigableString, CData)
+
+
+class _StartedTag(object):
+    # What BeautifulSoupHTMLParser needs back from handle_starttag.
+    __slots__ = ('is_empty_element',)
+
+    def __init__(self, is_empty_element):
+        self.is_empty_element = is_empty_element
+
+
+_EMPTY_ELEMENT = _StartedTag(True)
+_CONTAINER_ELEMENT = _StartedTag(False)
+
+
+class CompactTree(object):
+    """A parsed document stored as flat arrays; see the module docstring."""
+
+    def __init__(self):
+        #: 0 for tags, otherwise an index into string_types.
+        self.kinds = array('B')
+        #: Interned tag name, or the text of a string.
+        self.values = []
+        self.parents = array('i')
+        self.next_siblings = array('i')
+        self.previous_siblings = array('i')
+        #: Number of the last node in each node's subtree.
+        self.ends = array('i')
+        #: Attribute dicts, only for tags that have attributes.
+        self.attrs = {}
+        self.string_types = [Tag]
+        self.string_containers = {}
+        self._add(TAG, BeautifulSoup.ROOT_TAG_NAME, NO_NODE, NO_NODE)
+
+    @classmethod
+    def parse(cls, markup, features='html.parser', **kwargs):
+        """Parse ``markup`` straight into a CompactTree; no `Tag` objects
+        are created along the way."""
+        soup = _CompactTreeBuilder(markup, features, **kwargs)
+        tree = soup.tree
+        tree.string_containers = dict(soup.builder.string_containers)
+        soup.tree = None
+        return tree
+
+    @classmethod
+    def from_soup(cls, soup):
+        """Copy an existing BeautifulSoup into a CompactTree."""
+        tree = cls()
+        if soup.builder is not None:
+            tree.string_containers = dict(soup.builder.string_containers)
+        numbers = {id(soup): 0}
+        last_child = {0: NO_NODE}
+        for element in soup.descendants:
+            parent = numbers[id(element.parent)]
+            if isinstance(element, Tag):
+                i = tree._add(TAG, sys.intern(element.name), parent, last_child[parent])
+                if element.attrs:
+                    tree.attrs[i] = _intern_attrs(element.attrs)
+                numbers[id(element)] = i
+                last_child[i] = NO_NODE
+            else:
+                i = tree._add(tree._string_kind(type(element)), str(element), parent, last_child[parent])
+            last_child[parent] = i
+        tree._compute_ends()
+        return tree
+
+    def _add(self, kind, value, parent, previous_sibling):
+        i = len(self.kinds)
+        self.kinds.append(kind)
+        self.values.append(value)
+        self.parents.append(parent)
+        self.next_siblings.append(NO_NODE)
+        self.previous_siblings.append(previous_sibling)
+        self.ends.append(i)
+        if previous_sibling != NO_NODE:
+            self.next_siblings[previous_sibling] = i
+        return i
+
+    def _string_kind(self, string_type):
+        try:
+            return self.string_types.index(string_type)
+        except ValueError:
+            self.string_types.append(string_type)
+            return len(self.string_types) - 1
+
+    def _compute_ends(self):
+        ends = self.ends
+        parents = self.parents
+        for i in range(len(ends) - 1, 0, -1):
+            parent = parents[i]
+            if ends[i] > ends[parent]:
+                ends[parent] = ends[i]
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def node(self, i):
+        if i < 0 or i >= len(self.kinds):
+            return None
+        if self.kinds[i] == TAG:
+            return TagNode(self, i)
+        return TextNode(self, i)
+
+    @property
+    def root(self):
+        return TagNode(self, 0)
+
+    def to_soup(self, i=0, features='html.parser'):
+        """Build a regular BeautifulSoup out of node ``i`` (by default the
+        whole document) and everything beneath it."""
+        soup = BeautifulSoup('', features)
+        soup.reset()
+        kinds = self.kinds
+        values = self.values
+        # Tags still open, as (node number, last node in its subtree).
+        stack = []
+        start = i + 1 if i == 0 else i
+        for j in range(start, self.ends[i] + 1):
+            while stack and stack[-1][1] < j:
+                soup.handle_endtag(values[stack.pop()[0]])
+            if kinds[j] == TAG:
+                soup.handle_starttag(values[j], None, None, _copy_attrs(self.attrs.get(j)))
+                stack.append((j, self.ends[j]))
+            else:
+                soup.handle_data(values[j])
+                soup.endData(self.string_types[kinds[j]])
+        while stack:
+            soup.handle_endtag(values[stack.pop()[0]])
+        soup.endData()
+        return soup
+
+
+def _intern_attrs(attrs):
+    interned = {}
+    for key, value in attrs.items():
+        if isinstance(value, list):
+            value = [sys.intern(token) for token in value]
+        interned[sys.intern(key)] = value
+    return interned
+
+
+def _copy_attrs(attrs):
+    if not attrs:
+        return {}
+    return dict((key, list(value) if isinstance(value, list) else value) for key, value in attrs.items())
+
+
+class _CompactTreeBuilder(BeautifulSoup):
+    """Receives the tree builder's events and writes them into a
+    CompactTree instead of creating Tag and NavigableString objects.
+
+    Mirrors what BeautifulSoup does with the same events: the same
+    tag-closing rules, whitespace handling and string classes.
+    """
+
+    def reset(self):
+        super(_CompactTreeBuilder, self).reset()
+        self.tree = CompactTree()
+        # Open tags as [node number, last child], the root at the bottom.
+        self.open_nodes = [[0, NO_NODE]]
+        self.preserve_whitespace_nodes = []
+        self.string_container_nodes = []
+
+    def _add(self, kind, value):
+        top = self.open_nodes[-1]
+        i = self.tree._add(kind, value, top[0], top[1])
+        top[1] = i
+        return i
+
+    def handle_starttag(self, name, namespace, nsprefix, attrs, sourceline=None, sourcepos=None, namespaces=None):
+        self.endData()
+        name = sys.intern(name)
+        i = self._add(TAG, name)
+        if attrs:
+            attrs = self.builder._replace_cdata_list_attribute_values(name, attrs)
+            self.tree.attrs[i] = _intern_attrs(attrs)
+        self.open_nodes.append([i, NO_NODE])
+        self.open_tag_counter[name] += 1
+        if name in self.builder.preserve_whitespace_tags:
+            self.preserve_whitespace_nodes.append(i)
+        if name in self.builder.string_containers:
+            self.string_container_nodes.append(i)
+        if self.builder.can_be_empty_element(name):
+            return _EMPTY_ELEMENT
+        return _CONTAINER_ELEMENT
+
+    def handle_endtag(self, name, nsprefix=None):
+        self.endData()
+        if name == self.ROOT_TAG_NAME:
+            return
+        values = self.tree.values
+        while len(self.open_nodes) > 1 and self.open_tag_counter.get(name):
+            i = self._pop_node()
+            if values[i] == name:
+                break
+
+    def _pop_node(self):
+        i = self.open_nodes.pop()[0]
+        self.tree.ends[i] = len(self.tree.kinds) - 1
+        self.open_tag_counter[self.tree.values[i]] -= 1
+        if self.preserve_whitespace_nodes and self.preserve_whitespace_nodes[-1] == i:
+            self.preserve_whitespace_nodes.pop()
+        if self.string_container_nodes and self.string_container_nodes[-1] == i:
+            self.string_container_nodes.pop()
+        return i
+
+    def endData(self, containerClass=None):
+        if not self.current_data:
+            return
+        current_data = ''.join(self.current_data)
+        self.current_data = []
+        if not self.preserve_whitespace_nodes:
+            for character in current_data:
+                if character not in self.ASCII_SPACES:
+                    break
+            else:
+                current_data = '\n' if '\n' in current_data else ' '
+        container = containerClass or NavigableString
+        if self.string_container_nodes and container is NavigableString:
+            name = self.tree.values[self.string_container_nodes[-1]]
+            container = self.builder.string_containers.get(name, container)
+        self._add(self.tree._string_kind(container), current_data)
+
+    def _feed(self):
+        super(_CompactTreeBuilder, self)._feed()
+        while len(self.open_nodes) > 1:
+            self._pop_node()
+        self.tree.ends[0] = len(self.tree.kinds) - 1
+
+
+class Node(object):
+    """A view of one node of a `CompactTree`."""
+
+    __slots__ = ('tree', 'i')
+
+    def __init__(self, tree, i):
+        self.tree = tree
+        self.i = i
+
+    def __eq__(self, other):
+        if isinstance(other, Node):
+            return other.tree is self.tree and other.i == self.i
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    def __hash__(self):
+        return hash((id(self.tree), self.i))
+
+    @property
+    def parent(self):
+        return self.tree.node(self.tree.parents[self.i])
+
+    @property
+    def next_sibling(self):
+        return self.tree.node(self.tree.next_siblings[self.i])
+
+    @property
+    def previous_sibling(self):
+        return self.tree.node(self.tree.previous_siblings[self.i])
+
+    # As in a parsed BeautifulSoup, the root is not part of the element
+    # chain: its next_element and its first child's previous_element are
+    # both None.
+    @property
+    def next_element(self):
+        if self.i == 0:
+            return None
+        return self.tree.node(self.i + 1)
+
+    @property
+    def previous_element(self):
+        if self.i <= 1:
+            return None
+        return self.tree.node(self.i - 1)
+
+    @property
+    def next_elements(self):
+        tree = self.tree
+        for i in range(self.i + 1 if self.i else len(tree), len(tree)):
+            yield tree.node(i)
+
+    @property
+    def previous_elements(self):
+        tree = self.tree
+        for i in range(self.i - 1, 0, -1):
+            yield tree.node(i)
+
+    @property
+    def next_siblings(self):
+        tree = self.tree
+        i = tree.next_siblings[self.i]
+        while i != NO_NODE:
+            yield tree.node(i)
+            i = tree.next_siblings[i]
+
+    @property
+    def previous_siblings(self):
+        tree = self.tree
+        i = tree.previous_siblings[self.i]
+        while i != NO_NODE:
+            yield tree.node(i)
+            i = tree.previous_siblings[i]
+
+    @property
+    def parents(self):
+        tree = self.tree
+        i = tree.parents[self.i]
+        while i != NO_NODE:
+            yield tree.node(i)
+            i = tree.parents[i]
+
+
+class TextNode(Node):
+    """A string in a `CompactTree`. Compares equal to its text."""
+
+    __slots__ = ()
+
+    name = None
+
+    def __eq__(self, other):
+        if isinstance(other, str):
+            return self.tree.values[self.i] == other
+        return super(TextNode, self).__eq__(other)
+
+    def __hash__(self):
+        return hash(self.tree.values[self.i])
+
+    def __str__(self):
+        return self.tree.values[self.i]
+
+    def __repr__(self):
+        return repr(self.tree.values[self.i])
+
+    @property
+    def string_type(self):
+        return self.tree.string_types[self.tree.kinds[self.i]]
+
+    @property
+    def string(self):
+        return self.tree.values[self.i]
+
+    def get_text(self, separator='', strip=False):
+        text = self.tree.values[self.i]
+        return text.strip() if strip else text
+
+
+class TagNode(Node):
+    """A tag in a `CompactTree`."""
+
+    __slots__ = ()
+
+    @property
+    def name(self):
+        return self.tree.values[self.i]
+
+    @property
+    def attrs(self):
+        return self.tree.attrs.get(self.i, _NO_ATTRS)
+
+    def get(self, key, default=None):
+        return self.attrs.get(key, default)
+
+    def has_attr(self, key):
+        return key in self.attrs
+
+    def __getitem__(self, key):
+        return self.attrs[key]
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return self.find(name)
+
+    def __repr__(self):
+        return self.decode()
+
+    __str__ = __repr__
+
+    def decode(self):
+        return self.tree.to_soup(self.i).decode()
+
+    def _child_numbers(self):
+        tree = self.tree
+        i = self.i + 1 if tree.ends[self.i] > self.i else NO_NODE
+        while i != NO_NODE:
+            yield i
+            i = tree.next_siblings[i]
+
+    @property
+    def children(self):
+        tree = self.tree
+        return (tree.node(i) for i in self._child_numbers())
+
+    @property
+    def contents(self):
+        return list(self.children)
+
+    def __iter__(self):
+        return self.children
+
+    def __len__(self):
+        return sum(1 for i in self._child_numbers())
+
+    def __bool__(self):
+        return True
+
+    @property
+    def descendants(self):
+        tree = self.tree
+        for i in range(self.i + 1, tree.ends[self.i] + 1):
+            yield tree.node(i)
+
+    @property
+    def string(self):
+        tree = self.tree
+        i = self.i
+        while True:
+            children = list(TagNode(tree, i)._child_numbers())
+            if len(children) != 1:
+                return None
+            i = children[0]
+            if tree.kinds[i] != TAG:
+                return tree.values[i]
+
+    def _interesting_kinds(self):
+        tree = self.tree
+        container = tree.string_containers.get(self.name)
+        types = (container,) if container is not None else _MAIN_CONTENT_STRING_TYPES
+        return set(kind for kind, string_type in enumerate(tree.string_types) if kind != TAG and string_type in types)
+
+    def _all_strings(self, strip=False):
+        tree = self.tree
+        kinds = tree.kinds
+        values = tree.values
+        interesting = self._interesting_kinds()
+        for i in range(self.i + 1, tree.ends[self.i] + 1):
+            if kinds[i] in interesting:
+                text = values[i]
+                if strip:
+                    text = text.strip()
+                    if not text:
+                        continue
+                yield text
+
+    @property
+    def strings(self):
+        return self._all_strings()
+
+    @property
+    def stripped_strings(self):
+        return self._all_strings(True)
+
+    def get_text(self, separator='', strip=False):
+        return separator.join(self._all_strings(strip))
+
+    text = property(get_text)
+
+    def find_all(self, name=None, attrs=None, recursive=True, string=None, limit=None, **kwargs):
+        """Tags below this one with the given name and attribute values, or
+        with ``string`` alone, strings with that text.
+
+        The filters are matched by a `SoupStrainer`'s rules, as find_all
+        matches them: strings, lists, regular expressions, True and False,
+        and functions, which are passed a `TagNode` rather than a Tag.
+        """
+        strainer = SoupStrainer(name, attrs, string, **kwargs)
+        name_rules = strainer.name_rules
+        attribute_rules = list(strainer.attribute_rules.items())
+        matches_string = strainer.matches_any_string_rule
+        # The common case of one plain name needs no rule objects at all.
+        exact = None
+        if len(name_rules) == 1 and name_rules[0].string is not None:
+            exact = name_rules[0].string
+            name_rules = ()
+        tree = self.tree
+        kinds = tree.kinds
+        values = tree.values
+        numbers = range(self.i + 1, tree.ends[self.i] + 1) if recursive else self._child_numbers()
+        # As in bs4, string on its own finds strings rather than tags.
+        strings_only = exact is None and not name_rules and not attribute_rules
+        found = []
+        for i in numbers:
+            if strings_only:
+                # bs4 never matches an empty string against a filter.
+                if kinds[i] == TAG or not values[i] or not matches_string(values[i]):
+                    continue
+                found.append(TextNode(tree, i))
+            else:
+                if kinds[i] != TAG or (exact is not None and values[i] != exact):
+                    continue
+                node = TagNode(tree, i)
+                if name_rules and not any(rule.matches_tag(node) for rule in name_rules):
+                    continue
+                if attribute_rules:
+                    attrs = tree.attrs.get(i, _NO_ATTRS)
+                    if not all(strainer._attribute_match(attrs.get(attr), rules) for attr, rules in attribute_rules):
+                        continue
+                if strainer.string_rules:
+                    text = node.string
+                    if text is None or not matches_string(text):
+                        continue
+                found.append(node)
+            if limit and len(found) >= limit:
+                break
+        return found
+
+    def find(self, name=None, attrs=None, recursive=True, string=None, **kwargs):
+        found = self.find_all(name, attrs, recursive, string, 1, **kwargs)
+        return found[0] if found else None
@@ -0,0 +1,29 @@
+"""Tree equality without recursion.
+
+``Tag.__eq__`` compares two tags' children by comparing each pair with
+``!=``, which calls ``__eq__`` again one level down: comparing two
+documents nested ten thousand tags deep needs ten thousand stack frames
+(several, in fact, per level) and fails with a RecursionError well before
+that. `tree_equal` makes the same comparison with an explicit stack.
+"""
+from bs4 import Tag
+
+
+def tree_equal(a, b):
+    """Whether ``a == b`` by ``Tag.__eq__``'s rules: the same names, the
+    same attributes and equal children, where strings are equal if their
+    text is."""
+    pending = [(a, b)]
+    while pending:
+        a, b = pending.pop()
+        if a is b:
+            continue
+        if not isinstance(a, Tag) or not isinstance(b, Tag):
+            if isinstance(a, Tag) or isinstance(b, Tag) or a != b:
+                return False
+            continue
+        if a.name != b.name or a.attrs != b.attrs or len(a.contents) != len(b.contents):
+            return False
+        # Reversed, so children are compared in document order.
+        pending.extend(reversed(list(zip(a.contents, b.contents))))
+    return True
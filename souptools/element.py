@@ -0,0 +1,385 @@
+"""Tree classes that report their own mutations.
+
+BeautifulSoup builds its tree out of whatever classes are passed in as
+``element_classes``. `TrackedSoup` uses that hook to build the tree out of
+`TrackedTag` and `TrackedString`, which call `_changed` on a tag whenever
+its contents or attributes change. Parsing itself appends to ``contents``
+directly and doesn't go through any of the overridden methods, so it costs
+nothing extra.
+
+Caches built on top of a tree (see souptools.index) compare the root's
+``_generation`` counter with the value they were built against to know
+whether they are stale.
+
+Tracked tags also cache their own text: ``get_text()`` and
+``stripped_strings`` are computed once and kept until something inside the
+tag changes. A change only clears the caches of the tags on the path from
+the changed tag up to the root; when one of those is asked for its text
+again, the cached text of every untouched tag below it is reused rather
+than walked again.
+
+``smooth()`` on a tracked tag uses the linear-time souptools.smooth and
+``==`` uses souptools.compare.tree_equal, so neither recurses however deep
+the tree is. Inserting several elements at once (``insert``, ``extend``,
+``insert_before``, ``insert_after``), ``clear`` and ``decompose`` go
+through souptools.bulk.
+
+Tracked tags with many children also keep an index from each child to its
+position in ``contents``, so ``index()`` -- and with it ``extract``,
+``insert``, ``replace_with``, ``wrap``, ``unwrap``, ``insert_before`` and
+``insert_after``, which all look up where an element is first -- takes
+constant time instead of a scan through the children. A change to
+``contents`` only invalidates the positions from the point of the change
+on, and they are brought up to date the next time they're asked for: a
+run of edits near the end of a tag with 100,000 children costs time in
+proportion to how near the end they are, not to the number of children.
+A position found in the index is always checked against ``contents``, so
+a change the tag didn't see can make a lookup slower but never wrong.
+
+Only mutations made through the bs4 API are seen: assigning to ``tag.name``
+or editing ``tag.attrs``/``tag.contents`` in place is not, and neither is
+anything done inside a plain `Tag` that was inserted from another tree.
+Strings of bs4's other classes (CData, Comment, and the strings inside
+<script>, <style> or <template>) and plain Tags have no hooks of their
+own, so a tracked tag treats looking up the position of one of them as
+that child being removed, which is what ``extract()`` does first: the
+caches above it are cleared even if it stays.
+"""
+from bs4 import BeautifulSoup, CData, NavigableString, Tag
+from bs4.element import PageElement
+
+from souptools import bulk
+from souptools.compare import tree_equal
+from souptools.smooth import smooth
+
+# Tags with fewer children than this find a child's position by scanning.
+INDEXED_CHILDREN = 32
+
+
+class TrackedString(NavigableString):
+
+    def extract(self, _self_index=None):
+        parent = self.parent
+        _self_index = _removing(parent, self, _self_index)
+        extracted = super(TrackedString, self).extract(_self_index)
+        if isinstance(parent, TrackingMixin):
+            parent._changed()
+        return extracted
+
+
+class TrackingMixin(object):
+    """Mutation hooks shared by `TrackedTag` and `TrackedSoup`."""
+
+    #: Bumped on the root of a tree whenever anything in it changes.
+    _generation = 0
+
+    # Tag._all_strings compares exact string classes, so TrackedString has
+    # to be listed for a tracked tree's text to be found at all.
+    MAIN_CONTENT_STRING_TYPES = {NavigableString, CData, TrackedString}
+
+    #: Maps ``strip`` to this tag's strings, and ``(separator, strip)`` to
+    #: its text, for the default string types.
+    _text_cache = None
+
+    #: Maps ``id(child)`` to the child's index in ``contents``; only the
+    #: first ``_indexed`` children's entries are known to be right.
+    _positions = None
+    _indexed = 0
+
+    def _changed(self, text=True):
+        tag = self
+        while True:
+            if text and isinstance(tag, TrackingMixin):
+                tag._text_cache = None
+            parent = tag.parent
+            if parent is None:
+                if isinstance(tag, TrackingMixin):
+                    tag._generation += 1
+                return
+            tag = parent
+
+    def _moved(self, position=0):
+        # Children from ``position`` on may have moved.
+        if position < self._indexed:
+            self._indexed = position
+
+    def index(self, element):
+        i = self._position(element)
+        if not isinstance(element, (TrackedString, TrackingMixin)):
+            # bs4's own classes -- CData, Comment, the strings inside
+            # <script> and the like, a Tag from an untracked tree -- have
+            # no hook of their own, and extract() looks up where an
+            # element is just before it removes it. Assume it's leaving.
+            self._moved(i)
+            self._changed()
+        return i
+
+    def _position(self, element):
+        contents = self.contents
+        if len(contents) < INDEXED_CHILDREN:
+            return super(TrackingMixin, self).index(element)
+        if self._positions is not None:
+            i = self._positions.get(id(element))
+            if i is not None and i < len(contents) and contents[i] is element:
+                return i
+        i = self._index_from(self._indexed, element)
+        if i is None and self._indexed:
+            # contents was changed behind this tag's back.
+            i = self._index_from(0, element)
+        if i is None:
+            raise ValueError("Tag.index: element not in tag")
+        return i
+
+    def _index_from(self, start, element):
+        # Bring the positions of the children from ``start`` on up to
+        # date, and return ``element``'s if it's among them.
+        contents = self.contents
+        positions = self._positions
+        if positions is None or not start or len(positions) > 2 * len(contents):
+            # Entries for children that have left are dropped now and then.
+            positions = self._positions = {}
+            start = 0
+        positions.update(zip(map(id, contents[start:]), range(start, len(contents))))
+        self._indexed = len(contents)
+        i = positions.get(id(element))
+        if i is not None and i >= start and contents[i] is element:
+            return i
+        return None
+
+    def _insert(self, position, new_child):
+        if isinstance(new_child, str) and not isinstance(new_child, NavigableString):
+            new_child = TrackedString(new_child)
+        inserted = super(TrackingMixin, self)._insert(position, new_child)
+        # After the insert: moving a child within this tag looks its
+        # position up first.
+        self._moved(max(position, 0))
+        self._changed()
+        return inserted
+
+    def extract(self, _self_index=None):
+        parent = self.parent
+        _self_index = _removing(parent, self, _self_index)
+        extracted = super(TrackingMixin, self).extract(_self_index)
+        if isinstance(parent, TrackingMixin):
+            parent._changed()
+        return extracted
+
+    def clear(self, decompose=False):
+        if self.contents:
+            bulk.clear(self, decompose)
+            self._positions = None
+            self._indexed = 0
+            self._changed()
+
+    def decompose(self):
+        parent = self.parent
+        index = _removing(parent, self)
+        bulk.decompose_many([self])
+        if isinstance(parent, TrackingMixin):
+            parent._moved(index)
+            parent._changed()
+
+    def insert(self, position, *new_children):
+        if len(new_children) > 1:
+            return self.insert_many(position, new_children)
+        return super(TrackingMixin, self).insert(position, *new_children)
+
+    def insert_many(self, position, elements):
+        """Insert every element of ``elements`` in one splice, starting at
+        ``contents[position]``; see souptools.bulk."""
+        elements = list(elements)
+        # Trees that lose elements to this one have changed too.
+        sources = [element.parent if not isinstance(element, BeautifulSoup) else element
+                   for element in elements if isinstance(element, PageElement)]
+        inserted = bulk.insert_many(self, position, elements, TrackedString)
+        self._moved(max(position, 0))
+        notified = set()
+        for source in sources:
+            if isinstance(source, TrackingMixin) and id(source) not in notified:
+                notified.add(id(source))
+                source._moved()
+                source._changed()
+        if inserted:
+            self._changed()
+        return inserted
+
+    def extend(self, tags):
+        if isinstance(tags, Tag):
+            tags = list(tags.contents)
+        elif isinstance(tags, (PageElement, str)):
+            return super(TrackingMixin, self).extend(tags)
+        return self.insert_many(len(self.contents), tags)
+
+    def insert_before(self, *args):
+        parent = self.parent
+        if parent is None:
+            raise ValueError("Element has no parent, so 'before' has no meaning.")
+        if any(x is self for x in args):
+            raise ValueError("Can't insert an element before itself.")
+        return _insert_many(parent, parent.index(self), args)
+
+    def insert_after(self, *args):
+        parent = self.parent
+        if parent is None:
+            raise ValueError("Element has no parent, so 'after' has no meaning.")
+        if any(x is self for x in args):
+            raise ValueError("Can't insert an element after itself.")
+        return _insert_many(parent, parent.index(self) + 1, args)
+
+    def __setitem__(self, key, value):
+        super(TrackingMixin, self).__setitem__(key, value)
+        self._changed(text=False)
+
+    def __delitem__(self, key):
+        super(TrackingMixin, self).__delitem__(key)
+        self._changed(text=False)
+
+    def __eq__(self, other):
+        return tree_equal(self, other)
+
+    def __ne__(self, other):
+        return not tree_equal(self, other)
+
+    # Defining __eq__ would otherwise make tracked tags unhashable.
+    __hash__ = Tag.__hash__
+
+    def smooth(self):
+        """Merge adjacent strings in linear time; see souptools.smooth."""
+        changed = smooth(self, TrackedString)
+        # Joined strings change the text seen with a separator, both in the
+        # changed tags and in every tag above them. The walk up stops at
+        # a tag it has already cleared, so it's linear however many
+        # changed tags share their ancestors.
+        cleared = set()
+        for tag in changed:
+            if isinstance(tag, TrackingMixin):
+                tag._moved()
+            while tag is not None and id(tag) not in cleared:
+                cleared.add(id(tag))
+                if isinstance(tag, TrackingMixin):
+                    tag._text_cache = None
+                tag = tag.parent
+        if changed:
+            self._changed()
+
+    def get_text(self, separator='', strip=False, types=PageElement.default):
+        if types is not PageElement.default:
+            return super(TrackingMixin, self).get_text(separator, strip, types)
+        cache = self._text_cache_for_update()
+        key = (separator, strip)
+        text = cache.get(key)
+        if text is None:
+            text = cache[key] = separator.join(self._text_pieces(strip))
+        return text
+
+    getText = get_text
+
+    @property
+    def stripped_strings(self):
+        return iter(self._text_pieces(True))
+
+    def iter_text(self, separator='', strip=False, types=PageElement.default):
+        """Yield the pieces of ``get_text(separator, strip, types)`` --
+        each string, with ``separator`` between them -- without joining
+        them into one string."""
+        if types is PageElement.default and self._text_cache and strip in self._text_cache:
+            strings = self._text_cache[strip]
+        else:
+            strings = self._all_strings(strip, types)
+        first = True
+        for string in strings:
+            if not first and separator:
+                yield separator
+            first = False
+            yield string
+
+    def _text_cache_for_update(self):
+        cache = self._text_cache
+        if cache is None:
+            cache = self._text_cache = {}
+        return cache
+
+    def _text_types(self):
+        if self.interesting_string_types is None:
+            return self.MAIN_CONTENT_STRING_TYPES
+        return self.interesting_string_types
+
+    def _text_pieces(self, strip):
+        cache = self._text_cache_for_update()
+        pieces = cache.get(strip)
+        if pieces is None:
+            pieces = cache[strip] = tuple(self._collect_text(strip))
+        return pieces
+
+    def _collect_text(self, strip):
+        # The same strings _all_strings() yields, but a tracked tag below
+        # this one whose strings are already cached (for the same string
+        # types) is taken from its cache and its subtree skipped.
+        types = self._text_types()
+        end = self._last_descendant().next_element
+        # Not self.next_element: a soup's root doesn't link to its first child.
+        element = self.contents[0] if self.contents else end
+        while element is not end:
+            if isinstance(element, TrackingMixin):
+                cache = element._text_cache
+                if cache and strip in cache and element._text_types() == types:
+                    for string in cache[strip]:
+                        yield string
+                    element = element._last_descendant().next_element
+                    continue
+            elif isinstance(element, NavigableString) and _wanted(element, types):
+                if not strip:
+                    yield element
+                else:
+                    stripped = element.strip()
+                    if stripped:
+                        yield stripped
+            element = element.next_element
+
+
+def _removing(parent, element, index=None):
+    # ``element`` is about to leave ``parent``: where from.
+    if isinstance(parent, TrackingMixin):
+        if index is None:
+            index = parent.index(element)
+        parent._moved(index)
+    return index
+
+
+def _insert_many(tag, position, elements):
+    if isinstance(tag, TrackingMixin):
+        return tag.insert_many(position, elements)
+    return bulk.insert_many(tag, position, elements, TrackedString)
+
+
+def _wanted(string, types):
+    # How Tag._all_strings decides whether a string's class is wanted.
+    if isinstance(types, type):
+        return type(string) is types
+    return types is None or type(string) in types
+
+
+class TrackedTag(TrackingMixin, Tag):
+    pass
+
+
+TRACKED_ELEMENT_CLASSES = {Tag: TrackedTag, NavigableString: TrackedString}
+
+
+class TrackedSoup(TrackingMixin, BeautifulSoup):
+    """A BeautifulSoup whose tree is built from tracked elements."""
+
+    def __init__(self, markup='', features=None, *args, **kwargs):
+        element_classes = dict(TRACKED_ELEMENT_CLASSES)
+        element_classes.update(kwargs.pop('element_classes', None) or {})
+        super(TrackedSoup, self).__init__(markup, features, *args, element_classes=element_classes, **kwargs)
+
+    def string_container(self, base_class=None):
+        # bs4 only picks the special string classes for <script>, <style>
+        # and <template> when the container is exactly NavigableString,
+        # which it no longer is once it's been swapped for TrackedString.
+        if base_class is None and self.string_container_stack:
+            container = self.builder.string_containers.get(self.string_container_stack[-1].name)
+            if container is not None:
+                return container
+        return super(TrackedSoup, self).string_container(base_class)
@@ -0,0 +1,166 @@
+"""Feed markup to a BeautifulSoup object a chunk at a time.
+
+``BeautifulSoup(markup, 'html.parser')`` needs the whole document as one
+string. `IncrementalParser` drives the same tree builder and the same
+``html.parser`` tokenizer, but takes the document in pieces: strings, or
+bytes that are decoded incrementally. The finished tree is identical to
+the one the constructor builds.
+
+`parse_file` reads a document from disk that way through a memory map, so
+the file is never held in memory as a whole, neither as bytes nor decoded:
+apart from the tree, only one chunk (and whatever markup html.parser is
+still waiting to finish) exists at a time.
+"""
+import codecs
+import mmap
+import os
+
+from bs4 import BeautifulSoup
+from bs4.builder._htmlparser import BeautifulSoupHTMLParser
+from bs4.dammit import EncodingDetector
+from bs4.exceptions import ParserRejectedMarkup
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# How much of a byte stream to look at for a <meta charset> declaration.
+SNIFF_SIZE = 1024
+
+
+class IncrementalParser(object):
+    """Builds a soup from markup passed to `feed` in pieces.
+
+    :param soup_class: The BeautifulSoup subclass to build.
+    :param encoding: Encoding of byte chunks. If None, it's taken from a
+        byte order mark or a declaration near the start of the document,
+        falling back to UTF-8.
+    :param errors: How to handle undecodable bytes.
+    :param soup_kwargs: Passed on to the soup's constructor.
+    """
+
+    def __init__(self, soup_class=BeautifulSoup, encoding=None, errors='replace', **soup_kwargs):
+        soup = soup_class('', 'html.parser', **soup_kwargs)
+        soup.reset()
+        soup.builder.initialize_soup(soup)
+        soup.builder.reset()
+        args, kwargs = soup.builder.parser_args
+        self.soup = soup
+        self.parser = BeautifulSoupHTMLParser(soup, *args, **kwargs)
+        self.encoding = encoding
+        self.errors = errors
+        self.decoder = None
+        self.pending = b''
+        self.closed = False
+
+    def feed(self, chunk):
+        """Parse another piece of the document."""
+        if self.closed:
+            raise ValueError("feed() called on a closed IncrementalParser")
+        if isinstance(chunk, (bytes, bytearray, memoryview)):
+            chunk = self._decode(bytes(chunk))
+        if chunk:
+            self._feed_text(chunk)
+
+    def close(self):
+        """Finish parsing and return the soup."""
+        if self.closed:
+            return self.soup
+        if self.decoder is None and self.pending:
+            self._start_decoding()
+        if self.decoder is not None:
+            tail = self.decoder.decode(self.pending, final=True)
+            self.pending = b''
+            if tail:
+                self._feed_text(tail)
+        try:
+            self.parser.close()
+        except AssertionError as e:
+            raise ParserRejectedMarkup(e)
+        self.parser.already_closed_empty_element = []
+        soup = self.soup
+        soup.endData()
+        while soup.currentTag is not None and soup.currentTag.name != soup.ROOT_TAG_NAME:
+            soup.popTag()
+        soup.builder.soup = None
+        self.closed = True
+        return soup
+
+    def _feed_text(self, text):
+        try:
+            self.parser.feed(text)
+        except AssertionError as e:
+            # html.parser signals fatal problems, usually with a doctype,
+            # this way; BeautifulSoup itself does the same translation.
+            raise ParserRejectedMarkup(e)
+
+    def _decode(self, data):
+        if self.decoder is not None:
+            return self.decoder.decode(data)
+        # Wait for enough of the document to find its encoding.
+        self.pending += data
+        if len(self.pending) < SNIFF_SIZE:
+            return ''
+        self._start_decoding()
+        data = self.pending
+        self.pending = b''
+        return self.decoder.decode(data)
+
+    def _start_decoding(self):
+        data, bom_encoding = EncodingDetector.strip_byte_order_mark(self.pending)
+        encoding = self.encoding or bom_encoding
+        if encoding is None:
+            encoding = EncodingDetector.find_declared_encoding(data, is_html=True) or 'utf-8'
+        try:
+            self.decoder = codecs.getincrementaldecoder(encoding)(self.errors)
+        except LookupError:
+            encoding = 'utf-8'
+            self.decoder = codecs.getincrementaldecoder(encoding)(self.errors)
+        self.soup.original_encoding = encoding
+        self.pending = data
+
+
+def iter_chunks(source, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Split ``source`` into chunks: it may be a string, a bytestring, an
+    ``mmap``, a path (as an ``os.PathLike``; a plain string is markup), a
+    file-like object or any iterable of strings or bytestrings."""
+    if isinstance(source, os.PathLike):
+        yield from iter_file(source, chunk_size)
+    elif isinstance(source, (str, bytes, bytearray, memoryview, mmap.mmap)):
+        # Slicing an mmap copies just that slice out of the file.
+        for start in range(0, len(source), chunk_size):
+            yield source[start:start + chunk_size]
+    elif hasattr(source, 'read'):
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    else:
+        for chunk in source:
+            yield chunk
+
+
+def iter_file(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield the bytes of the file at ``path`` in chunks, read through a
+    memory map."""
+    with open(path, 'rb') as f:
+        if not os.fstat(f.fileno()).st_size:
+            # An empty file can't be mapped.
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for start in range(0, len(mapped), chunk_size):
+                yield mapped[start:start + chunk_size]
+
+
+def parse_chunks(source, soup_class=BeautifulSoup, chunk_size=DEFAULT_CHUNK_SIZE, encoding=None, **soup_kwargs):
+    """Build a soup from ``source`` (see `iter_chunks`) without first
+    joining it into one string."""
+    parser = IncrementalParser(soup_class, encoding, **soup_kwargs)
+    for chunk in iter_chunks(source, chunk_size):
+        parser.feed(chunk)
+    return parser.close()
+
+
+def parse_file(path, soup_class=BeautifulSoup, chunk_size=DEFAULT_CHUNK_SIZE, encoding=None, **soup_kwargs):
+    """Build a soup from the file at ``path``, feeding the parser one
+    chunk of the memory-mapped file at a time; see `parse_chunks`."""
+    return parse_chunks(iter_file(path, chunk_size), soup_class, chunk_size, encoding, **soup_kwargs)
@@ -0,0 +1,185 @@
+"""Seeded generator for large synthetic HTML documents.
+
+The output is grown out of the inline fixtures in tests/testsuite.py: it
+starts with the same head and landmark elements (``#test_id``,
+``#main_tag``, the ``aside:colon`` tag) and then repeats the same kinds of
+paragraphs, links, images and classes until the requested size is reached.
+Documents are produced as a stream of string chunks, so a 500 MB document
+never has to exist in memory at once.
+"""
+import random
+import re
+
+KB = 1024
+MB = 1024 * KB
+MIN_SIZE = 1 * KB
+MAX_SIZE = 500 * MB
+
+HEAD = '<html><head><title>The test title</title></head>\n<body>\n'
+LANDMARKS = (
+    '<div id="test_id">Find me!</div>\n'
+    '<main id="main_tag"><img src="https://www.python.org/static/community_logos/python-logo.png" width="200px" height="130px" /></main>\n'
+    '<aside:colon>Hello, World!</aside:colon>\n'
+)
+TAIL = '</body>\n</html>\n'
+
+CONTAINER_TAGS = ('div', 'p', 'main', 'h1', 'i', 'a', 'aside:colon')
+VOID_TAGS = ('img',)
+TEXTS = (
+    'This is a paragraph.',
+    'This is a paragraph with hyperlinks',
+    'This is a hyperlink to wikipedia!',
+    'This is a hyperlink to facebook!',
+    'Site goes under Creative Commons',
+    'Find me!',
+    'Hello, World!',
+    'Title text',
+    'Google link',
+)
+URLS = (
+    'https://www.wikipedia.org/',
+    'https://www.facebook.com/',
+    'https://creativecommons.org/',
+    'https://www.google.com/',
+)
+CLASSES = ('p_class1', 'p_class2')
+
+_SIZE_PATTERN = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([KMG]?B?)\s*$', re.IGNORECASE)
+_SIZE_UNITS = {'': 1, 'B': 1, 'K': KB, 'KB': KB, 'M': MB, 'MB': MB, 'G': 1024 * MB, 'GB': 1024 * MB}
+
+
+def parse_size(size):
+    """Turn ``1KB``, ``2.5MB`` or a plain integer into a number of bytes."""
+    if isinstance(size, int):
+        return size
+    match = _SIZE_PATTERN.match(size)
+    if match is None:
+        raise ValueError("Invalid size: %r" % size)
+    number, unit = match.groups()
+    return int(float(number) * _SIZE_UNITS[unit.upper()])
+
+
+class DocumentGenerator(object):
+    """Produces one synthetic document; see `iter_document` for the options."""
+
+    def __init__(self, size='1KB', depth=6, fanout=4, attr_density=1.0, text_ratio=0.5, seed=0, chunk_size=64 * KB):
+        self.size = parse_size(size)
+        if not MIN_SIZE <= self.size <= MAX_SIZE:
+            raise ValueError("Document size must be between 1KB and 500MB, not %d bytes" % self.size)
+        if depth < 1 or fanout < 1:
+            raise ValueError("depth and fanout must both be at least 1")
+        if not 0 <= text_ratio <= 1:
+            raise ValueError("text_ratio must be between 0 and 1")
+        self.depth = depth
+        self.fanout = fanout
+        self.attr_density = attr_density
+        self.text_ratio = text_ratio
+        self.chunk_size = chunk_size
+        self.random = random.Random(seed)
+        self.counter = 0
+
+    def _attributes(self, name):
+        rand = self.random
+        count = int(self.attr_density)
+        if rand.random() < self.attr_density - count:
+            count += 1
+        pieces = []
+        if name == 'a':
+            pieces.append(' href="%s"' % rand.choice(URLS))
+            count -= 1
+        for i in range(count):
+            self.counter += 1
+            kind = rand.randrange(3)
+            if kind == 0:
+                pieces.append(' id="id%d"' % self.counter)
+            elif kind == 1:
+                pieces.append(' class="%s"' % ' '.join(rand.sample(CLASSES, rand.randint(1, len(CLASSES)))))
+            else:
+                pieces.append(' data-n="%d"' % self.counter)
+        return ''.join(pieces)
+
+    def _void_tag(self):
+        return '<img src="%s" width="%dpx" height="%dpx" />' % (
+            self.random.choice(URLS), self.random.randint(10, 400), self.random.randint(10, 400))
+
+    def _body(self, budget):
+        # Depth-first generation with an explicit stack of open tags, so
+        # that deep documents don't need deep Python recursion. Each stack
+        # entry is [tag name, children still to emit].
+        rand = self.random
+        stack = []
+        emitted = 0
+        while emitted < budget or stack:
+            if emitted >= budget:
+                # Out of budget: close whatever is still open.
+                name, remaining = stack.pop()
+                piece = '</%s>' % name
+            elif stack and stack[-1][1] == 0:
+                name, remaining = stack.pop()
+                piece = '</%s>\n' % name if not stack else '</%s>' % name
+            else:
+                if stack:
+                    stack[-1][1] -= 1
+                if stack and (len(stack) >= self.depth or rand.random() < self.text_ratio):
+                    piece = rand.choice(TEXTS)
+                elif stack and rand.random() < 0.1:
+                    piece = self._void_tag()
+                else:
+                    name = rand.choice(CONTAINER_TAGS)
+                    piece = '<%s%s>' % (name, self._attributes(name))
+                    stack.append([name, rand.randint(1, self.fanout)])
+            emitted += len(piece)
+            yield piece
+
+    def __iter__(self):
+        budget = self.size - len(HEAD) - len(LANDMARKS) - len(TAIL)
+        buffered = [HEAD, LANDMARKS]
+        buffered_size = len(HEAD) + len(LANDMARKS)
+        for piece in self._body(budget):
+            buffered.append(piece)
+            buffered_size += len(piece)
+            if buffered_size >= self.chunk_size:
+                yield ''.join(buffered)
+                buffered = []
+                buffered_size = 0
+        buffered.append(TAIL)
+        yield ''.join(buffered)
+
+
+def iter_document(size='1KB', depth=6, fanout=4, attr_density=1.0, text_ratio=0.5, seed=0, chunk_size=64 * KB):
+    """Yield a synthetic HTML document as string chunks.
+
+    :param size: Approximate size of the document in bytes, or a string
+        like ``'20MB'``. Between 1KB and 500MB.
+    :param depth: Maximum nesting depth of the generated body content.
+    :param fanout: Maximum number of children per element.
+    :param attr_density: Average number of attributes per tag.
+    :param text_ratio: Probability that a child is a string rather than a tag.
+    :param seed: The same seed and options always give the same document.
+    :param chunk_size: Approximate size of each yielded chunk.
+    """
+    return iter(DocumentGenerator(size, depth, fanout, attr_density, text_ratio, seed, chunk_size))
+
+
+def generate_document(**options):
+    """Return a whole synthetic document as one string; only for small sizes."""
+    return ''.join(iter_document(**options))
+
+
+def write_document(target, **options):
+    """Stream a synthetic document into a path or a text file object.
+
+    :return: The number of characters written.
+    """
+    if hasattr(target, 'write'):
+        return _write_chunks(target, iter_document(**options))
+    with open(target, 'w', encoding='utf-8') as f:
+        return _write_chunks(f, iter_document(**options))
+
+
+def _write_chunks(f, chunks):
+    written = 0
+    for chunk in chunks:
+        f.write(chunk)
+        written += len(chunk)
+    return written
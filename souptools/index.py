@@ -0,0 +1,167 @@
+"""Lookup tables for tag name, id and class queries.
+
+`IndexedSoup` answers the common shapes of ``find``/``find_all`` --
+a tag name, an ``id`` or a ``class_`` token, optionally combined -- from a
+`SoupIndex` instead of walking the whole tree. Every other query falls
+through to Beautiful Soup's normal implementation.
+
+The index is built lazily on the first query (or at parse time with
+``build_index=True``) and rebuilt on the next query after the tree changes;
+see souptools.element for which changes are noticed.
+"""
+from bs4 import Tag
+from bs4.element import ResultSet
+
+from souptools.element import TrackedSoup
+
+
+class SoupIndex(object):
+    """Maps tag names, ids and class tokens to tags in document order."""
+
+    def __init__(self, root):
+        self.root = root
+        self.generation = None
+        self.by_name = {}
+        self.by_id = {}
+        self.by_class = {}
+
+    @property
+    def stale(self):
+        return self.generation != self.root._generation
+
+    def refresh(self):
+        if self.stale:
+            self.build()
+
+    def build(self):
+        by_name = {}
+        by_id = {}
+        by_class = {}
+        for element in self.root.descendants:
+            if not isinstance(element, Tag):
+                continue
+            by_name.setdefault(element.name, []).append(element)
+            if element.prefix:
+                by_name.setdefault('%s:%s' % (element.prefix, element.name), []).append(element)
+            attrs = element.attrs
+            if 'id' in attrs and isinstance(attrs['id'], str):
+                by_id.setdefault(attrs['id'], []).append(element)
+            classes = attrs.get('class')
+            if isinstance(classes, str):
+                classes = classes.split()
+            if classes:
+                # dict.fromkeys drops repeated tokens but keeps their order.
+                for token in dict.fromkeys(classes):
+                    by_class.setdefault(token, []).append(element)
+        self.by_name = by_name
+        self.by_id = by_id
+        self.by_class = by_class
+        self.generation = self.root._generation
+
+    def lookup(self, name=None, id=None, class_=None):
+        """All tags matching every given criterion, in document order."""
+        self.refresh()
+        if id is not None:
+            candidates = self.by_id.get(id, ())
+        elif class_ is not None:
+            candidates = self.by_class.get(class_, ())
+        elif name is not None:
+            return list(self.by_name.get(name, ()))
+        else:
+            raise ValueError("lookup() needs at least one of name, id or class_")
+        return [tag for tag in candidates if _matches(tag, name, id, class_)]
+
+
+def _matches(tag, name, id, class_):
+    if name is not None and not _name_matches(tag, name):
+        return False
+    if id is not None and tag.attrs.get('id') != id:
+        return False
+    if class_ is not None:
+        classes = tag.attrs.get('class')
+        if isinstance(classes, str):
+            classes = classes.split()
+        if not classes or class_ not in classes:
+            return False
+    return True
+
+
+def _name_matches(tag, name):
+    # The same rule bs4 uses: 'prefix:name' also matches a namespaced tag.
+    if tag.name == name:
+        return True
+    if ':' in name:
+        prefix, local_name = name.split(':', 1)
+        return tag.name == local_name and tag.prefix == prefix
+    return False
+
+
+def _simple_query(name, attrs, recursive, string, kwargs):
+    """Turn find_all arguments into lookup() arguments, or None if the
+    query is not one the index can answer."""
+    if not recursive or string is not None or 'text' in kwargs:
+        return None
+    if name is not None and not isinstance(name, str):
+        return None
+    filters = dict(kwargs)
+    if attrs is not None:
+        if not isinstance(attrs, dict):
+            return None
+        for key, value in attrs.items():
+            if key in filters:
+                return None
+            filters[key] = value
+    if 'class_' in filters:
+        if 'class' in filters:
+            return None
+        filters['class'] = filters.pop('class_')
+    if not set(filters) <= {'id', 'class'}:
+        return None
+    for value in filters.values():
+        if not isinstance(value, str) or not value or value != value.strip() or len(value.split()) != 1:
+            return None
+    if name is None and not filters:
+        return None
+    return dict(name=name, id=filters.get('id'), class_=filters.get('class'))
+
+
+class IndexedSoup(TrackedSoup):
+    """A BeautifulSoup whose ``find``/``find_all`` use a `SoupIndex`.
+
+    :param build_index: Build the index right after parsing instead of
+        on the first query.
+    """
+
+    _index = None
+
+    def __init__(self, markup='', features=None, *args, **kwargs):
+        build_index = kwargs.pop('build_index', False)
+        super(IndexedSoup, self).__init__(markup, features, *args, **kwargs)
+        if build_index:
+            self.soup_index.build()
+
+    # Not ``index``: that's Tag.index(element), which extract(),
+    # replace_with() and the rest call on an element's parent.
+    @property
+    def soup_index(self):
+        if self._index is None:
+            self._index = SoupIndex(self)
+        return self._index
+
+    def find_all(self, name=None, attrs=None, recursive=True, string=None, limit=None, **kwargs):
+        query = _simple_query(name, attrs, recursive, string, kwargs)
+        if query is None:
+            return super(IndexedSoup, self).find_all(name, attrs, recursive, string, limit, **kwargs)
+        found = self.soup_index.lookup(**query)
+        if limit:
+            found = found[:limit]
+        return ResultSet(None, found)
+
+    def find(self, name=None, attrs=None, recursive=True, string=None, **kwargs):
+        query = _simple_query(name, attrs, recursive, string, kwargs)
+        if query is None:
+            return super(IndexedSoup, self).find(name, attrs, recursive, string, **kwargs)
+        found = self.soup_index.lookup(**query)
+        if found:
+            return found[0]
+        return None
@@ -0,0 +1,259 @@
+"""Counters and timers for the hot paths of parsing, searching and output.
+
+Nothing is measured until `enable` is called. Enabling wraps a handful of
+bs4 methods -- the tag and string constructors, the tree-building
+callbacks, ``_find_all``, ``insert``, ``extract``, ``smooth``, ``decode``
+and ``encode`` -- and `disable` puts the originals back, so when
+instrumentation is off bs4 runs exactly its own code. The souptools
+functions that do the same work their own way (souptools.smooth,
+souptools.bulk, souptools.clone, souptools.query, souptools.output) check
+`enabled` once per call and count only then.
+
+Counters:
+
+- ``nodes_created``: tags and strings constructed.
+- ``strings_merged``: strings folded into a neighbouring string by
+  ``smooth()``.
+- ``find_all_calls`` and ``predicate_evaluations``: searches, and the
+  elements they tested.
+- ``relinks``: elements inserted into or extracted from a tree.
+- ``serialized_characters`` and ``serialized_bytes``: output of
+  ``decode()`` (which ``str()``, ``prettify()`` and ``encode()`` go
+  through) and of ``encode()``, and of souptools.output.write_to as
+  characters or bytes depending on whether it was given an encoding.
+
+Timers, in seconds, count only the outermost call when calls nest:
+
+- ``parse``: whole parses.
+- ``tree_building``: the part of a parse spent in BeautifulSoup's
+  tree-building callbacks. The rest, ``tokenize``, is the tokenizer's.
+- ``find_all`` and ``serialize``: searches and ``decode()``.
+
+`as_dict` and `to_prometheus` export everything. The numbers are global
+and not meant to be updated from more than one thread at a time.
+"""
+import collections
+import contextlib
+import functools
+import time
+
+from bs4 import BeautifulSoup, NavigableString, Tag
+from bs4.element import PageElement
+
+#: Whether counting is on. Checked by souptools' own hot paths.
+enabled = False
+
+counters = collections.Counter()
+timers = collections.Counter()
+
+COUNTERS = collections.OrderedDict([
+    ('nodes_created', 'Tags and strings constructed.'),
+    ('strings_merged', 'Strings folded into a neighbouring string by smooth().'),
+    ('find_all_calls', 'Searches run.'),
+    ('predicate_evaluations', 'Elements tested by searches.'),
+    ('relinks', 'Elements inserted into or extracted from a tree.'),
+    ('serialized_characters', 'Characters of markup produced by decode() and write_to().'),
+    ('serialized_bytes', 'Bytes of markup produced by encode() and write_to().'),
+])
+
+TIMERS = collections.OrderedDict([
+    ('parse', 'Time spent parsing.'),
+    ('tree_building', 'Time spent building trees while parsing.'),
+    ('tokenize', 'Time spent tokenizing while parsing.'),
+    ('find_all', 'Time spent searching.'),
+    ('serialize', 'Time spent in decode().'),
+])
+
+_patches = []
+_depth = collections.Counter()
+
+
+def enable():
+    """Start counting. Counts carry on from where they were; see `reset`."""
+    global enabled
+    if enabled:
+        return
+    _patch(Tag, '__init__', _counted_call('nodes_created'))
+    _patch(NavigableString, '__new__', _counted_new)
+    _patch(BeautifulSoup, '_feed', _timed('parse'))
+    for name in ('handle_starttag', 'handle_endtag', 'endData'):
+        _patch(BeautifulSoup, name, _timed('tree_building'))
+    _patch(PageElement, '_find_all', _counted_search)
+    _patch(Tag, 'insert', _counted_insert)
+    _patch(PageElement, 'extract', _counted_call('relinks'))
+    _patch(Tag, 'smooth', _counted_smooth)
+    _patch(Tag, 'decode', _counted_decode)
+    _patch(Tag, 'encode', _counted_encode)
+    enabled = True
+
+
+def disable():
+    """Stop counting and restore bs4's own methods. Counts are kept."""
+    global enabled
+    while _patches:
+        owner, name, original = _patches.pop()
+        setattr(owner, name, original)
+    _depth.clear()
+    enabled = False
+
+
+def reset():
+    """Set every counter and timer back to zero."""
+    counters.clear()
+    timers.clear()
+
+
+@contextlib.contextmanager
+def instrumented():
+    """Count for the duration of a ``with`` block, from zero."""
+    reset()
+    enable()
+    try:
+        yield
+    finally:
+        disable()
+
+
+def totals():
+    """Every counter and timer (as ``<name>_seconds``) in one Counter, for
+    taking differences."""
+    result = collections.Counter(counters)
+    for name, seconds in timers.items():
+        result[name + '_seconds'] = seconds
+    return result
+
+
+def as_dict():
+    """The counters and timers as a JSON-able dict."""
+    seconds = dict((name, timers[name]) for name in TIMERS)
+    seconds['tokenize'] = max(timers['parse'] - timers['tree_building'], 0.0)
+    return {
+        'counters': dict((name, counters[name]) for name in COUNTERS),
+        'seconds': seconds,
+    }
+
+
+def to_prometheus(prefix='souptools_'):
+    """The counters and timers in the Prometheus text exposition format."""
+    report = as_dict()
+    lines = []
+    for section, suffix, descriptions in (('counters', '_total', COUNTERS),
+                                          ('seconds', '_seconds_total', TIMERS)):
+        for name, description in descriptions.items():
+            metric = prefix + name + suffix
+            lines.append('# HELP %s %s' % (metric, description))
+            lines.append('# TYPE %s counter' % metric)
+            lines.append('%s %s' % (metric, report[section][name]))
+    return '\n'.join(lines) + '\n'
+
+
+def counted(iterable, name):
+    """``iterable``, adding one to counter ``name`` per item taken."""
+    for item in iterable:
+        counters[name] += 1
+        yield item
+
+
+def _patch(owner, name, wrap):
+    original = owner.__dict__[name]
+    _patches.append((owner, name, original))
+    setattr(owner, name, wrap(original))
+
+
+def _counted_call(name):
+    def wrap(original):
+        @functools.wraps(original)
+        def wrapper(*args, **kwargs):
+            counters[name] += 1
+            return original(*args, **kwargs)
+        return wrapper
+    return wrap
+
+
+def _counted_new(original):
+    new = original.__func__ if isinstance(original, staticmethod) else original
+
+    @functools.wraps(new)
+    def __new__(cls, *args, **kwargs):
+        counters['nodes_created'] += 1
+        return new(cls, *args, **kwargs)
+    return staticmethod(__new__)
+
+
+def _timed(name):
+    # Only the outermost of nested calls is timed.
+    def wrap(original):
+        @functools.wraps(original)
+        def wrapper(*args, **kwargs):
+            if _depth[name]:
+                return original(*args, **kwargs)
+            _depth[name] += 1
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                timers[name] += time.perf_counter() - start
+                _depth[name] -= 1
+        return wrapper
+    return wrap
+
+
+def _counted_search(original):
+    timed = _timed('find_all')(original)
+
+    @functools.wraps(original)
+    def _find_all(self, name, attrs, string, limit, generator, **kwargs):
+        counters['find_all_calls'] += 1
+        return timed(self, name, attrs, string, limit, counted(generator, 'predicate_evaluations'), **kwargs)
+    return _find_all
+
+
+def _counted_insert(original):
+    @functools.wraps(original)
+    def insert(self, position, *new_children):
+        counters['relinks'] += len(new_children)
+        return original(self, position, *new_children)
+    return insert
+
+
+def _counted_smooth(original):
+    @functools.wraps(original)
+    def smooth(self):
+        if _depth['smooth']:
+            return original(self)
+        # Tag.smooth recurses into itself; count the strings once, around
+        # the outermost call.
+        before = _string_count(self)
+        _depth['smooth'] += 1
+        try:
+            return original(self)
+        finally:
+            _depth['smooth'] -= 1
+            counters['strings_merged'] += before - _string_count(self)
+    return smooth
+
+
+def _string_count(tag):
+    return sum(1 for element in tag.descendants if isinstance(element, NavigableString))
+
+
+def _counted_decode(original):
+    timed = _timed('serialize')(original)
+
+    @functools.wraps(original)
+    def decode(self, *args, **kwargs):
+        outermost = not _depth['serialize']
+        markup = timed(self, *args, **kwargs)
+        if outermost:
+            counters['serialized_characters'] += len(markup)
+        return markup
+    return decode
+
+
+def _counted_encode(original):
+    @functools.wraps(original)
+    def encode(self, *args, **kwargs):
+        markup = original(self, *args, **kwargs)
+        counters['serialized_bytes'] += len(markup)
+        return markup
+    return encode
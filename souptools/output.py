@@ -0,0 +1,122 @@
+"""Serialize a tree straight into a file.
+
+``str(soup)``, ``prettify()`` and ``encode()`` collect every piece of
+markup in a list, join it into one string holding the whole document and,
+for ``encode()``, copy that into a bytestring as well. Writing a large
+document out that way needs two or three times its size on top of the tree.
+
+`write_to` produces the same output piece by piece: `iter_markup` walks
+the tree with the loop ``Tag.decode`` uses, and the pieces are written out
+whenever ``buffer_size`` characters have built up. Only the buffer (plus
+the piece being added, which is never more than one tag or string) exists
+at any time.
+"""
+import codecs
+
+from bs4 import BeautifulSoup, NavigableString, Tag
+from bs4.element import DEFAULT_OUTPUT_ENCODING, PYTHON_SPECIFIC_ENCODINGS
+from bs4.formatter import Formatter
+
+from souptools import instrument
+
+DEFAULT_BUFFER_SIZE = 64 * 1024
+
+
+def write_to(element, fp, formatter='minimal', pretty=False, encoding=None,
+             errors='xmlcharrefreplace', buffer_size=DEFAULT_BUFFER_SIZE):
+    """Write ``element`` to ``fp`` as ``str(element)`` (or, with
+    ``pretty``, ``element.prettify()``) would render it. A string is
+    written the way it appears in its tag's markup, entities and all.
+
+    :param fp: Anything with a ``write`` method, or a socket.
+    :param formatter: A `Formatter`, or the name of one.
+    :param encoding: If given, write bytes in this encoding, as
+        ``element.encode(encoding)`` would; otherwise write strings. A
+        socket only takes bytes, so it's written in UTF-8 by default.
+    :param errors: How to encode characters ``encoding`` can't represent.
+    :param buffer_size: Roughly how many characters to collect before each
+        write.
+    :return: The number of characters (or, with ``encoding``, bytes)
+        written.
+    """
+    write = getattr(fp, 'write', None)
+    if write is None:
+        write = fp.sendall
+        encoding = encoding or DEFAULT_OUTPUT_ENCODING
+    encoder = codecs.getincrementalencoder(encoding)(errors) if encoding else None
+    eventual_encoding = encoding or DEFAULT_OUTPUT_ENCODING
+    pieces = iter_markup(element, formatter, 0 if pretty else None, eventual_encoding)
+    written = 0
+    buffered = []
+    size = 0
+    for piece in pieces:
+        buffered.append(piece)
+        size += len(piece)
+        if size >= buffer_size:
+            written += _flush(write, encoder, buffered, False)
+            buffered = []
+            size = 0
+    written += _flush(write, encoder, buffered, True)
+    if instrument.enabled:
+        instrument.counters['serialized_bytes' if encoding else 'serialized_characters'] += written
+    return written
+
+
+def _flush(write, encoder, buffered, final):
+    data = ''.join(buffered)
+    if encoder is not None:
+        data = encoder.encode(data, final)
+    if data:
+        write(data)
+    return len(data)
+
+
+def iter_markup(element, formatter='minimal', indent_level=None, eventual_encoding=DEFAULT_OUTPUT_ENCODING):
+    """Yield the markup for ``element`` in pieces that join up to
+    ``element.decode(indent_level, eventual_encoding, formatter)``."""
+    if not isinstance(formatter, Formatter):
+        formatter = element.formatter_for_name(formatter)
+    if not isinstance(element, Tag):
+        yield element.output_ready(formatter)
+        return
+    if isinstance(element, BeautifulSoup) and element.is_xml:
+        # BeautifulSoup.decode's XML declaration
+        declared = ''
+        if eventual_encoding is not None and eventual_encoding not in PYTHON_SPECIFIC_ENCODINGS:
+            declared = ' encoding="%s"' % eventual_encoding
+        yield '<?xml version="1.0"%s?>\n' % declared
+
+    # The rest follows Tag.decode, event for event.
+    string_literal_tag = None
+    for event, current in element._event_stream():
+        if event is Tag.START_ELEMENT_EVENT or event is Tag.EMPTY_ELEMENT_EVENT:
+            piece = current._format_tag(eventual_encoding, formatter, opening=True)
+        elif event is Tag.END_ELEMENT_EVENT:
+            piece = current._format_tag(eventual_encoding, formatter, opening=False)
+            if indent_level is not None:
+                indent_level -= 1
+        else:
+            piece = current.output_ready(formatter)
+
+        # Whitespace goes around everything except inside tags such as
+        # <pre> that can't be pretty-printed: before such a tag's start and
+        # after its end only.
+        indent_before = indent_after = not string_literal_tag
+        if (event is Tag.START_ELEMENT_EVENT and not string_literal_tag
+                and not current._should_pretty_print()):
+            indent_before, indent_after = True, False
+            string_literal_tag = current
+        elif event is Tag.END_ELEMENT_EVENT and current is string_literal_tag:
+            indent_before, indent_after = False, True
+            string_literal_tag = None
+
+        if indent_level is not None:
+            if indent_before or indent_after:
+                if isinstance(current, NavigableString):
+                    piece = piece.strip()
+                if piece:
+                    piece = element._indent_string(piece, indent_level, formatter, indent_before, indent_after)
+            if event is Tag.START_ELEMENT_EVENT:
+                indent_level += 1
+        if piece:
+            yield piece
@@ -0,0 +1,284 @@
+"""Prepared find_all queries.
+
+Every ``find_all`` call builds a `SoupStrainer` from its arguments and then
+asks it, for every element, which of its rules apply: is there a name
+rule, is it a plain string, does the tag have a prefix, is the attribute
+value a list... `compile_query` does that interpretation once. The result
+is a `Query` holding a single predicate specialized for the filter --
+comparing ``tag.name`` with a constant, say -- that can be run against any
+number of trees.
+
+The common rule shapes (exact names, lists of names, exact attribute
+values, attribute presence or absence, exact strings) get hand-written
+predicates; anything else (regular expressions, functions) reuses the
+strainer's own rule objects, so every query matches exactly what
+``find_all`` would.
+
+`find_all_many` answers a whole batch of queries in one walk over the tree
+instead of one walk per query.
+"""
+from bs4 import NavigableString, SoupStrainer, Tag
+from bs4.element import ResultSet
+
+from souptools import instrument
+
+
+class Query(object):
+    """A compiled ``find_all`` filter; see `compile_query`.
+
+    :param name: A filter on tag name.
+    :param attrs: Attribute filters, as for ``find_all``.
+    :param string: A filter on strings.
+    :param kwargs: More attribute filters (``class_`` for ``class``).
+    """
+
+    def __init__(self, name=None, attrs=None, string=None, **kwargs):
+        self.strainer = SoupStrainer(name, attrs, string, **kwargs)
+        #: Whether only tags can match, as opposed to only strings.
+        self.matches_tags = bool(self.strainer.name_rules or self.strainer.attribute_rules)
+        #: The tag name every match has, if the filter pins it down.
+        self.tag_name = _required_name(self.strainer.name_rules)
+        if self.matches_tags:
+            self._predicate = _compile_tag_predicate(self.strainer)
+        else:
+            self._predicate = _compile_string_predicate(self.strainer)
+
+    def __repr__(self):
+        return '<Query %r>' % (self.strainer,)
+
+    def match(self, element):
+        """Whether ``element`` passes the filter."""
+        if self.matches_tags:
+            return isinstance(element, Tag) and self._predicate(element)
+        # bs4 never matches an empty string against a filter.
+        return isinstance(element, NavigableString) and bool(element) and self._predicate(element)
+
+    def filter(self, elements):
+        """Yield the elements of ``elements`` that pass the filter."""
+        if instrument.enabled:
+            instrument.counters['find_all_calls'] += 1
+            elements = instrument.counted(elements, 'predicate_evaluations')
+        if self.matches_tags:
+            predicate = self._predicate
+            for element in elements:
+                if isinstance(element, Tag) and predicate(element):
+                    yield element
+        else:
+            match = self.match
+            for element in elements:
+                if match(element):
+                    yield element
+
+    def find_all(self, tag, limit=None, recursive=True):
+        """Everything below ``tag`` that passes the filter, as
+        ``tag.find_all(..., limit=limit, recursive=recursive)`` would find
+        it. The search stops as soon as ``limit`` matches are found."""
+        found = []
+        if limit:
+            for element in self.filter(_elements(tag, recursive)):
+                found.append(element)
+                if len(found) >= limit:
+                    break
+        else:
+            found.extend(self.filter(_elements(tag, recursive)))
+        return ResultSet(self.strainer, found)
+
+    def find(self, tag, recursive=True):
+        """The first match below ``tag``, or None."""
+        for element in self.filter(_elements(tag, recursive)):
+            return element
+        return None
+
+
+def compile_query(name=None, attrs=None, string=None, **kwargs):
+    """Compile the arguments of a ``find_all`` call into a reusable `Query`."""
+    return Query(name, attrs, string, **kwargs)
+
+
+def find_all_many(tag, queries, recursive=True):
+    """Run several ``find_all`` queries below ``tag`` in one pass.
+
+    :param queries: A list whose items are each a `Query`, a tag name, or
+        a dict of ``find_all`` keyword arguments (which may include
+        ``limit``).
+    :return: One `ResultSet` per query, in the same order, each holding
+        what ``find_all`` would have found.
+    """
+    plans = [_plan(query) for query in queries]
+    found = [[] for plan in plans]
+    # Queries that only match one tag name are only tried on tags with
+    # that name; the rest are tried on every tag (or every string).
+    by_name = {}
+    any_tag = []
+    strings = []
+    for i, (query, limit) in enumerate(plans):
+        if not query.matches_tags:
+            strings.append(i)
+        elif query.tag_name is not None:
+            by_name.setdefault(query.tag_name, []).append(i)
+        else:
+            any_tag.append(i)
+    # The element's type is already known when a predicate is tried.
+    predicates = [query._predicate if query.matches_tags else query.match for query, limit in plans]
+    limits = [limit for query, limit in plans]
+    remaining = sum(1 for limit in limits if limit)
+    unlimited = len(plans) - remaining
+    elements = _elements(tag, recursive)
+    if instrument.enabled:
+        instrument.counters['find_all_calls'] += len(plans)
+        elements = instrument.counted(elements, 'predicate_evaluations')
+    for element in elements:
+        if isinstance(element, Tag):
+            candidates = by_name.get(element.name, ())
+            if any_tag:
+                candidates = candidates + any_tag if candidates else any_tag
+        else:
+            candidates = strings
+        for i in candidates:
+            results = found[i]
+            limit = limits[i]
+            if limit and len(results) >= limit:
+                continue
+            if predicates[i](element):
+                results.append(element)
+                if limit and len(results) >= limit:
+                    remaining -= 1
+        if not unlimited and not remaining:
+            # Every query has all the results it asked for.
+            break
+    return [ResultSet(query.strainer, results) for (query, limit), results in zip(plans, found)]
+
+
+def _plan(query):
+    if isinstance(query, Query):
+        return query, None
+    if isinstance(query, str):
+        return Query(query), None
+    kwargs = dict(query)
+    if 'recursive' in kwargs:
+        raise ValueError("recursive applies to the whole batch; pass it to find_all_many()")
+    limit = kwargs.pop('limit', None)
+    return Query(**kwargs), limit
+
+
+def _elements(tag, recursive):
+    # Tag.descendants without the generator-property indirection.
+    if not recursive:
+        return iter(list(tag.contents))
+    return _descendants(tag)
+
+
+def _descendants(tag):
+    if not tag.contents:
+        return
+    stop = tag._last_descendant().next_element
+    element = tag.contents[0]
+    while element is not stop and element is not None:
+        following = element.next_element
+        yield element
+        element = following
+
+
+def _exact(rule):
+    # The value of a rule that is a plain string comparison, or None.
+    if rule.string is not None and rule.function is None and rule.pattern is None:
+        return rule.string
+    return None
+
+
+def _required_name(rules):
+    if len(rules) == 1:
+        name = _exact(rules[0])
+        # A prefixed name can also match a tag by its local name.
+        if name is not None and ':' not in name:
+            return name
+    return None
+
+
+def _all_of(predicates):
+    if not predicates:
+        return lambda tag: True
+    if len(predicates) == 1:
+        return predicates[0]
+    if len(predicates) == 2:
+        first, second = predicates
+        return lambda tag: first(tag) and second(tag)
+    return lambda tag: all(predicate(tag) for predicate in predicates)
+
+
+def _compile_tag_predicate(strainer):
+    predicates = []
+    if strainer.name_rules:
+        predicates.append(_compile_name(strainer.name_rules))
+    for attr, rules in strainer.attribute_rules.items():
+        predicates.append(_compile_attribute(strainer, attr, rules))
+    if strainer.string_rules:
+        predicates.append(_compile_tag_string(strainer))
+    return _all_of(predicates)
+
+
+def _compile_name(rules):
+    names = [_exact(rule) for rule in rules]
+    if None not in names:
+        if len(names) == 1:
+            name = names[0]
+            if ':' not in name:
+                return lambda tag: tag.name == name
+            return lambda tag: tag.name == name or (tag.prefix and '%s:%s' % (tag.prefix, tag.name) == name)
+        names = frozenset(names)
+        if not any(':' in name for name in names):
+            return lambda tag: tag.name in names
+        return lambda tag: tag.name in names or (tag.prefix and '%s:%s' % (tag.prefix, tag.name) in names)
+
+    def match_name(tag):
+        # SoupStrainer.matches_tag, for rules that need functions or patterns.
+        prefixed_name = '%s:%s' % (tag.prefix, tag.name) if tag.prefix else None
+        for rule in rules:
+            if rule.matches_tag(tag) or (not rule.function and prefixed_name is not None and rule.matches_string(prefixed_name)):
+                return True
+        return False
+    return match_name
+
+
+def _compile_attribute(strainer, attr, rules):
+    if len(rules) == 1:
+        rule = rules[0]
+        value = _exact(rule)
+        if value is not None:
+            def match_value(tag):
+                actual = tag.attrs.get(attr)
+                if actual is None:
+                    return False
+                if isinstance(actual, list):
+                    # Any single value, or the whole list as one string.
+                    return value in actual or (len(actual) != 1 and ' '.join(actual) == value)
+                return actual == value
+            return match_value
+        if rule.present is True:
+            return lambda tag: tag.attrs.get(attr) is not None
+        if rule.present is False:
+            return lambda tag: tag.attrs.get(attr) is None
+    return lambda tag: strainer._attribute_match(tag.attrs.get(attr), rules)
+
+
+def _compile_tag_string(strainer):
+    matches_string = _compile_string_predicate(strainer)
+
+    def match_string(tag):
+        string = tag.string
+        return string is not None and matches_string(string)
+    return match_string
+
+
+def _compile_string_predicate(strainer):
+    rules = strainer.string_rules
+    if not rules:
+        return lambda string: True
+    values = [_exact(rule) for rule in rules]
+    if None not in values:
+        if len(values) == 1:
+            value = values[0]
+            return lambda string: string == value
+        values = frozenset(values)
+        return lambda string: string in values
+    return strainer.matches_any_string_rule
@@ -0,0 +1,270 @@
+"""Bring a parsed soup up to date with an edited document.
+
+``reparse(soup, old_markup, new_markup)`` finds the part of the document
+that changed and parses only that part again, then swaps the new elements
+in for the old ones with ``extract`` and ``insert``. The result is the
+tree ``BeautifulSoup(new_markup, 'html.parser')`` would build, including
+``sourceline``/``sourcepos``.
+
+The region that is parsed again is a run of siblings: from the last tag
+that starts before the change to the first later sibling tag that starts
+after it, taken as deep in the tree as possible. Both ends of that run are
+tag boundaries, where html.parser's state doesn't depend on anything
+before them. The run is parsed inside copies of its ancestors' start tags
+(so whitespace handling and string classes see the same context) and
+followed by a sentinel tag; if the sentinel doesn't end up right after the
+run, in the innermost ancestor, the change opened or closed something
+beyond the run -- a new unclosed tag, a stray end tag, an unterminated
+comment -- and the whole document is parsed again instead. The same goes
+for a document where html.parser gave up on an unfinished comment or tag
+before the region: the edit may have finished it.
+
+Only soups built by the html.parser tree builder, with line numbers and
+without ``parse_only``, can be patched; anything else is parsed again in
+full.
+"""
+import bisect
+import re
+
+from bs4 import NavigableString, Tag
+from bs4.builder import HTMLParserTreeBuilder
+from bs4.element import PreformattedString, Script, Stylesheet
+
+from souptools.feed import IncrementalParser
+
+SENTINEL = 'souptools-reparse-sentinel'
+
+# What html.parser leaves behind, as text, when a comment, tag or
+# declaration is still open at the end of the document.
+_UNFINISHED_MARKUP = re.compile(r'<[!?/a-zA-Z]')
+
+
+def reparse(soup, old_markup, new_markup):
+    """Update ``soup``, parsed from ``old_markup``, to match ``new_markup``.
+
+    :return: The soup, changed in place.
+    """
+    if old_markup == new_markup:
+        return soup
+    start = _common_prefix(old_markup, new_markup)
+    suffix = _common_suffix(old_markup, new_markup, start)
+    return _reparse(soup, old_markup, new_markup, start, len(old_markup) - suffix, len(new_markup) - suffix)
+
+
+def apply_edit(soup, old_markup, start, end, replacement):
+    """Replace ``old_markup[start:end]`` with ``replacement`` and update
+    ``soup`` to match.
+
+    :return: The new markup.
+    """
+    if not 0 <= start <= end <= len(old_markup):
+        raise ValueError("edit range %d:%d is outside the document" % (start, end))
+    new_markup = old_markup[:start] + replacement + old_markup[end:]
+    _reparse(soup, old_markup, new_markup, start, end, start + len(replacement))
+    return new_markup
+
+
+def _common_prefix(a, b):
+    # Binary search on slice comparisons, which run at C speed.
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[:middle] == b[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def _common_suffix(a, b, prefix):
+    # Never let the suffix overlap the prefix in either string.
+    low, high = 0, min(len(a), len(b)) - prefix
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[len(a) - middle:] == b[len(b) - middle:]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def _reparse(soup, old_markup, new_markup, start, old_end, new_end):
+    if not _can_patch(soup):
+        return _parse_all(soup, new_markup)
+    old_lines = _line_starts(old_markup)
+    region = _find_region(soup, old_lines, start, old_end)
+    if region is None:
+        return _parse_all(soup, new_markup)
+    parent, first, stop = region
+    if _unfinished_markup_before(first):
+        return _parse_all(soup, new_markup)
+    region_start = _offset(old_lines, first)
+    region_end = _offset(old_lines, stop)
+    delta = new_end - old_end
+    new_nodes = _parse_region(soup, parent, new_markup[region_start:region_end + delta])
+    if new_nodes is None:
+        return _parse_all(soup, new_markup)
+
+    new_lines = _line_starts(new_markup)
+    line, column = _position(new_lines, region_start)
+    for node in new_nodes:
+        _shift_fragment_positions(node, line, column, len(_wrapper(parent)))
+    _shift_following_positions(stop, old_lines, new_lines, region_end, delta)
+
+    position = parent.index(first)
+    element = first
+    while element is not stop:
+        following = element.next_sibling
+        element.extract()
+        element = following
+    if new_nodes:
+        parent.insert(position, *new_nodes)
+    return soup
+
+
+def _can_patch(soup):
+    builder = soup.builder
+    return (isinstance(builder, HTMLParserTreeBuilder) and builder.store_line_numbers
+            and not soup.parse_only)
+
+
+def _parse_all(soup, new_markup):
+    fresh = type(soup)(new_markup, builder=soup.builder, element_classes=soup.element_classes)
+    soup.clear()
+    soup.insert(0, fresh)
+    return soup
+
+
+def _line_starts(markup):
+    starts = [0]
+    find = markup.find
+    i = find('\n')
+    while i != -1:
+        starts.append(i + 1)
+        i = find('\n', i + 1)
+    return starts
+
+
+def _offset(lines, tag):
+    return lines[tag.sourceline - 1] + tag.sourcepos
+
+
+def _position(lines, offset):
+    line = bisect.bisect_right(lines, offset)
+    return line, offset - lines[line - 1]
+
+
+def _positioned_tags(tag):
+    return [child for child in tag.contents if isinstance(child, Tag) and child.sourceline is not None]
+
+
+def _find_region(soup, lines, start, end):
+    """The deepest (parent, first, stop) such that first and stop are
+    sibling tags, first starts before ``start`` and stop at or after
+    ``end``; the region runs from first up to (not including) stop."""
+    region = None
+    parent = soup
+    while True:
+        tags = _positioned_tags(parent)
+        offsets = [_offset(lines, tag) for tag in tags]
+        # Strictly before the change, so the region still starts with the
+        # same tag.
+        i = bisect.bisect_left(offsets, start) - 1
+        if i < 0:
+            return region
+        j = bisect.bisect_left(offsets, end, i + 1)
+        if j < len(tags):
+            region = (parent, tags[i], tags[j])
+        # A deeper region may sit entirely inside tags[i].
+        parent = tags[i]
+
+
+def _unfinished_markup_before(first):
+    """Whether html.parser reached the end of the old document with
+    something before ``first`` still open. It gave up on it and carried on
+    parsing, but the edit may have supplied the missing end -- in which
+    case the change reaches back before the region."""
+    search = _UNFINISHED_MARKUP.search
+    for element in first.previous_elements:
+        if (isinstance(element, NavigableString)
+                and not isinstance(element, (PreformattedString, Script, Stylesheet))
+                and search(element)):
+            return True
+    return False
+
+
+def _wrapper(parent):
+    names = []
+    while parent is not None and parent.parent is not None:
+        names.append(parent.name)
+        parent = parent.parent
+    return ''.join('<%s>' % name for name in reversed(names))
+
+
+def _parse_region(soup, parent, fragment):
+    """Parse ``fragment`` as the contents of ``parent`` and return the new
+    top-level nodes, or None if the fragment doesn't stand on its own."""
+    prefix = _wrapper(parent)
+    parser = IncrementalParser(type(soup), builder=soup.builder, element_classes=soup.element_classes)
+    parser.feed('%s%s<%s></%s>' % (prefix, fragment, SENTINEL, SENTINEL))
+    if parser.parser.rawdata:
+        # Something in the fragment is still waiting for its end (an
+        # unterminated comment, say), which in the full document would be
+        # found somewhere past the region.
+        return None
+    parsed = parser.close()
+    innermost = parsed
+    for depth in range(prefix.count('<')):
+        if not innermost.contents or not isinstance(innermost.contents[0], Tag):
+            return None
+        innermost = innermost.contents[0]
+    contents = innermost.contents
+    if not contents:
+        return None
+    sentinel = contents[-1]
+    # The sentinel has to be a tag of its own, starting right where the
+    # fragment ends: then nothing in the fragment ran on past it.
+    if (not isinstance(sentinel, Tag) or sentinel.name != SENTINEL or sentinel.contents
+            or (sentinel.sourceline, sentinel.sourcepos) != _end_position(prefix + fragment)):
+        return None
+    nodes = contents[:-1]
+    # The region starts with a tag, as the old one did; if it now starts
+    # with text, that text would have merged with whatever came before.
+    if fragment and not (nodes and isinstance(nodes[0], Tag)
+                         and nodes[0].sourceline == 1 and nodes[0].sourcepos == len(prefix)):
+        return None
+    return list(nodes)
+
+
+def _end_position(text):
+    # The (line, column) html.parser reports just past the end of text.
+    newline = text.rfind('\n')
+    return text.count('\n') + 1, len(text) - newline - 1
+
+
+def _shift_fragment_positions(node, line, column, prefix_length):
+    # Fragment positions are relative to the wrapper, which is all on line 1.
+    if not isinstance(node, Tag):
+        return
+    for tag in [node] + list(node.descendants):
+        if isinstance(tag, Tag) and tag.sourceline is not None:
+            if tag.sourceline == 1:
+                tag.sourcepos = column + tag.sourcepos - prefix_length
+                tag.sourceline = line
+            else:
+                tag.sourceline += line - 1
+
+
+def _shift_following_positions(stop, old_lines, new_lines, region_end, delta):
+    lines_changed = len(old_lines) != len(new_lines)
+    if not delta and not lines_changed:
+        return
+    region_end_line = _position(old_lines, region_end)[0]
+    element = stop
+    while element is not None:
+        if isinstance(element, Tag) and element.sourceline is not None:
+            if not lines_changed and element.sourceline > region_end_line:
+                # Later lines are where they were.
+                break
+            element.sourceline, element.sourcepos = _position(new_lines, _offset(old_lines, element) + delta)
+        element = element.next_element
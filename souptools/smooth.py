@@ -0,0 +1,95 @@
+"""A linear-time replacement for `Tag.smooth`.
+
+``Tag.smooth`` merges adjacent strings one pair at a time: every merge
+builds a new string out of the previous merge's result and splices it in
+with ``replace_with``, which looks the string up in ``contents`` first. A
+tag holding n adjacent fragments takes O(n^2) time, and so does smoothing
+a deep tree, because the method recurses into every child tag.
+
+`smooth` produces the same tree in one pass. It collects every tag under
+the starting point without recursion, then walks each tag's ``contents``
+once, joins each run of mergeable strings with a single ``str.join`` and
+relinks the neighbours of the run once. Which strings are mergeable is
+unchanged: any `NavigableString` except the preformatted ones (comments,
+CDATA, doctypes, processing instructions and declarations).
+"""
+from bs4 import NavigableString, Tag
+from bs4.element import PreformattedString
+
+from souptools import instrument
+
+
+def _mergeable(element):
+    return isinstance(element, NavigableString) and not isinstance(element, PreformattedString)
+
+
+def smooth(tag, string_class=NavigableString):
+    """Consolidate every run of adjacent strings in ``tag`` and the tags
+    below it into one ``string_class`` string, as ``tag.smooth()`` would.
+
+    :return: The tags whose ``contents`` changed.
+    """
+    tags = [tag]
+    tags.extend(element for element in tag.descendants if isinstance(element, Tag))
+    changed = []
+    for current in tags:
+        if _smooth_contents(current, string_class):
+            changed.append(current)
+    return changed
+
+
+def _smooth_contents(tag, string_class):
+    new_contents = []
+    run = []
+    merged = False
+    for element in tag.contents:
+        if _mergeable(element):
+            run.append(element)
+            continue
+        merged |= _end_run(tag, run, new_contents, string_class)
+        new_contents.append(element)
+    merged |= _end_run(tag, run, new_contents, string_class)
+    if merged:
+        # Replace the list's items rather than the list, in case something
+        # else holds on to it.
+        tag.contents[:] = new_contents
+    return merged
+
+
+def _end_run(tag, run, new_contents, string_class):
+    if len(run) > 1:
+        new_contents.append(_merge(tag, run, string_class))
+        merged = True
+        if instrument.enabled:
+            instrument.counters['strings_merged'] += len(run) - 1
+    else:
+        new_contents.extend(run)
+        merged = False
+    del run[:]
+    return merged
+
+
+def _merge(parent, run, string_class):
+    """Replace the adjacent strings in ``run`` with a single new string and
+    return it. ``parent.contents`` is left for the caller to update."""
+    first = run[0]
+    last = run[-1]
+    merged = string_class(''.join(run))
+    merged.parent = parent
+    merged.previous_sibling = first.previous_sibling
+    merged.next_sibling = last.next_sibling
+    merged.previous_element = first.previous_element
+    merged.next_element = last.next_element
+    if merged.previous_sibling is not None:
+        merged.previous_sibling.next_sibling = merged
+    if merged.next_sibling is not None:
+        merged.next_sibling.previous_sibling = merged
+    if merged.previous_element is not None:
+        merged.previous_element.next_element = merged
+    if merged.next_element is not None:
+        merged.next_element.previous_element = merged
+    for string in run:
+        string.parent = None
+        string.previous_sibling = string.next_sibling = None
+        string.previous_element = string.next_element = None
+    return merged
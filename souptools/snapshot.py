@@ -0,0 +1,468 @@
+"""Save a parsed tree to disk and load it back without parsing.
+
+A snapshot holds the arrays of a `CompactTree` -- node kinds, parents,
+siblings, the last node of each subtree, source positions -- plus a
+string table that every tag name, attribute name and value and text is
+stored in once, and the attributes as indexes into that table.
+Nodes are numbered in document order, so the element chain doesn't need
+storing: it's the node numbers in order.
+
+Every section is aligned so it can be used in place. `load_snapshot` maps
+the file and returns a `SnapshotTree`, a `CompactTree` that reads straight
+out of the map: nothing is decoded until it's looked at, so opening even a
+large snapshot takes about as long as opening the file; close it (or use
+it in a ``with`` block) to release the map. `load_soup` builds
+a regular BeautifulSoup from a snapshot, creating the tags and strings
+directly and linking them from the stored arrays, with none of the
+tokenizing and tree-building work of a parse.
+
+Snapshots record the tree builder's name and string classes, but not any
+options it was created with, nor tag namespaces: a snapshot of a soup
+parsed with a customized builder loads with the default one. The string
+classes are recorded by name, and only bs4's own and souptools' are
+loaded back: a snapshot naming anything else is rejected rather than
+importing it.
+"""
+import gc
+import json
+import mmap
+import struct
+import sys
+from array import array
+
+import bs4.element
+from bs4 import BeautifulSoup, NavigableString, Tag
+
+from souptools.compact import NO_NODE, TAG, CompactTree
+from souptools.element import TrackedString
+
+MAGIC = b'SOUPSNAP'
+VERSION = 1
+# Magic, version, number of nodes, number of strings, length of the
+# metadata that follows.
+_HEADER = struct.Struct('<8sIIII')
+_ALIGNMENT = 8
+# The int32 arrays, in the order they are stored after the node kinds.
+_NODE_ARRAYS = ('parents', 'next_siblings', 'previous_siblings', 'ends', 'value_indexes',
+                'sourcelines', 'sourcepositions', 'attr_offsets')
+
+
+def save_snapshot(source, path):
+    """Write ``source``, a BeautifulSoup or a `CompactTree`, to ``path``.
+
+    :return: The number of bytes written.
+    """
+    if isinstance(source, CompactTree):
+        tree = source
+        features = 'html.parser'
+        is_xml = False
+        lines = positions = None
+    else:
+        tree = CompactTree.from_soup(source)
+        # Store the standard string classes, not the soup's own versions
+        # of them (see TrackedSoup), so any soup class can load it.
+        standard = dict((custom, cls) for cls, custom in source.element_classes.items())
+        tree.string_types = [standard.get(cls, cls) for cls in tree.string_types]
+        features = _features(source)
+        is_xml = source.is_xml
+        lines, positions = _source_positions(source)
+    n = len(tree)
+
+    strings = _StringTableWriter()
+    value_indexes = array('i', (strings.add(tree.values[i]) for i in range(n)))
+    attr_offsets = array('i', [NO_NODE]) * n
+    attr_words = array('i')
+    for i in range(n):
+        attrs = tree.attrs.get(i)
+        if attrs:
+            attr_offsets[i] = len(attr_words)
+            _encode_attrs(attrs, strings, attr_words)
+    if lines is None:
+        lines = positions = array('i', [NO_NODE]) * n
+
+    meta = {
+        'features': features,
+        'is_xml': is_xml,
+        'byteorder': sys.byteorder,
+        'string_types': [_string_class_name(string_type) for string_type in tree.string_types[1:]],
+        'string_containers': dict((name, _string_class_name(container))
+                                  for name, container in tree.string_containers.items()),
+        'attr_words': len(attr_words),
+        'string_bytes': strings.size,
+    }
+    meta = json.dumps(meta).encode('utf-8')
+    with open(path, 'wb') as f:
+        _write_aligned(f, _HEADER.pack(MAGIC, VERSION, n, len(strings.offsets) - 1, len(meta)) + meta)
+        _write_aligned(f, _as_array('B', tree.kinds).tobytes())
+        for values in (_as_array('i', tree.parents), _as_array('i', tree.next_siblings),
+                       _as_array('i', tree.previous_siblings), _as_array('i', tree.ends),
+                       value_indexes, lines, positions, attr_offsets):
+            _write_aligned(f, values.tobytes())
+        _write_aligned(f, strings.offsets.tobytes())
+        _write_aligned(f, attr_words.tobytes())
+        for chunk in strings.chunks:
+            f.write(chunk)
+        return f.tell()
+
+
+def load_snapshot(path):
+    """Open the snapshot at ``path`` as a lazily-read `SnapshotTree`."""
+    return SnapshotTree(path)
+
+
+def load_soup(path, soup_class=BeautifulSoup):
+    """Build a regular BeautifulSoup (or ``soup_class``) from the snapshot
+    at ``path``."""
+    with SnapshotTree(path) as tree:
+        return tree.to_soup(soup_class=soup_class)
+
+
+class _StringTableWriter(object):
+    # Each distinct string once, as UTF-8, with the offset where each starts.
+
+    def __init__(self):
+        self.indexes = {}
+        self.offsets = array('q', [0])
+        self.chunks = []
+        self.size = 0
+
+    def add(self, string):
+        index = self.indexes.get(string)
+        if index is None:
+            data = string.encode('utf-8', 'surrogatepass')
+            self.chunks.append(data)
+            self.size += len(data)
+            self.offsets.append(self.size)
+            index = self.indexes[string] = len(self.offsets) - 2
+        return index
+
+
+def _encode_attrs(attrs, strings, words):
+    # The number of attributes, then for each the name and either a value
+    # or -(length + 1) followed by the values of a list.
+    words.append(len(attrs))
+    for key, value in attrs.items():
+        words.append(strings.add(key))
+        if isinstance(value, list):
+            words.append(-len(value) - 1)
+            words.extend(strings.add(token) for token in value)
+        else:
+            words.append(strings.add(str(value)))
+
+
+def _features(soup):
+    builder = soup.builder
+    if builder is not None and builder.NAME:
+        return builder.NAME
+    return 'html.parser'
+
+
+def _source_positions(soup):
+    lines = array('i', [NO_NODE])
+    positions = array('i', [NO_NODE])
+    for element in soup.descendants:
+        line = position = None
+        if isinstance(element, Tag):
+            line, position = element.sourceline, element.sourcepos
+        lines.append(NO_NODE if line is None else line)
+        positions.append(NO_NODE if position is None else position)
+    return lines, positions
+
+
+def _as_array(typecode, values):
+    if isinstance(values, array) and values.typecode == typecode:
+        return values
+    return array(typecode, values)
+
+
+def _write_aligned(f, data):
+    f.write(data)
+    padding = -len(data) % _ALIGNMENT
+    if padding:
+        f.write(b'\0' * padding)
+
+
+def _class_name(cls):
+    return '%s.%s' % (cls.__module__, cls.__qualname__)
+
+
+# The string classes a snapshot may name. Anything else would mean
+# importing and calling whatever the file says.
+_STRING_CLASSES = dict(
+    (_class_name(cls), cls)
+    for cls in [TrackedString] + [value for value in vars(bs4.element).values()
+                                  if isinstance(value, type) and issubclass(value, NavigableString)])
+
+
+def _string_class_name(cls):
+    # Checked on the way out too, so a snapshot that can't be loaded
+    # isn't written in the first place.
+    name = _class_name(cls)
+    _string_class(name)
+    return name
+
+
+def _string_class(name):
+    cls = _STRING_CLASSES.get(name)
+    if cls is None:
+        raise ValueError("%r is not a string class a snapshot can use" % (name,))
+    return cls
+
+
+class SnapshotTree(CompactTree):
+    """A `CompactTree` read from a memory-mapped snapshot.
+
+    The arrays are views of the file and strings are decoded when they're
+    first used, so it costs next to nothing until it's navigated. It
+    should be treated as read-only, and can't be navigated once it's
+    been closed.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        # Every view of the map, which close() has to release first.
+        self._views = []
+        try:
+            self._open(path)
+        except Exception:
+            self.close()
+            raise
+
+    def _open(self, path):
+        data = self._view(memoryview(self._map))
+        magic, version, n, string_count, meta_length = _HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("%s is not a soup snapshot" % path)
+        if version != VERSION:
+            raise ValueError("%s is a version %d snapshot; only version %d can be read" % (path, version, VERSION))
+        offset = _HEADER.size
+        meta = json.loads(bytes(data[offset:offset + meta_length]).decode('utf-8'))
+        offset = _aligned(offset + meta_length)
+        swap = meta['byteorder'] != sys.byteorder
+
+        def section(typecode, length):
+            nonlocal offset
+            size = length * array(typecode).itemsize
+            view = self._view(data[offset:offset + size])
+            offset = _aligned(offset + size)
+            if swap:
+                # Written on a machine with the other byte order: copy.
+                values = array(typecode, bytes(view))
+                values.byteswap()
+                return values
+            return self._view(view.cast(typecode))
+
+        self.features = meta['features']
+        self.is_xml = meta['is_xml']
+        self.kinds = section('B', n)
+        for name in _NODE_ARRAYS:
+            setattr(self, name, section('i', n))
+        string_offsets = section('q', string_count + 1)
+        attr_words = section('i', meta['attr_words'])
+        self.strings = _StringTable(self._view(data[offset:offset + meta['string_bytes']]), string_offsets)
+        self.values = _NodeValues(self.strings, self.value_indexes, self.kinds)
+        self.attrs = _NodeAttrs(self.strings, attr_words, self.attr_offsets)
+        self.string_types = [Tag] + [_string_class(name) for name in meta['string_types']]
+        self.string_containers = dict((name, _string_class(container))
+                                      for name, container in meta['string_containers'].items())
+
+    def _view(self, view):
+        self._views.append(view)
+        return view
+
+    def close(self):
+        """Release the memory map. Closing twice does nothing."""
+        if self._map is None:
+            return
+        while self._views:
+            self._views.pop().release()
+        self._map.close()
+        self._map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def to_soup(self, i=0, features=None, soup_class=BeautifulSoup):
+        """Build a regular BeautifulSoup out of node ``i`` (by default the
+        whole document) and everything beneath it.
+
+        The whole document is built without the tree builder: its tags
+        and strings are created directly, with their source positions,
+        and linked up from the stored arrays.
+        """
+        features = features or self.features
+        if i != 0:
+            return super(SnapshotTree, self).to_soup(i, features)
+        # Nothing built here is garbage, but creating this many objects
+        # would set off the cyclic collector over and over to walk them.
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            return self._build_soup(features, soup_class)
+        finally:
+            if collecting:
+                gc.enable()
+
+    def _build_soup(self, features, soup_class):
+        soup = soup_class('', features)
+        soup.is_xml = self.is_xml
+        builder = soup.builder
+        element_classes = soup.element_classes
+        tag_class = element_classes.get(Tag, Tag)
+        string_classes = [None] + [element_classes.get(cls, cls) for cls in self.string_types[1:]]
+        attr_dict_class = builder.attribute_dict_class
+        list_class = builder.attribute_value_list_class
+        # Everything will be needed, so decode it all in one go.
+        strings = self.strings.decode_all()
+        kinds = self.kinds.tolist()
+        value_indexes = self.value_indexes.tolist()
+        parents = self.parents.tolist()
+        previous_siblings = self.previous_siblings.tolist()
+        lines = self.sourcelines.tolist()
+        positions = self.sourcepositions.tolist()
+        attr_offsets = self.attr_offsets.tolist()
+        words = self.attrs.words.tolist()
+        # What Tag.__init__ would ask the builder about each tag name.
+        settings = {}
+
+        elements = [soup]
+        previous = soup
+        for j in range(1, len(kinds)):
+            parent = elements[parents[j]]
+            name = strings[value_indexes[j]]
+            if kinds[j] == TAG:
+                setting = settings.get(name)
+                if setting is None:
+                    container = builder.string_containers.get(name)
+                    setting = settings[name] = (
+                        sys.intern(name),
+                        builder.can_be_empty_element(name),
+                        {container} if container is not None else tag_class.MAIN_CONTENT_STRING_TYPES)
+                name = setting[0]
+                line = lines[j]
+                element = tag_class(soup, None, name, is_xml=builder.is_xml,
+                                    sourceline=None if line == NO_NODE else line,
+                                    sourcepos=None if line == NO_NODE else positions[j],
+                                    can_be_empty_element=setting[1],
+                                    cdata_list_attributes=builder.cdata_list_attributes,
+                                    preserve_whitespace_tags=builder.preserve_whitespace_tags,
+                                    interesting_string_types=setting[2])
+                element.attribute_value_list_class = list_class
+                if attr_offsets[j] != NO_NODE:
+                    element.attrs = _decode_attrs(words, attr_offsets[j], strings, attr_dict_class(), list_class)
+                builder.set_up_substitutions(element)
+            else:
+                element = string_classes[kinds[j]](name)
+            element.parent = parent
+            # As in a parsed soup, the root isn't part of the element chain.
+            if previous is not soup:
+                element.previous_element = previous
+                previous.next_element = element
+            sibling = previous_siblings[j]
+            if sibling != NO_NODE:
+                sibling = elements[sibling]
+                element.previous_sibling = sibling
+                sibling.next_sibling = element
+            parent.contents.append(element)
+            elements.append(element)
+            previous = element
+        return soup
+
+
+def _aligned(offset):
+    return offset + (-offset % _ALIGNMENT)
+
+
+def _decode_attrs(words, position, strings, attrs, list_class):
+    # The attributes written by _encode_attrs, from words[position] on.
+    # Attribute names are interned, as a parser's would be; values aren't.
+    count = words[position]
+    position += 1
+    for k in range(count):
+        key = sys.intern(strings[words[position]])
+        value = words[position + 1]
+        position += 2
+        if value < 0:
+            length = -value - 1
+            value = list_class([strings[index] for index in words[position:position + length]])
+            position += length
+        else:
+            value = strings[value]
+        attrs[key] = value
+    return attrs
+
+
+class _StringTable(object):
+    # Strings decoded from the snapshot on first use. They're not interned:
+    # most are text, which would only fill up the interpreter's table.
+
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+        self.cache = {}
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def decode_all(self):
+        """Every string in the table, as a list."""
+        data = bytes(self.data)
+        offsets = self.offsets.tolist()
+        return [str(data[start:end], 'utf-8', 'surrogatepass')
+                for start, end in zip(offsets, offsets[1:])]
+
+    def __getitem__(self, index):
+        string = self.cache.get(index)
+        if string is None:
+            string = str(self.data[self.offsets[index]:self.offsets[index + 1]], 'utf-8', 'surrogatepass')
+            self.cache[index] = string
+        return string
+
+    def name(self, index):
+        """String ``index``, interned: for tag names."""
+        string = self.cache[index] = sys.intern(self[index])
+        return string
+
+
+class _NodeValues(object):
+    # CompactTree.values: a tag's name or a string's text, by node number.
+
+    def __init__(self, strings, indexes, kinds):
+        self.strings = strings
+        self.indexes = indexes
+        self.kinds = kinds
+
+    def __len__(self):
+        return len(self.indexes)
+
+    def __getitem__(self, i):
+        if self.kinds[i] == TAG:
+            return self.strings.name(self.indexes[i])
+        return self.strings[self.indexes[i]]
+
+
+class _NodeAttrs(object):
+    # CompactTree.attrs: attribute dicts by node number, decoded on demand.
+
+    def __init__(self, strings, words, offsets):
+        self.strings = strings
+        self.words = words
+        self.offsets = offsets
+
+    def get(self, i, default=None):
+        if i < 0 or i >= len(self.offsets) or self.offsets[i] == NO_NODE:
+            return default
+        return _decode_attrs(self.words, self.offsets[i], self.strings, {}, list)
+
+    def __getitem__(self, i):
+        attrs = self.get(i)
+        if attrs is None:
+            raise KeyError(i)
+        return attrs
+
+    def __contains__(self, i):
+        return self.get(i) is not None
@@ -0,0 +1,66 @@
+"""Pull matching elements out of a document without keeping the whole tree.
+
+`iter_matches` parses a document a chunk at a time with a `SoupStrainer`
+as ``parse_only``, so only the parts that match are ever built. Each match
+is yielded as soon as its end tag has been parsed and is then detached from
+the tree, so memory stays bounded by the largest single match rather than
+by the document.
+"""
+from bs4 import BeautifulSoup, NavigableString, SoupStrainer
+
+from souptools.feed import DEFAULT_CHUNK_SIZE, IncrementalParser, iter_chunks
+
+
+class StreamingSoup(BeautifulSoup):
+    """A BeautifulSoup that hands every completed top-level element to
+    ``completed`` instead of keeping it.
+
+    With ``parse_only`` set, the only top-level elements are matches, so
+    these are exactly the matches, outermost first. Matches nested inside
+    another match come out as part of it.
+    """
+
+    def reset(self):
+        super(StreamingSoup, self).reset()
+        self.completed = []
+
+    def popTag(self):
+        tag = self.currentTag
+        current = super(StreamingSoup, self).popTag()
+        if tag is not None and tag is not self and tag.parent is self:
+            self._complete(tag)
+        return current
+
+    def object_was_parsed(self, o, parent=None, most_recent_element=None):
+        super(StreamingSoup, self).object_was_parsed(o, parent, most_recent_element)
+        if isinstance(o, NavigableString) and o.parent is self:
+            # A top-level string that matched a string-only strainer.
+            self._complete(o)
+
+    def _complete(self, element):
+        element.extract()
+        # Nothing parsed later should link back into the detached match.
+        self._most_recent_element = self
+        self.completed.append(element)
+
+
+def iter_matches(source, strainer, chunk_size=DEFAULT_CHUNK_SIZE, encoding=None):
+    """Yield the parts of ``source`` that match ``strainer``, in document order.
+
+    :param source: A string, bytestring, file-like object or iterable of
+        string/bytestring chunks.
+    :param strainer: A `SoupStrainer`, or a tag name to build one from.
+    :param chunk_size: How much of a string or file to parse at once.
+    :param encoding: Encoding of byte input; see `IncrementalParser`.
+    """
+    if not isinstance(strainer, SoupStrainer):
+        strainer = SoupStrainer(strainer)
+    parser = IncrementalParser(StreamingSoup, encoding, parse_only=strainer)
+    completed = parser.soup.completed
+    for chunk in iter_chunks(source, chunk_size):
+        parser.feed(chunk)
+        while completed:
+            yield completed.pop(0)
+    parser.close()
+    while completed:
+        yield completed.pop(0)
@@ -0,0 +1,151 @@
+"""A faster tokenizer for the html.parser tree builder.
+
+html.parser looks at markup one construct at a time: a search for the
+next ``<`` or ``&``, a chain of ``startswith`` tests to decide what kind
+of construct it is, a regex for the tag name, one more per attribute, one
+to find where the tag ends and a line count after every token. Most of
+any real document is ordinary text, ordinary start tags with quoted
+attributes, plain end tags and well-formed character references, and
+`FastHTMLParser` recognises all of those with a single regex match each.
+
+Everything else -- comments, doctypes, processing instructions, CDATA,
+``<script>`` and ``<style>`` contents, and anything malformed -- is handed
+to html.parser itself, a piece at a time, exactly as if the document had
+been fed to it in chunks. Either way the same ``BeautifulSoupHTMLParser``
+methods build the tree, so a document gives the same tree, with the same
+source positions, as it does with ``'html.parser'``.
+
+`FastHTMLParserTreeBuilder` is the tree builder to pass to BeautifulSoup:
+
+    BeautifulSoup(markup, builder=FastHTMLParserTreeBuilder)
+"""
+import re
+from html import unescape
+
+from bs4.builder._htmlparser import BeautifulSoupHTMLParser, HTMLParserTreeBuilder
+
+_SPACE = r'[ \t\n\r\f]'
+_NAME = r'[-.:a-zA-Z0-9_]*'
+_VALUE = r'''(?:"[^"]*"|'[^']*'|[^\s"'=<>`/]+(?=[ \t\n\r\f>]|\Z))'''
+
+# Only spellings that html.parser reads the same way whatever comes after
+# them: bare attribute values that can't run into a closing "/>",
+# references that are terminated, a lone '&' that isn't at the end of the
+# input, and so on.
+_TOKEN = re.compile(r'''
+    ([^<&]+)
+  | <([a-zA-Z]%(name)s)((?:%(space)s+[a-zA-Z_:]%(name)s(?:%(space)s*=%(space)s*%(value)s)?)*)%(space)s*(/?)>
+  | </([a-zA-Z]%(name)s)>
+  | &\#([0-9]+|[xX][0-9a-fA-F]+)(?:;|(?=[^0-9a-fA-F]))
+  | &([a-zA-Z][-.a-zA-Z0-9]*)(?:;|(?=[^a-zA-Z0-9]))
+  | (&)(?=[^a-zA-Z\#])
+''' % {'space': _SPACE, 'name': _NAME, 'value': _VALUE}, re.VERBOSE)
+
+_ATTRIBUTE = re.compile(r'([a-zA-Z_:]%(name)s)(?:%(space)s*=%(space)s*(%(value)s))?'
+                        % {'space': _SPACE, 'name': _NAME, 'value': _VALUE})
+
+# Start tags that switch html.parser into a special content mode in one
+# Python version or another.
+_SPECIAL_TAGS = frozenset(['script', 'style', 'textarea', 'title', 'xmp', 'iframe', 'noembed',
+                           'noframes', 'noscript', 'plaintext'])
+
+
+class FastHTMLParser(BeautifulSoupHTMLParser):
+    """A BeautifulSoupHTMLParser that tokenizes common markup itself."""
+
+    def goahead(self, end):
+        rawdata = self.rawdata
+        n = len(rawdata)
+        i = 0
+        while i < n:
+            start = i
+            if self.cdata_elem:
+                # Up to and including the end tag html.parser is looking for.
+                match = self.interesting.search(rawdata, i)
+                k = match.end() if match else n
+            else:
+                i = self._tokenize(rawdata, i, n)
+                if i == n or rawdata[i] != '<':
+                    break
+                # Up to the next '<' or '&', so that html.parser sees one
+                # construct and, at most, plain text after it.
+                k = min(_find(rawdata, '<', i + 1, n), _find(rawdata, '&', i + 1, n))
+            self.rawdata = rawdata[i:k]
+            super(FastHTMLParser, self).goahead(0)
+            left = len(self.rawdata)
+            self.rawdata = rawdata
+            i = k - left
+            if left and (i == start or not self.cdata_elem):
+                # html.parser needs to see further than that (a comment
+                # with a '<' in it, say): let it read the rest itself.
+                break
+        self.rawdata = rawdata[i:]
+        if i < n or end:
+            super(FastHTMLParser, self).goahead(end)
+
+    def _tokenize(self, rawdata, i, n):
+        # Handle tokens from i on for as long as they're ones _TOKEN
+        # knows; return where it stopped. Source positions are only
+        # brought up to date when a start tag needs them.
+        match = _TOKEN.match
+        special = self.CDATA_CONTENT_ELEMENTS
+        position = i
+        while i < n:
+            m = match(rawdata, i)
+            if m is None:
+                break
+            text, tag, attrs, slash, end_tag, charref, entityref, ampersand = m.groups()
+            if text is not None:
+                self.handle_data(text)
+            elif tag is not None:
+                tag = tag.lower()
+                if tag in _SPECIAL_TAGS or tag in special:
+                    break
+                position = self.updatepos(position, i)
+                if attrs:
+                    attrs = [(name.lower(), _unquote(value)) for name, value in _ATTRIBUTE.findall(attrs)]
+                else:
+                    attrs = []
+                self.lasttag = tag
+                if slash:
+                    self.handle_startendtag(tag, attrs)
+                else:
+                    self.handle_starttag(tag, attrs)
+            elif end_tag is not None:
+                self.handle_endtag(end_tag.lower())
+            elif charref is not None:
+                self.handle_charref(charref)
+            elif entityref is not None:
+                self.handle_entityref(entityref)
+            else:
+                self.handle_data(ampersand)
+            i = m.end()
+        self.updatepos(position, i)
+        return i
+
+
+def _find(rawdata, char, start, end):
+    k = rawdata.find(char, start, end)
+    return end if k < 0 else k
+
+
+def _unquote(value):
+    # As html.parser has it: no value is None, and references in values
+    # are expanded.
+    if not value:
+        return None
+    if value[0] in '"\'':
+        value = value[1:-1]
+    if '&' in value:
+        value = unescape(value)
+    return value
+
+
+class FastHTMLParserTreeBuilder(HTMLParserTreeBuilder):
+    """html.parser's tree builder, tokenizing with `FastHTMLParser`."""
+
+    NAME = 'souptools.fast'
+    features = [NAME]
+
+    def feed(self, markup):
+        super(FastHTMLParserTreeBuilder, self).feed(markup, _parser_class=FastHTMLParser)
@@ -0,0 +1,199 @@
+"""Speed regression tests, one module per class in tests/testsuite.py.
+
+Each ``bench_*`` module times the operations its testsuite.py class tests
+on generated documents (see souptools.generator) of each scale in
+`SCALES`, and fails an operation that has become more than `tolerance()`
+percent slower than its baseline in baselines.json: slower in seconds, and
+slower relative to a fixed pure-Python workload timed just before each
+run. The second keeps a baseline recorded on one machine meaningful on a
+slower one, and the first keeps the workload's own timing noise from
+failing anything on the machine that recorded it. (On a much faster
+machine, a regression only shows once it outgrows the difference.)
+
+The modules aren't named ``test_*``, so ``python -m unittest discover``
+leaves them out. Run them with
+
+    python -m tests.benchmarks                  # 1KB and 1MB
+    python -m tests.benchmarks --scales 50MB
+    python -m tests.benchmarks --update         # record new baselines
+
+or with unittest directly, configured through the environment:
+
+    SOUPTOOLS_BENCH_SCALES=1KB python -m unittest tests.benchmarks.bench_tree_find
+
+- ``SOUPTOOLS_BENCH_SCALES``: comma-separated scales (default: 1KB,1MB).
+- ``SOUPTOOLS_BENCH_TOLERANCE``: how many percent slower than its baseline
+  an operation may get (default: 25).
+- ``SOUPTOOLS_BENCH_UPDATE``: if set, record the timings as the new
+  baselines instead of checking them.
+
+Each operation is judged by the median of several timed runs (baselines
+by the median of `RECORD_MEASUREMENTS` such judgements), and a slowdown
+of less than `NOISE_FLOOR` seconds passes whatever percentage it comes to: at 1KB the timings are microseconds, which the scheduler alone
+can move by more than the tolerance. An operation that still seems too
+slow is timed again before it fails, and one without a baseline at some
+scale is skipped there.
+"""
+import gc
+import json
+import os
+import statistics
+import time
+import unittest
+
+from bs4 import BeautifulSoup
+from souptools.clone import clone
+from souptools.generator import generate_document
+
+SCALES = ('1KB', '1MB', '50MB')
+DEFAULT_SCALES = ('1KB', '1MB')
+DEFAULT_TOLERANCE = 25.0
+
+# Timed runs per operation, the median of which is kept, and how many
+# times the operation is run (each time on its own copy of the document)
+# in one timed run, so that none takes too little time to measure.
+REPEAT = {'1KB': 9, '1MB': 5, '50MB': 3}
+NUMBER = {'1KB': 200, '1MB': 1, '50MB': 1}
+# Seconds an operation may get slower by before the tolerance applies.
+NOISE_FLOOR = 50e-6
+# How many times an operation is measured when its baseline is recorded,
+# so that one lucky measurement doesn't become the bar to meet. A 50MB
+# operation takes long enough that one is already steady.
+RECORD_MEASUREMENTS = {'1KB': 3, '1MB': 3, '50MB': 1}
+
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+
+_soups = {}
+
+
+def scales():
+    value = os.environ.get('SOUPTOOLS_BENCH_SCALES')
+    return tuple(value.split(',')) if value else DEFAULT_SCALES
+
+
+def tolerance():
+    return float(os.environ.get('SOUPTOOLS_BENCH_TOLERANCE', DEFAULT_TOLERANCE))
+
+
+def updating():
+    return bool(os.environ.get('SOUPTOOLS_BENCH_UPDATE'))
+
+
+def load_baselines(path=BASELINES):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(key, seconds, normalized, path=BASELINES):
+    baselines = load_baselines(path)
+    baselines[key] = {'seconds': seconds, 'normalized': normalized}
+    with open(path, 'w') as f:
+        json.dump(baselines, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def _reference_workload():
+    # A fixed workload of the kind tree code does: attribute lookups,
+    # calls, dicts and lists.
+    class Node(object):
+        def __init__(self, parent):
+            self.parent = parent
+            self.contents = []
+    nodes = {}
+    parent = Node(None)
+    for i in range(50000):
+        node = Node(parent)
+        parent.contents.append(node)
+        nodes[i & 1023] = node
+        if not i % 8:
+            parent = node
+
+
+def _time(*runs):
+    # As timeit does, keep the garbage collector from stopping the clock.
+    gc.collect()
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for run in runs:
+            run()
+        return time.perf_counter() - start
+    finally:
+        if collecting:
+            gc.enable()
+
+
+def soup(scale):
+    """The parsed document for ``scale``, shared between benchmarks; it
+    mustn't be changed."""
+    if scale not in _soups:
+        _soups[scale] = BeautifulSoup(generate_document(size=scale, seed=0), 'html.parser')
+    return _soups[scale]
+
+
+class BenchmarkCase(unittest.TestCase):
+    """Base class for the ``bench_*`` modules' test cases.
+
+    Subclasses name themselves in baselines.json by ``name`` and time
+    operations with `check`.
+    """
+
+    name = None
+
+    def check(self, operation, prepare, modifies=True):
+        """Time ``prepare(soup)()`` at every scale, where ``prepare`` does
+        any setup that shouldn't be timed and returns the callable that
+        should. Unless ``modifies`` is false, each run gets its own copy of
+        the document."""
+        for scale in scales():
+            with self.subTest(scale=scale):
+                key = '%s.%s.%s' % (self.name, operation, scale)
+                baseline = load_baselines().get(key)
+                if baseline is None and not updating():
+                    self.skipTest('no baseline for %s; record one with --update' % key)
+                if updating():
+                    measurements = sorted((self._measure(prepare, scale, modifies)
+                                           for i in range(RECORD_MEASUREMENTS.get(scale, 1))), key=lambda m: m[1])
+                    seconds, normalized = measurements[len(measurements) // 2]
+                    save_baseline(key, seconds, normalized)
+                    continue
+                seconds, normalized = self._measure(prepare, scale, modifies)
+                # In seconds and relative to the reference workload.
+                allowed = max(1 + tolerance() / 100, 1 + NOISE_FLOOR / baseline['seconds'])
+                slower = self._slowdown(baseline, seconds, normalized)
+                if slower > allowed:
+                    # Another process may have had the machine for a
+                    # while; a regression is slow the second time too.
+                    retry = self._measure(prepare, scale, modifies)
+                    if self._slowdown(baseline, *retry) < slower:
+                        seconds, normalized = retry
+                        slower = self._slowdown(baseline, seconds, normalized)
+                self.assertLessEqual(
+                    slower, allowed,
+                    '%s is %.0f%% slower than its baseline: %.3gs now, %.3gs then, and %.0f%% slower relative to '
+                    'the reference workload' % (key, (seconds / baseline['seconds'] - 1) * 100, seconds,
+                                                baseline['seconds'], (normalized / baseline['normalized'] - 1) * 100))
+
+    def _slowdown(self, baseline, seconds, normalized):
+        # Slower only if slower both ways: the reference workload's own
+        # noise can't fail an operation that took as long as ever, and a
+        # slower machine can't fail one that kept pace with the workload.
+        return min(seconds / baseline['seconds'], normalized / baseline['normalized'])
+
+    def _measure(self, prepare, scale, modifies):
+        # The medians of the seconds per run and of those seconds divided
+        # by the reference workload's.
+        shared = soup(scale)
+        number = NUMBER.get(scale, 1)
+        times = []
+        ratios = []
+        for i in range(REPEAT.get(scale, 1)):
+            runs = [prepare(clone(shared) if modifies else shared) for j in range(number)]
+            reference = _time(_reference_workload)
+            seconds = _time(*runs) / number
+            times.append(seconds)
+            ratios.append(seconds / reference)
+        return statistics.median(times), statistics.median(ratios)
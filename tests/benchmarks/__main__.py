@@ -0,0 +1,33 @@
+"""Run the speed regression tests: ``python -m tests.benchmarks --help``."""
+import argparse
+import os
+import sys
+import unittest
+
+from tests.benchmarks import DEFAULT_SCALES, DEFAULT_TOLERANCE, SCALES
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m tests.benchmarks',
+                                     description='Fail operations that got slower than their baselines.')
+    parser.add_argument('--scales', default=','.join(DEFAULT_SCALES),
+                        help='comma-separated document sizes, of %s (default: %s)'
+                             % (', '.join(SCALES), ','.join(DEFAULT_SCALES)))
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='percent slower than the baseline an operation may get (default: %g)' % DEFAULT_TOLERANCE)
+    parser.add_argument('--update', action='store_true', help='record new baselines instead of checking')
+    parser.add_argument('-p', '--pattern', default='bench_*.py', help='which modules to run (default: bench_*.py)')
+    args = parser.parse_args(argv)
+    os.environ['SOUPTOOLS_BENCH_SCALES'] = args.scales
+    os.environ['SOUPTOOLS_BENCH_TOLERANCE'] = str(args.tolerance)
+    if args.update:
+        os.environ['SOUPTOOLS_BENCH_UPDATE'] = '1'
+    here = os.path.dirname(os.path.abspath(__file__))
+    top = os.path.dirname(os.path.dirname(here))
+    suite = unittest.defaultTestLoader.discover(here, pattern=args.pattern, top_level_dir=top)
+    result = unittest.TextTestRunner(verbosity=2).run(suite)
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
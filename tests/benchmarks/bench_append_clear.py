@@ -0,0 +1,43 @@
+import unittest
+
+from tests.benchmarks import BenchmarkCase
+
+
+class AppendClearBenchmarks(BenchmarkCase):
+    """AppendClearTests in tests/testsuite.py."""
+
+    name = 'AppendClear'
+
+    def test_append(self):
+        def prepare(soup):
+            tags = soup.find_all('a')
+
+            def run():
+                for tag in tags:
+                    tag.append('Test')
+            return run
+        self.check('append', prepare)
+
+    def test_append_empty(self):
+        def prepare(soup):
+            tags = soup.find_all(True)
+
+            def run():
+                for tag in tags:
+                    tag.append('')
+            return run
+        self.check('append_empty', prepare)
+
+    def test_clear(self):
+        def prepare(soup):
+            tags = soup.find_all('p')
+
+            def run():
+                for tag in tags:
+                    tag.clear()
+            return run
+        self.check('clear', prepare)
+
+
+if __name__ == '__main__':
+    unittest.main()
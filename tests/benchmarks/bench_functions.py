@@ -0,0 +1,30 @@
+import unittest
+
+from tests.benchmarks import BenchmarkCase
+
+
+class BsoupFunctionsBenchmarks(BenchmarkCase):
+    """BsoupFunctionsBlackboxTest in tests/testsuite.py."""
+
+    name = 'BsoupFunctions'
+
+    def test_smooth(self):
+        def prepare(soup):
+            for tag in soup.find_all('p'):
+                tag.append('one')
+                tag.append('two')
+            return soup.smooth
+        self.check('smooth', prepare)
+
+    def test_get_text(self):
+        self.check('get_text', lambda soup: soup.get_text, modifies=False)
+
+    def test_get_text_strip(self):
+        self.check('get_text_strip', lambda soup: lambda: soup.get_text('|', strip=True), modifies=False)
+
+    def test_stripped_strings(self):
+        self.check('stripped_strings', lambda soup: lambda: list(soup.stripped_strings), modifies=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
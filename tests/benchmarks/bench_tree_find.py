@@ -0,0 +1,49 @@
+import unittest
+
+from tests.benchmarks import BenchmarkCase
+
+
+class TreeFindBenchmarks(BenchmarkCase):
+    """TreeFindTest in tests/testsuite.py."""
+
+    name = 'TreeFind'
+
+    def test_find(self):
+        # A tag the documents don't have, so the whole tree is searched
+        self.check('find', lambda soup: lambda: soup.find('table'), modifies=False)
+
+    def test_find_all(self):
+        def prepare(soup):
+            def run():
+                soup.find_all('a')
+                soup.find_all(class_='p_class1')
+                soup.find_all(id='test_id')
+            return run
+        self.check('find_all', prepare, modifies=False)
+
+    def test_find_parents(self):
+        def prepare(soup):
+            tags = soup.find_all('img')
+
+            def run():
+                for tag in tags:
+                    tag.find_parent('p')
+                    tag.find_parents('div')
+            return run
+        self.check('find_parents', prepare, modifies=False)
+
+    def test_find_next_siblings(self):
+        def prepare(soup):
+            tags = soup.find_all('p')
+            first = soup.body.contents[0]
+
+            def run():
+                for tag in tags:
+                    tag.find_next_sibling('p')
+                first.find_next_siblings('a')
+            return run
+        self.check('find_next_siblings', prepare, modifies=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
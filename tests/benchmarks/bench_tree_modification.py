@@ -0,0 +1,76 @@
+import unittest
+
+from tests.benchmarks import BenchmarkCase
+
+
+class TreeModificationBenchmarks(BenchmarkCase):
+    """TreeModificationTests in tests/testsuite.py."""
+
+    name = 'TreeModification'
+
+    def test_insert(self):
+        def prepare(soup):
+            tags = soup.find_all('p')
+            new_tags = [soup.new_tag('b') for tag in tags]
+
+            def run():
+                for tag, new_tag in zip(tags, new_tags):
+                    tag.insert(0, new_tag)
+            return run
+        self.check('insert', prepare)
+
+    def test_extract(self):
+        def prepare(soup):
+            tags = soup.find_all('img')
+
+            def run():
+                for tag in tags:
+                    tag.extract()
+            return run
+        self.check('extract', prepare)
+
+    def test_decompose(self):
+        def prepare(soup):
+            tags = soup.find_all('img')
+
+            def run():
+                for tag in tags:
+                    tag.decompose()
+            return run
+        self.check('decompose', prepare)
+
+    def test_replace_with(self):
+        def prepare(soup):
+            tags = soup.find_all('img')
+            new_tags = [soup.new_tag('span') for tag in tags]
+
+            def run():
+                for tag, new_tag in zip(tags, new_tags):
+                    tag.replace_with(new_tag)
+            return run
+        self.check('replace_with', prepare)
+
+    def test_wrap(self):
+        def prepare(soup):
+            tags = soup.find_all('img')
+            new_tags = [soup.new_tag('span') for tag in tags]
+
+            def run():
+                for tag, new_tag in zip(tags, new_tags):
+                    tag.wrap(new_tag)
+            return run
+        self.check('wrap', prepare)
+
+    def test_unwrap(self):
+        def prepare(soup):
+            tags = soup.find_all('i')
+
+            def run():
+                for tag in tags:
+                    tag.unwrap()
+            return run
+        self.check('unwrap', prepare)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+
+from tests.benchmarks import BenchmarkCase
+
+
+class TreeNavigationBenchmarks(BenchmarkCase):
+    """TreeNavigationBlackboxTest in tests/testsuite.py."""
+
+    name = 'TreeNavigation'
+
+    def test_strings(self):
+        self.check('strings', lambda soup: lambda: list(soup.strings), modifies=False)
+
+    def test_children(self):
+        def prepare(soup):
+            tags = soup.find_all(True)
+
+            def run():
+                for tag in tags:
+                    list(tag.children)
+            return run
+        self.check('children', prepare, modifies=False)
+
+    def test_parents(self):
+        def prepare(soup):
+            strings = list(soup.strings)
+
+            def run():
+                for string in strings:
+                    list(string.parents)
+            return run
+        self.check('parents', prepare, modifies=False)
+
+    def test_next_siblings(self):
+        def prepare(soup):
+            tags = soup.find_all('a')
+
+            def run():
+                for tag in tags:
+                    list(tag.next_siblings)
+            return run
+        self.check('next_siblings', prepare, modifies=False)
+
+    def test_next_elements(self):
+        self.check('next_elements', lambda soup: lambda: list(soup.html.next_elements), modifies=False)
+
+    def test_replace_string(self):
+        def prepare(soup):
+            tags = [tag for tag in soup.find_all(True) if tag.string is not None]
+
+            def run():
+                for tag in tags:
+                    tag.string = 'Replaced'
+            return run
+        self.check('replace_string', prepare)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+
+from bs4 import SoupStrainer
+
+from tests.benchmarks import BenchmarkCase
+
+
+class WhiteBoxBenchmarks(BenchmarkCase):
+    """WhiteBoxTesting in tests/testsuite.py."""
+
+    name = 'WhiteBox'
+
+    def test_clear_decompose(self):
+        self.check('clear_decompose', lambda soup: lambda: soup.body.clear(decompose=True))
+
+    def test_find_all_limit(self):
+        self.check('find_all_limit', lambda soup: lambda: soup.find_all('img', limit=100), modifies=False)
+
+    def test_find_all_soup_strainer(self):
+        strainer = SoupStrainer('a', href='https://www.facebook.com/')
+        self.check('find_all_soup_strainer', lambda soup: lambda: soup.find_all(strainer), modifies=False)
+
+    def test_find_all_colon_name(self):
+        self.check('find_all_colon_name', lambda soup: lambda: soup.find_all('aside:colon'), modifies=False)
+
+    def test_find_all_non_recursive(self):
+        self.check('find_all_non_recursive', lambda soup: lambda: soup.body.find_all('p', recursive=False),
+                   modifies=False)
+
+    def test_insert_before(self):
+        def prepare(soup):
+            tags = soup.find_all('img')
+
+            def run():
+                for tag in tags:
+                    tag.insert_before('one', 'two')
+            return run
+        self.check('insert_before', prepare)
+
+    def test_insert_after(self):
+        def prepare(soup):
+            tags = soup.find_all('img')
+
+            def run():
+                for tag in tags:
+                    tag.insert_after('one', 'two')
+            return run
+        self.check('insert_after', prepare)
+
+
+if __name__ == '__main__':
+    unittest.main()
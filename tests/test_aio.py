@@ -0,0 +1,98 @@
+import asyncio
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from bs4 import BeautifulSoup
+from souptools.aio import iter_matches_async, parse_async
+from souptools.generator import generate_document
+from souptools.stream import iter_matches
+from tests import testsuite
+from tests.test_snapshot import links
+
+
+def suite_fixtures():
+    # Every document tests/testsuite.py keeps as a class attribute
+    fixtures = []
+    for case in vars(testsuite).values():
+        if isinstance(case, type) and issubclass(case, unittest.TestCase):
+            for value in vars(case).values():
+                if isinstance(value, str) and '<' in value and value not in fixtures:
+                    fixtures.append(value)
+    return fixtures
+
+
+async def chunked(data, size):
+    # An async byte stream, the way an HTTP client hands out a body
+    for start in range(0, len(data), size):
+        await asyncio.sleep(0)
+        yield data[start:start + size]
+
+
+def stream_reader(data):
+    reader = asyncio.StreamReader()
+    reader.feed_data(data)
+    reader.feed_eof()
+    return reader
+
+
+class ParseAsyncTest(unittest.TestCase):
+    fixtures = suite_fixtures() + [generate_document(size='64KB', seed=10)]
+
+    def assertSameSoup(self, soup, html):
+        expected = BeautifulSoup(html, 'html.parser')
+        self.assertEqual(soup.decode(), expected.decode())
+        self.assertEqual(links(soup), links(expected))
+
+    def test_fixtures_count(self):
+        self.assertGreaterEqual(len(self.fixtures), 4)
+
+    def test_same_tree(self):
+        async def main():
+            executor = ThreadPoolExecutor(1)
+            try:
+                for html in self.fixtures:
+                    data = html.encode('utf-8')
+                    self.assertSameSoup(await parse_async(html), html)
+                    self.assertSameSoup(await parse_async(data), html)
+                    self.assertSameSoup(await parse_async(chunked(data, 7), chunk_size=5), html)
+                    self.assertSameSoup(await parse_async(stream_reader(data), chunk_size=100), html)
+                    # Offloaded whole, and part way through a stream
+                    self.assertSameSoup(await parse_async(html, offload_threshold=0), html)
+                    self.assertSameSoup(await parse_async(chunked(data, 50), offload_threshold=200,
+                                                          executor=executor), html)
+            finally:
+                executor.shutdown()
+        asyncio.run(main())
+
+    # Other tasks get to run while a document is parsed
+    def test_yields_to_the_loop(self):
+        html = generate_document(size='256KB', seed=11)
+
+        async def main():
+            ticks = []
+            stop = asyncio.Event()
+
+            async def ticker():
+                while not stop.is_set():
+                    ticks.append(1)
+                    await asyncio.sleep(0)
+            task = asyncio.ensure_future(ticker())
+            soup = await parse_async(html, chunk_size=4096)
+            stop.set()
+            await task
+            return soup, len(ticks)
+        soup, ticks = asyncio.run(main())
+        self.assertGreaterEqual(ticks, len(html) // 4096)
+        self.assertSameSoup(soup, html)
+
+    def test_iter_matches_async(self):
+        html = testsuite.TreeFindTest.html_text_gabe
+
+        async def main():
+            return [str(match) async for match in iter_matches_async(chunked(html.encode('utf-8'), 9), 'a',
+                                                                     chunk_size=4)]
+        self.assertEqual(asyncio.run(main()), [str(match) for match in iter_matches(html, 'a')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+
+from bs4 import BeautifulSoup
+from souptools.batch import parse_many
+from souptools.generator import generate_document
+from tests import testsuite
+
+
+# Extraction functions have to be importable so worker processes can unpickle them
+def link_targets(soup):
+    return [a['href'] for a in soup.find_all('a') if a.has_attr('href')]
+
+
+def title_text(soup):
+    return soup.title.get_text() if soup.title else None
+
+
+def fail_on_empty(soup):
+    if not soup.contents:
+        raise ValueError('empty document')
+    return len(soup.contents)
+
+
+class ParseManyTest(unittest.TestCase):
+    documents = [testsuite.TreeFindTest.html_text_gabe, testsuite.TreeModificationTests.test_tree] * 5 + [
+        generate_document(size='8KB', seed=seed) for seed in range(10)]
+
+    def expected(self, extract):
+        return [extract(BeautifulSoup(markup, 'html.parser')) for markup in self.documents]
+
+    # Results come back in input order
+    def test_ordered(self):
+        results = list(parse_many(self.documents, link_targets, processes=2, chunksize=3))
+        self.assertEqual(results, self.expected(link_targets))
+        self.assertEqual(results[1], ['https://www.google.com/'])
+
+    # Unordered results are (index, result) pairs covering every document
+    def test_unordered(self):
+        results = list(parse_many(iter(self.documents), title_text, processes=2, chunksize=2, ordered=False))
+        self.assertEqual(sorted(index for index, result in results), list(range(len(self.documents))))
+        self.assertEqual([result for index, result in sorted(results)], self.expected(title_text))
+
+    # A single process runs everything in this process
+    def test_inline(self):
+        self.assertEqual(list(parse_many(self.documents, title_text, processes=1)), self.expected(title_text))
+
+    # Input is consumed lazily, no more than max_pending chunks ahead
+    def test_backpressure(self):
+        consumed = []
+
+        def documents():
+            for i, markup in enumerate(self.documents):
+                consumed.append(i)
+                yield markup
+        results = parse_many(documents(), title_text, processes=2, chunksize=1, max_pending=2)
+        next(results)
+        self.assertLessEqual(len(consumed), 3)
+        results.close()
+
+    # Errors raised by the extraction function reach the caller
+    def test_errors_propagate(self):
+        with self.assertRaises(ValueError):
+            list(parse_many(['<p>a</p>', ''], fail_on_empty, processes=2, chunksize=1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import json
+import os
+import tempfile
+import unittest
+
+from souptools.benchmark import OPERATIONS, load_corpus, measure_memory, measure_snapshot, percentile, run_benchmark
+
+
+class BenchmarkHarnessTest(unittest.TestCase):
+    html_text = '<html><body><p>Text</p><a href="https://www.wikipedia.org/">Link</a><div id="test_id">Find me!</div></body></html>'
+
+    # Nearest-rank percentiles over a sorted sample list
+    def test_percentile(self):
+        samples = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
+        self.assertEqual(percentile(samples, 0.5), 5)
+        self.assertEqual(percentile(samples, 0.99), 10)
+        self.assertEqual(percentile([], 0.5), 0.0)
+
+    # Every operation is reported, and the report is valid JSON
+    def test_run_benchmark_reports_every_operation(self):
+        report = run_benchmark([('doc', self.html_text)], repeat=2)
+        self.assertEqual(set(report['operations']), set(OPERATIONS))
+        for stats in report['operations'].values():
+            self.assertEqual(stats['samples'], 2)
+            self.assertLessEqual(stats['p50_ms'], stats['p99_ms'])
+        self.assertGreater(report['peak_rss_kb'], 0)
+        json.dumps(report)
+
+    # Directories are searched for HTML files only
+    def test_load_corpus_directory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for filename in ('a.html', 'b.htm', 'notes.txt'):
+                with open(os.path.join(directory, filename), 'w') as f:
+                    f.write(self.html_text)
+            corpus = load_corpus([directory])
+        self.assertEqual([os.path.basename(name) for name, markup in corpus], ['a.html', 'b.htm'])
+
+    # The compact tree holds less memory per node than the bs4 tree
+    def test_measure_memory(self):
+        report = measure_memory(self.html_text * 20)
+        self.assertGreater(report['nodes'], 20)
+        self.assertLess(report['compact']['bytes'], report['bs4']['bytes'])
+        json.dumps(report)
+
+    # Loading the snapshot gives back the same document
+    def test_measure_snapshot(self):
+        report = measure_snapshot(self.html_text * 20, repeat=1)
+        self.assertTrue(report['identical'])
+        self.assertGreater(report['snapshot_bytes'], 0)
+        json.dumps(report)
+
+
+if __name__ == '__main__':
+    unittest.main()
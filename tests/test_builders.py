@@ -0,0 +1,87 @@
+import functools
+import json
+import os
+import tempfile
+import unittest
+
+from bs4 import BeautifulSoup, FeatureNotFound
+from souptools import builders
+from souptools.builders import AUTO_BUILDERS, BUILDERS, calibrate, load_calibration, parse, select_builder, set_calibration
+from souptools.element import TrackedSoup
+from tests import testsuite
+
+
+class BuilderRegistryTest(unittest.TestCase):
+    html_text_gabe = testsuite.TreeFindTest.html_text_gabe
+
+    def tearDown(self):
+        set_calibration(None)
+
+    def test_parse(self):
+        expected = BeautifulSoup(self.html_text_gabe, 'html.parser').decode()
+        for name in AUTO_BUILDERS + ('auto',):
+            self.assertEqual(parse(self.html_text_gabe, name).decode(), expected)
+        soup = parse(self.html_text_gabe, 'auto', TrackedSoup)
+        self.assertIsInstance(soup, TrackedSoup)
+        self.assertIsInstance(soup.builder, BUILDERS[select_builder(len(self.html_text_gabe))])
+        # Anything else goes to BeautifulSoup as features
+        self.assertRaises(FeatureNotFound, parse, '<p>x</p>', 'no-such-parser')
+
+    def test_select_builder(self):
+        self.assertEqual(select_builder(100), AUTO_BUILDERS[0])
+        calibration = {'points': [
+            {'bytes': 1000, 'mb_per_s': {'html.parser': 2.0, 'souptools.fast': 1.0, 'lxml': 9.0}},
+            {'bytes': 1000000, 'mb_per_s': {'html.parser': 1.0, 'souptools.fast': 2.0}},
+        ]}
+        self.assertEqual(select_builder(10, calibration), 'html.parser')
+        self.assertEqual(select_builder(20000, calibration), 'html.parser')
+        self.assertEqual(select_builder(50000, calibration), 'souptools.fast')
+        set_calibration(calibration)
+        self.assertEqual(select_builder(0), 'html.parser')
+
+    def test_calibrate(self):
+        report = calibrate(sizes=['1KB', '4KB'], repeat=1)
+        self.assertEqual([point['size'] for point in report['points']], ['1KB', '4KB'])
+        for point in report['points']:
+            self.assertEqual(sorted(point['mb_per_s']), sorted(BUILDERS))
+            self.assertTrue(all(speed > 0 for speed in point['mb_per_s'].values()))
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'calibration.json')
+        with open(path, 'w') as f:
+            json.dump(report, f)
+        self.assertEqual(load_calibration(path), report)
+        self.assertEqual(builders._calibration, report)
+
+
+def _make_soup(name, markup='', features=None, *args, **kwargs):
+    # BeautifulSoup, building with ``name`` whenever html.parser is asked for
+    if features == 'html.parser':
+        return BeautifulSoup(markup, *args, builder=BUILDERS[name], **kwargs)
+    return BeautifulSoup(markup, features, *args, **kwargs)
+
+
+class BuilderTestCase(unittest.TestCase):
+    builder = None
+
+    def setUp(self):
+        original = testsuite.BeautifulSoup
+        testsuite.BeautifulSoup = functools.partial(_make_soup, self.builder)
+        self.addCleanup(setattr, testsuite, 'BeautifulSoup', original)
+        super(BuilderTestCase, self).setUp()
+
+
+# The whole of tests/testsuite.py again for every other builder 'auto' can
+# choose, e.g. FastHTMLParserTreeBuilder_TreeFindTest.
+for _name in AUTO_BUILDERS:
+    if _name == 'html.parser' or _name not in BUILDERS:
+        continue
+    for _case in list(vars(testsuite).values()):
+        if isinstance(_case, type) and issubclass(_case, unittest.TestCase) and _case.__module__ == testsuite.__name__:
+            _class_name = '%s_%s' % (BUILDERS[_name].__name__, _case.__name__)
+            globals()[_class_name] = type(_class_name, (BuilderTestCase, _case), {'builder': _name})
+del _case, _class_name
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,207 @@
+import random
+import unittest
+
+from bs4 import BeautifulSoup, NavigableString, Tag
+from souptools.bulk import clear, decompose_many, detach_many, extend, insert_many
+from souptools.element import TrackedSoup, TrackedString
+from tests import testsuite
+from tests.test_smooth import SmoothTest
+
+
+def bs4_class(element):
+    # TrackedTag and TrackedString count as the bs4 classes they extend.
+    for cls in type(element).__mro__:
+        if cls.__module__.startswith('bs4'):
+            return cls
+
+
+class InsertManyTest(unittest.TestCase):
+    test_tree = testsuite.TreeFindTest.html_text_gabe
+    assertConsistent = SmoothTest.assertConsistent
+
+    def soups(self, soup_class=BeautifulSoup):
+        return BeautifulSoup(self.test_tree, 'html.parser'), soup_class(self.test_tree, 'html.parser')
+
+    # Assert that the bulk insert built the tree bs4's one-at-a-time insert did
+    def assertSameTree(self, soup, expected):
+        self.assertEqual(soup.decode(), expected.decode())
+        self.assertEqual([bs4_class(x) for x in soup.descendants], [bs4_class(x) for x in expected.descendants])
+        self.assertConsistent(soup)
+
+    def test_insert_new_elements(self):
+        for position in (0, 1, 2, 100):
+            expected, soup = self.soups()
+            items = lambda s: ['one', s.new_tag('b', string='two'), NavigableString('three')]
+            expected.body.insert(position, *items(expected))
+            inserted = insert_many(soup.body, position, items(soup))
+            self.assertEqual(len(inserted), 3)
+            self.assertSameTree(soup, expected)
+
+    def test_move_elements_within_the_tree(self):
+        rng = random.Random(3)
+        for i in range(30):
+            expected, soup = self.soups()
+            count = len(expected.find_all(True))
+            targets = rng.sample(range(1, count), 3)
+            target, first, second = targets
+            tags = expected.find_all(True)
+            # Only moves that don't put a tag inside itself. Moves within
+            # the target are covered by test_move_siblings: bs4 counts the
+            # position differently for each item there.
+            moved = (tags[first], tags[second])
+            if any(tag is tags[target] or tag in tags[target].parents or tag.parent is tags[target] for tag in moved):
+                continue
+            position = rng.randint(0, len(tags[target].contents))
+            tags[target].insert(position, tags[first], tags[second])
+            tags = soup.find_all(True)
+            insert_many(tags[target], position, [tags[first], tags[second]])
+            self.assertSameTree(soup, expected)
+
+    def test_move_siblings(self):
+        soup = BeautifulSoup(self.test_tree, 'html.parser')
+        contents = list(soup.body.contents)
+        moved = [soup.find('aside:colon'), soup.p, soup.find('main')]
+        position = contents.index(soup.div)
+        # The moved children end up, in order, where contents[position] was.
+        expected = [x for x in contents[:position] if x not in moved] + moved + [x for x in contents[position:] if x not in moved]
+        insert_many(soup.body, position, moved)
+        self.assertEqual([id(x) for x in soup.body.contents], [id(x) for x in expected])
+        self.assertConsistent(soup)
+
+    def test_insert_soup(self):
+        expected, soup = self.soups()
+        expected.body.insert(0, BeautifulSoup('<i>a</i>b', 'html.parser'))
+        other = BeautifulSoup('<i>a</i>b', 'html.parser')
+        insert_many(soup.body, 0, [other])
+        self.assertSameTree(soup, expected)
+        self.assertEqual(other.contents, [])
+
+    def test_extend(self):
+        expected, soup = self.soups()
+        expected.body.extend(['a', expected.new_tag('hr'), 'b'])
+        extend(soup.body, ['a', soup.new_tag('hr'), 'b'])
+        self.assertSameTree(soup, expected)
+        expected.body.extend(list(expected.find_all('p')[1].contents))
+        extend(soup.body, soup.find_all('p')[1])
+        self.assertSameTree(soup, expected)
+
+    def test_errors_leave_the_tree_alone(self):
+        expected, soup = self.soups()
+        with self.assertRaises(ValueError):
+            insert_many(soup.body, 0, ['a', None])
+        with self.assertRaises(ValueError):
+            insert_many(soup.body, 0, ['a', soup.body])
+        self.assertSameTree(soup, expected)
+
+    def test_detach_many(self):
+        expected, soup = self.soups()
+        for a in expected.find_all('a'):
+            a.extract()
+        parents = detach_many(soup.find_all('a'))
+        self.assertEqual([id(x) for x in parents], [id(soup.find_all('p')[1]), id(soup.body)])
+        self.assertSameTree(soup, expected)
+
+    def test_tracked_tree(self):
+        expected, soup = self.soups(TrackedSoup)
+        text = soup.get_text()
+        generation = soup._generation
+        expected.body.insert(0, 'a', 'b')
+        soup.body.insert(0, 'a', 'b')
+        self.assertSameTree(soup, expected)
+        self.assertIsInstance(soup.body.contents[0], TrackedString)
+        self.assertNotEqual(soup.get_text(), text)
+        self.assertGreater(soup._generation, generation)
+
+    def test_tracked_insert_before_and_after(self):
+        expected, soup = self.soups(TrackedSoup)
+        for tree in (expected, soup):
+            first, second = tree.find_all('a')[:2]
+            second.insert_before('x', tree.new_tag('hr'), first)
+            second.insert_after('y', 'z')
+            with self.assertRaises(ValueError):
+                second.insert_before(second)
+            with self.assertRaises(ValueError):
+                second.insert_after(None)
+            with self.assertRaises(ValueError):
+                tree.new_tag('p').insert_after('a')
+        self.assertSameTree(soup, expected)
+
+    def test_tracked_moves_notify_the_source(self):
+        soup = TrackedSoup(self.test_tree, 'html.parser')
+        other = TrackedSoup('<p>moved</p>', 'html.parser')
+        generation = other._generation
+        soup.body.extend([other.p])
+        self.assertGreater(other._generation, generation)
+        self.assertEqual(other.get_text(), '')
+
+
+class BulkRemovalTest(unittest.TestCase):
+    test_tree = testsuite.TreeFindTest.html_text_gabe
+    assertConsistent = SmoothTest.assertConsistent
+    assertSameTree = InsertManyTest.assertSameTree
+
+    def soups(self, soup_class=BeautifulSoup):
+        return BeautifulSoup(self.test_tree, 'html.parser'), soup_class(self.test_tree, 'html.parser')
+
+    def test_clear(self):
+        for name in ('body', 'main', 'aside:colon', 'html'):
+            expected, soup = self.soups()
+            children = list(soup.find(name).contents)
+            descendants = list(soup.find(name).descendants)
+            expected.find(name).clear()
+            clear(soup.find(name))
+            self.assertSameTree(soup, expected)
+            for child in children:
+                self.assertIsNone(child.parent)
+                self.assertIsNone(child.previous_sibling)
+                self.assertIsNone(child.next_sibling)
+                self.assertIsNone(child.previous_element)
+                self.assertIsNone(child._last_descendant().next_element)
+                self.assertFalse(child.decomposed)
+            # The detached children are still whole.
+            self.assertEqual(sum(1 + len(list(getattr(child, 'descendants', ()))) for child in children), len(descendants))
+
+    def test_clear_decompose(self):
+        expected, soup = self.soups()
+        descendants = list(soup.body.descendants)
+        expected.body.clear(decompose=True)
+        clear(soup.body, decompose=True)
+        self.assertSameTree(soup, expected)
+        self.assertTrue(all(element.decomposed for element in descendants))
+        clear(soup.body, decompose=True)
+        self.assertEqual(len(soup.body), 0)
+
+    def test_decompose_many(self):
+        expected, soup = self.soups()
+        for a in expected.find_all('a'):
+            a.decompose()
+        expected.find('main').decompose()
+        doomed = soup.find_all('a') + [soup.find('main')]
+        descendants = [x for tag in doomed for x in [tag] + list(tag.descendants)]
+        decompose_many(doomed)
+        self.assertSameTree(soup, expected)
+        self.assertTrue(all(element.decomposed for element in descendants))
+
+    def test_decompose_nested(self):
+        expected, soup = self.soups()
+        expected.find_all('p')[1].decompose()
+        paragraph = soup.find_all('p')[1]
+        decompose_many([paragraph.a, paragraph, paragraph.a])
+        self.assertSameTree(soup, expected)
+        self.assertTrue(paragraph.decomposed)
+
+    def test_decompose_child_element(self):
+        tree = BeautifulSoup('<body><p>Paragraph contents</p></body>', 'html.parser')
+        decompose_many([tree.body.p])
+        self.assertEqual(tree, BeautifulSoup('<body></body>', 'html.parser'))
+
+    def test_tracked_tree(self):
+        expected, soup = self.soups(TrackedSoup)
+        text = soup.get_text()
+        for tree in (expected, soup):
+            tree.find('main').decompose()
+            tree.find_all('p')[1].clear(decompose=True)
+            tree.find('aside:colon').clear()
+        self.assertSameTree(soup, expected)
+        self.assertNotEqual(soup.get_text(), text)
+        self.assertEqual(soup.get_text(), Tag.get_text(soup))
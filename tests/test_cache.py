@@ -0,0 +1,78 @@
+import unittest
+
+from bs4 import BeautifulSoup
+from souptools.cache import ParseCache
+from souptools.element import TrackedSoup
+from tests import testsuite
+
+
+class ParseCacheTest(unittest.TestCase):
+    html_text = testsuite.TreeModificationTests.test_tree
+    html_text_gabe = testsuite.TreeFindTest.html_text_gabe
+
+    def test_hits_and_misses(self):
+        cache = ParseCache()
+        first = cache.parse(self.html_text)
+        second = cache.parse(self.html_text)
+        self.assertIsNot(first, second)
+        self.assertEqual(first.decode(), second.decode())
+        self.assertEqual(second.decode(), BeautifulSoup(self.html_text, 'html.parser').decode())
+        cache.parse(self.html_text.encode('utf-8'))
+        cache.parse(self.html_text, 'html.parser')
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (2, 2, 2))
+        self.assertEqual(stats['hit_rate'], 0.5)
+
+    # Whatever a caller does to its soup, the next caller gets a clean one
+    def test_mutations_do_not_reach_the_cache(self):
+        cache = ParseCache()
+        expected = BeautifulSoup(self.html_text_gabe, 'html.parser').decode()
+        soup = cache.parse(self.html_text_gabe)
+        soup.body.append(soup.new_tag('p'))
+        soup.p.insert(0, 'inserted')
+        soup.find(id='test_id').clear()
+        soup.a.decompose()
+        again = cache.parse(self.html_text_gabe)
+        self.assertEqual(again.decode(), expected)
+        again.body.clear()
+        self.assertEqual(cache.parse(self.html_text_gabe).decode(), expected)
+
+    def test_lru_eviction_by_entries(self):
+        cache = ParseCache(max_entries=2)
+        cache.parse('<p>1</p>')
+        cache.parse('<p>2</p>')
+        cache.parse('<p>1</p>')
+        cache.parse('<p>3</p>')
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.evictions, 1)
+        cache.parse('<p>1</p>')
+        self.assertEqual(cache.hits, 2)
+        cache.parse('<p>2</p>')
+        self.assertEqual(cache.misses, 4)
+
+    def test_eviction_by_bytes(self):
+        cache = ParseCache(max_bytes=20)
+        cache.parse('<p>0123456789</p>')
+        cache.parse('<b>0123456789</b>')
+        self.assertEqual(len(cache), 1)
+        self.assertLessEqual(cache.bytes, 20)
+        # Too big to cache at all
+        soup = cache.parse('<p>%s</p>' % ('x' * 100))
+        self.assertEqual(soup.p.string, 'x' * 100)
+        self.assertEqual(len(cache), 1)
+        cache.clear()
+        self.assertEqual((len(cache), cache.bytes), (0, 0))
+
+    def test_soup_class(self):
+        cache = ParseCache(soup_class=TrackedSoup)
+        cache.parse(self.html_text_gabe)
+        soup = cache.parse(self.html_text_gabe)
+        self.assertIsInstance(soup, TrackedSoup)
+        self.assertEqual(soup.get_text(), BeautifulSoup(self.html_text_gabe, 'html.parser').get_text())
+
+    def test_bad_size(self):
+        self.assertRaises(ValueError, ParseCache, max_entries=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import copy
+import unittest
+
+from bs4 import BeautifulSoup
+from souptools.clone import clone
+from souptools.element import TrackedSoup, TrackedTag
+from souptools.generator import generate_document
+from tests import testsuite
+from tests.test_snapshot import links
+
+
+class CloneTest(unittest.TestCase):
+    fixtures = [
+        testsuite.TreeNavigationBlackboxTest.html_text,
+        testsuite.TreeFindTest.html_text_gabe,
+        testsuite.TreeModificationTests.test_tree,
+        '<p class="a b">x<!--c--><script>a < b</script><br/><pre> y</pre></p>',
+        generate_document(size='32KB', seed=8),
+    ]
+
+    # The same tree and links as copy.copy, for soups and for subtrees
+    def test_same_as_copy(self):
+        for html in self.fixtures:
+            soup = BeautifulSoup(html, 'html.parser')
+            cloned = clone(soup)
+            self.assertIsInstance(cloned, BeautifulSoup)
+            self.assertIs(cloned.builder, soup.builder)
+            self.assertEqual(cloned.decode(), soup.decode())
+            self.assertEqual(links(cloned), links(soup))
+            for tag in soup.find_all(True)[:20]:
+                self.assertEqual(links(clone(tag)), links(copy.copy(tag)))
+
+    # As in TreeModificationTests.test_insert_before_empty_insert, without
+    # parsing the fixture twice
+    def test_empty_insert(self):
+        tree = BeautifulSoup(testsuite.TreeModificationTests.test_tree, 'html.parser')
+        expected = clone(tree)
+        tree.contents[0].insert_before()
+        self.assertEqual(tree.prettify(), expected.prettify())
+
+    # Changing the clone leaves the original alone, and the other way round
+    def test_independent(self):
+        soup = BeautifulSoup(testsuite.TreeFindTest.html_text_gabe, 'html.parser')
+        original = soup.decode()
+        cloned = clone(soup)
+        cloned.a['href'] = 'changed'
+        cloned.body.append(cloned.new_tag('b'))
+        cloned.find(id='test_id').clear()
+        self.assertEqual(soup.decode(), original)
+        soup.body.decompose()
+        self.assertIsNotNone(cloned.body)
+        self.assertEqual(cloned.b.parent, cloned.body)
+
+    def test_attribute_lists_are_copied(self):
+        soup = BeautifulSoup(self.fixtures[3], 'html.parser')
+        cloned = clone(soup)
+        cloned.p['class'].append('c')
+        self.assertEqual(soup.p['class'], ['a', 'b'])
+
+    def test_string(self):
+        soup = BeautifulSoup('<p>text</p>', 'html.parser')
+        string = clone(soup.p.string)
+        self.assertEqual(string, 'text')
+        self.assertIsNone(string.parent)
+
+    # Deeper than the recursion limit
+    def test_deep_nesting(self):
+        depth = 5000
+        soup = BeautifulSoup('<div>' * depth + 'bottom' + '</div>' * depth, 'html.parser')
+        cloned = clone(soup)
+        self.assertEqual(cloned.decode(), soup.decode())
+        self.assertEqual(links(cloned), links(soup))
+
+    # Text caches on a tracked tree aren't shared with the clone
+    def test_tracked_soup(self):
+        soup = TrackedSoup(testsuite.TreeFindTest.html_text_gabe, 'html.parser')
+        soup.get_text()
+        cloned = clone(soup)
+        self.assertIsInstance(cloned, TrackedSoup)
+        self.assertIsInstance(cloned.p, TrackedTag)
+        cloned.p.string = 'changed'
+        self.assertIn('changed', cloned.get_text())
+        self.assertNotIn('changed', soup.get_text())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+
+from bs4 import BeautifulSoup
+from souptools.columns import Columns, columns, find_columns, numpy
+from souptools.compact import CompactTree
+from souptools.query import compile_query
+from tests import testsuite
+
+
+class ColumnsTest(unittest.TestCase):
+    html_text_gabe = testsuite.TreeFindTest.html_text_gabe
+    markup = ('<img src="a.png" width="200px" height="130px" class="big wide">'
+              '<img src="b.png" width="50%">'
+              '<img width="auto" height=".5e1">')
+
+    def setUp(self):
+        self.soup = BeautifulSoup(self.markup, 'html.parser')
+
+    # The same values the test suite reads with a['href']
+    def test_same_values_as_find_all(self):
+        soup = BeautifulSoup(self.html_text_gabe, 'html.parser')
+        links = soup.find_all('a')
+        result = columns(links, 'href', arrays=False)
+        self.assertIsInstance(result, Columns)
+        self.assertEqual(list(result), ['href'])
+        self.assertEqual(result['href'], [a['href'] for a in links])
+        self.assertEqual(result.missing['href'], [False] * len(links))
+        self.assertEqual(result.rows, len(links))
+
+    def test_missing_values(self):
+        result = columns(self.soup.find_all('img'), ['src', 'title'], arrays=False)
+        self.assertEqual(result['src'], ['a.png', 'b.png', None])
+        self.assertEqual(result.missing['src'], [False, False, True])
+        self.assertEqual(result['title'], [None, None, None])
+        self.assertEqual(result.missing['title'], [True, True, True])
+
+    def test_multi_valued_attributes_are_joined(self):
+        result = columns(self.soup.find_all('img'), 'class', arrays=False)
+        self.assertEqual(result['class'], ['big wide', None, None])
+
+    def test_numeric(self):
+        result = columns(self.soup.find_all('img'), ['width', 'height'], numeric=['width'], arrays=False)
+        self.assertEqual(result['width'], [200.0, 50.0, None])
+        self.assertEqual(result.missing['width'], [False, False, True])
+        self.assertEqual(result['height'], ['130px', None, '.5e1'])
+        result = columns(self.soup.find_all('img'), ['width', 'height'], numeric=True, arrays=False)
+        self.assertEqual(result['height'], [130.0, None, 5.0])
+
+    def test_find_columns(self):
+        soup = BeautifulSoup(self.html_text_gabe, 'html.parser')
+        expected = [a['href'] for a in soup.find_all('a')]
+        self.assertEqual(find_columns(soup, 'a', 'href', arrays=False)['href'], expected)
+        self.assertEqual(find_columns(soup, compile_query('a'), 'href', arrays=False)['href'], expected)
+        self.assertEqual(find_columns(soup, {'name': 'a', 'limit': 1}, 'href', arrays=False)['href'], expected[:1])
+        self.assertEqual(find_columns(soup.body, 'a', 'href', arrays=False, recursive=False)['href'], expected[-1:])
+        tree = CompactTree.parse(self.html_text_gabe)
+        self.assertEqual(find_columns(tree.root, 'a', 'href', arrays=False)['href'], expected)
+        self.assertEqual(find_columns(tree.root, {'name': 'a', 'limit': 1}, 'href', arrays=False)['href'], expected[:1])
+        # A compact node can't run a Query's predicate
+        self.assertRaises(TypeError, find_columns, tree.root, compile_query('a'), 'href')
+        self.assertRaises(ValueError, find_columns, soup, {'name': 'a', 'recursive': False}, 'href')
+
+    def test_arrays_need_numpy(self):
+        if numpy is not None:
+            self.skipTest('NumPy is installed')
+        self.assertRaises(ImportError, columns, self.soup.find_all('img'), 'src', arrays=True)
+        self.assertIsInstance(columns(self.soup.find_all('img'), 'src')['src'], list)
+
+    @unittest.skipIf(numpy is None, 'NumPy is not installed')
+    def test_arrays(self):
+        result = columns(self.soup.find_all('img'), ['src', 'width'], numeric=['width'])
+        self.assertEqual(result['src'].dtype, object)
+        self.assertEqual(list(result['src']), ['a.png', 'b.png', None])
+        self.assertEqual(result['width'].dtype, float)
+        self.assertEqual(list(result['width'][:2]), [200.0, 50.0])
+        self.assertTrue(numpy.isnan(result['width'][2]))
+        self.assertEqual(result.missing['width'].dtype, bool)
+        self.assertEqual(list(result.missing['width']), [False, False, True])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import re
+import unittest
+
+from bs4 import BeautifulSoup, Tag
+from souptools.compact import CompactTree, TagNode, TextNode
+from souptools.generator import generate_document
+from tests import testsuite
+
+
+class CompactTreeTest(unittest.TestCase):
+    documents = [
+        testsuite.TreeNavigationBlackboxTest.html_text,
+        testsuite.TreeFindTest.html_text_gabe,
+        testsuite.WhiteBoxTesting.test_tree,
+        '<p>a<!--note--><pre> keep\n</pre><script>if (a < b) {}</script><br>tail</p>',
+    ]
+
+    def _nodes(self, element):
+        return [element] + list(element.descendants)
+
+    # Assert that two navigation results point at the same place in both trees
+    def assertSameNode(self, expected, found, numbers):
+        if expected is None:
+            self.assertIsNone(found)
+        else:
+            self.assertEqual(numbers[id(expected)], found.i)
+
+    def assertSameTree(self, markup):
+        soup = BeautifulSoup(markup, 'html.parser')
+        tree = CompactTree.parse(markup)
+        expected = self._nodes(soup)
+        found = self._nodes(tree.root)
+        self.assertEqual(len(found), len(expected))
+        numbers = dict((id(element), i) for i, element in enumerate(expected))
+        for element, node in zip(expected, found):
+            if isinstance(element, Tag):
+                self.assertIsInstance(node, TagNode)
+                self.assertEqual(node.name, element.name)
+                self.assertEqual(node.attrs, element.attrs)
+                self.assertEqual(node.get_text(), element.get_text())
+                self.assertEqual(node.string, element.string)
+            else:
+                self.assertIsInstance(node, TextNode)
+                self.assertEqual(node, element)
+                self.assertIs(node.string_type, type(element))
+            for attr in ('parent', 'next_sibling', 'previous_sibling', 'next_element', 'previous_element'):
+                self.assertSameNode(getattr(element, attr), getattr(node, attr), numbers)
+        self.assertEqual(tree.to_soup().decode(), soup.decode())
+
+    def test_matches_beautifulsoup_on_fixtures(self):
+        for markup in self.documents:
+            self.assertSameTree(markup)
+
+    def test_matches_beautifulsoup_on_generated_document(self):
+        self.assertSameTree(generate_document(size='64KB', seed=3))
+
+    def test_from_soup(self):
+        markup = testsuite.TreeFindTest.html_text_gabe
+        soup = BeautifulSoup(markup, 'html.parser')
+        self.assertEqual(CompactTree.from_soup(soup).to_soup().decode(), soup.decode())
+
+    def test_find(self):
+        markup = testsuite.TreeFindTest.html_text_gabe
+        soup = BeautifulSoup(markup, 'html.parser')
+        root = CompactTree.parse(markup).root
+        self.assertEqual(root.find(id='test_id').get_text(), soup.find(id='test_id').get_text())
+        self.assertEqual(root.a['href'], soup.a['href'])
+        self.assertEqual(len(root.find_all('a')), len(soup.find_all('a')))
+        self.assertEqual(len(root.find_all('p', class_='p_class1')), len(soup.find_all('p', class_='p_class1')))
+        self.assertEqual(len(root.find_all('a', limit=2)), 2)
+        self.assertIsNone(root.find('table'))
+
+    # The same arguments, in the same order, as bs4's find_all
+    def test_find_string(self):
+        markup = '<p>x</p><!--x--><b>x<i>y</i></b><i>x</i>'
+        soup = BeautifulSoup(markup, 'html.parser')
+        root = CompactTree.parse(markup).root
+        for args, kwargs in [((), {'string': 'x'}), ((), {'string': True}), (('i',), {'string': 'x'}),
+                             ((True,), {'string': 'x'}), (('b',), {'string': True}), ((), {'string': 'z'}),
+                             (('i', None, True, None, 1), {}), (('i', None, True, 'x'), {})]:
+            expected = soup.find_all(*args, **kwargs)
+            found = root.find_all(*args, **kwargs)
+            self.assertEqual([str(x) for x in found], [str(x) for x in expected], (args, kwargs))
+        self.assertEqual(root.find(string='y'), 'y')
+        self.assertEqual(root.find('i', None, True, 'x').decode(), '<i>x</i>')
+        self.assertEqual([str(x) for x in root.find_all(string=['x', 'y'])],
+                         [str(x) for x in soup.find_all(string=['x', 'y'])])
+
+    # Lists, regular expressions, True/False and functions, as in bs4
+    def test_find_filters(self):
+        markup = ('<h1 id="top">Title</h1><p class="lead wide">One <b>bold</b></p>'
+                  '<p class="wide" id="second">Two <i>it</i></p><p>Three</p>'
+                  '<a href="https://example.com/">x</a><a href="/local">y</a><a>z</a>')
+        soup = BeautifulSoup(markup, 'html.parser')
+        root = CompactTree.parse(markup).root
+        for args, kwargs in [
+                ((['a', 'i'],), {}),
+                ((re.compile('^h[0-9]$'),), {}),
+                ((lambda tag: tag.name == 'p' and tag.has_attr('id'),), {}),
+                ((), {'id': True}),
+                (('p',), {'id': False}),
+                (('p',), {'id': None}),
+                (('p',), {'class_': ['lead', 'missing']}),
+                (('p',), {'class_': re.compile('^wi')}),
+                (('p',), {'class_': 'lead wide'}),
+                ((), {'href': lambda value: value is not None and 'example' in value}),
+                (('a', {'href': re.compile('^https')}), {}),
+                (('p', 'wide'), {}),
+                ((), {'string': re.compile('^T')}),
+                ((['b', 'i'],), {'string': re.compile('.')}),
+                ((), {'id': []})]:
+            expected = soup.find_all(*args, **kwargs)
+            found = root.find_all(*args, **kwargs)
+            self.assertEqual([str(x) for x in found], [str(x) for x in expected], (args, kwargs))
+
+    def test_nodes_have_no_instance_dict(self):
+        root = CompactTree.parse(testsuite.TreeFindTest.html_text_gabe).root
+        for node in self._nodes(root):
+            self.assertFalse(hasattr(node, '__dict__'))
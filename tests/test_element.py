@@ -0,0 +1,183 @@
+import random
+import unittest
+
+from bs4 import BeautifulSoup, CData, Comment, NavigableString, Tag
+from souptools.element import INDEXED_CHILDREN, TrackedSoup, TrackedString
+from tests import testsuite
+
+
+class TextCacheTest(unittest.TestCase):
+    html_text_gabe = testsuite.TreeFindTest.html_text_gabe
+    markup = '<h1> Hello <i> world </i> ! </h1><p>a<!--hidden-->b<script>var x;</script></p>'
+
+    # Assert that a tracked tag's text matches bs4's own uncached tree walk
+    def assertSameText(self, tracked):
+        for separator, strip in (('', False), ('|', False), (' ', True)):
+            expected = Tag.get_text(tracked, separator, strip)
+            self.assertEqual(tracked.get_text(separator, strip), expected)
+            self.assertEqual(''.join(tracked.iter_text(separator, strip)), expected)
+        self.assertEqual(list(tracked.stripped_strings), list(Tag._all_strings(tracked, True)))
+        self.assertEqual(tracked.text, Tag.get_text(tracked))
+
+    def test_same_text_as_beautifulsoup(self):
+        for markup in (self.markup, self.html_text_gabe):
+            soup = TrackedSoup(markup, 'html.parser')
+            self.assertSameText(soup)
+            # And again, this time from the cache.
+            self.assertSameText(soup)
+            for tag in soup.find_all(True):
+                self.assertSameText(tag)
+            self.assertEqual(soup.get_text(), BeautifulSoup(markup, 'html.parser').get_text())
+
+    def test_text_is_cached(self):
+        soup = TrackedSoup(self.markup, 'html.parser')
+        self.assertIs(soup.get_text(), soup.get_text())
+        self.assertIs(soup.h1.get_text(strip=True), soup.h1.get_text(strip=True))
+
+    def test_explicit_types_are_not_cached(self):
+        soup = TrackedSoup(self.markup, 'html.parser')
+        self.assertEqual(soup.p.get_text(types=(Comment,)), 'hidden')
+        self.assertEqual(soup.p.get_text(), 'ab')
+
+    def test_mutation_clears_ancestors_only(self):
+        soup = TrackedSoup(self.markup, 'html.parser')
+        soup.get_text()
+        h1_text = soup.h1.get_text()
+        soup.p.get_text()
+        soup.p.append('c')
+        self.assertIsNone(soup.p._text_cache)
+        self.assertIsNone(soup._text_cache)
+        self.assertIs(soup.h1.get_text(), h1_text)
+        self.assertSameText(soup)
+
+    def test_changes_are_seen(self):
+        soup = TrackedSoup(self.markup, 'html.parser')
+        soup.get_text()
+        soup.i.string.replace_with(' earth ')
+        self.assertSameText(soup)
+        soup.i.extract()
+        self.assertSameText(soup)
+        soup.h1.insert(0, NavigableString('Oh, '))
+        self.assertSameText(soup)
+        soup.p.clear()
+        self.assertSameText(soup)
+        soup.h1.string = 'Replaced'
+        self.assertSameText(soup)
+
+    # A tag between the smoothed one and the tag it changed is stale too
+    def test_smooth_clears_intermediate_caches(self):
+        soup = TrackedSoup('<div><a><b>x</b></a></div>', 'html.parser')
+        soup.b.append('y')
+        self.assertEqual(soup.a.get_text('|'), 'x|y')
+        self.assertEqual(list(soup.a.iter_text('|')), ['x', '|', 'y'])
+        soup.div.smooth()
+        self.assertEqual(soup.a.get_text('|'), 'xy')
+        self.assertEqual(list(soup.a.iter_text('|')), ['xy'])
+        self.assertEqual(list(soup.a.stripped_strings), ['xy'])
+        self.assertSameText(soup.a)
+        self.assertSameText(soup)
+
+    # Strings of bs4's own classes have no hook, but their parent sees them go
+    def test_untracked_strings_are_seen(self):
+        soup = TrackedSoup('<div><p>a<![CDATA[b]]>c<script>x</script></p></div>', 'html.parser')
+        cdata = soup.p.contents[1]
+        self.assertIsInstance(cdata, CData)
+        self.assertNotIsInstance(cdata, TrackedString)
+        self.assertEqual(soup.div.get_text(), 'abc')
+        self.assertEqual(soup.script.get_text(), 'x')
+        cdata.extract()
+        self.assertEqual(soup.div.get_text(), 'ac')
+        self.assertEqual(soup.get_text(), 'ac')
+        soup.script.string.extract()
+        self.assertEqual(soup.script.get_text(), '')
+        self.assertSameText(soup)
+        # Tags from an untracked tree too
+        soup.p.append(BeautifulSoup('<b>d</b>', 'html.parser').b)
+        self.assertEqual(soup.div.get_text(), 'acd')
+        soup.b.extract()
+        self.assertEqual(soup.div.get_text(), 'ac')
+
+    def test_attribute_changes_keep_text(self):
+        soup = TrackedSoup(self.markup, 'html.parser')
+        text = soup.get_text()
+        soup.h1['class'] = 'title'
+        self.assertIs(soup.get_text(), text)
+
+    def test_iter_text_is_lazy(self):
+        soup = TrackedSoup(self.markup, 'html.parser')
+        pieces = soup.iter_text('|')
+        self.assertEqual(next(pieces), ' Hello ')
+        self.assertEqual(next(pieces), '|')
+        self.assertIsNone(soup._text_cache)
+
+
+class PositionIndexTest(unittest.TestCase):
+    children = INDEXED_CHILDREN * 3
+
+    def setUp(self):
+        markup = ''.join('<p>%d</p>text %d' % (i, i) for i in range(self.children // 2))
+        self.soup = TrackedSoup('<div>%s</div>' % markup, 'html.parser')
+        self.div = self.soup.div
+
+    # Assert that index() agrees with a scan of contents for every child
+    def assertPositions(self):
+        for i, child in enumerate(self.div.contents):
+            self.assertEqual(self.div.index(child), i)
+            self.assertEqual(Tag.index(self.div, child), i)
+        self.assertRaises(ValueError, self.div.index, self.soup.new_tag('p'))
+
+    def test_index(self):
+        self.assertPositions()
+        self.assertEqual(self.div._indexed, len(self.div.contents))
+
+    def test_edits_near_the_end_keep_earlier_positions(self):
+        self.assertPositions()
+        n = len(self.div.contents)
+        self.div.contents[-3].insert_after(self.soup.new_tag('b'))
+        self.assertEqual(self.div._indexed, n - 2)
+        # Finding the last child brings the positions after the insert up
+        # to date; removing it only invalidates its own.
+        self.div.contents[-1].extract()
+        self.assertEqual(self.div._indexed, n)
+        self.assertPositions()
+
+    def test_random_edits(self):
+        rng = random.Random(0)
+        div, soup = self.div, self.soup
+        for step in range(300):
+            contents = div.contents
+            child = rng.choice(contents)
+            operation = rng.randrange(10)
+            if operation == 0:
+                div.insert(rng.randrange(len(contents) + 1), soup.new_tag('b'))
+            elif operation == 1 and len(contents) > INDEXED_CHILDREN:
+                child.extract()
+            elif operation == 2:
+                child.replace_with(soup.new_tag('i'), 'new')
+            elif operation == 3:
+                child.wrap(soup.new_tag('span'))
+            elif operation == 4 and isinstance(child, Tag) and child.contents:
+                child.unwrap()
+            elif operation == 5:
+                child.insert_before('before', soup.new_tag('em'))
+            elif operation == 6:
+                child.insert_after(rng.choice(contents))
+            elif operation == 7 and isinstance(child, Tag) and len(contents) > INDEXED_CHILDREN:
+                child.decompose()
+            elif operation == 8:
+                div.append(rng.choice(contents))
+            else:
+                div.insert(0, 'first')
+            self.assertPositions()
+        div.smooth()
+        self.assertPositions()
+        div.clear()
+        div.extend([soup.new_tag('b') for i in range(self.children)])
+        self.assertPositions()
+
+    def test_changes_behind_its_back(self):
+        self.assertPositions()
+        self.div.contents.reverse()
+        self.assertPositions()
+        del self.div.contents[:INDEXED_CHILDREN // 2]
+        self.assertPositions()
@@ -0,0 +1,59 @@
+import io
+import unittest
+
+from bs4 import BeautifulSoup
+from souptools.generator import generate_document, iter_document, parse_size, write_document
+
+
+class DocumentGeneratorTest(unittest.TestCase):
+
+    # Sizes can be given as strings with units
+    def test_parse_size(self):
+        self.assertEqual(parse_size('1KB'), 1024)
+        self.assertEqual(parse_size('2.5MB'), int(2.5 * 1024 * 1024))
+        self.assertEqual(parse_size(2048), 2048)
+        with self.assertRaises(ValueError):
+            parse_size('lots')
+
+    # The same seed always gives the same document, a different seed does not
+    def test_seeded(self):
+        self.assertEqual(generate_document(size='8KB', seed=3), generate_document(size='8KB', seed=3))
+        self.assertNotEqual(generate_document(size='8KB', seed=3), generate_document(size='8KB', seed=4))
+
+    # The generated document is close to the requested size and keeps the fixture landmarks
+    def test_size_and_landmarks(self):
+        html = generate_document(size='16KB')
+        self.assertGreaterEqual(len(html), 16 * 1024)
+        self.assertLess(len(html), 17 * 1024)
+        soup = BeautifulSoup(html, 'html.parser')
+        self.assertEqual(str(soup.find(id='test_id')), '<div id="test_id">Find me!</div>')
+        self.assertEqual(soup.find(id='main_tag').find('img')['width'], '200px')
+        self.assertTrue(len(soup.find_all('a')) > 0)
+
+    # Nesting never goes deeper than requested
+    def test_depth(self):
+        soup = BeautifulSoup(generate_document(size='32KB', depth=3, fanout=8, text_ratio=0.1), 'html.parser')
+        for tag in soup.body.find_all(True):
+            depth = [parent.name for parent in tag.parents].index('body') + 1
+            self.assertLessEqual(depth, 3)
+
+    # Output is streamed in chunks, never as one big string
+    def test_streamed(self):
+        chunks = list(iter_document(size='256KB', chunk_size=16 * 1024))
+        self.assertGreater(len(chunks), 10)
+        self.assertTrue(all(len(chunk) < 20 * 1024 for chunk in chunks))
+        out = io.StringIO()
+        written = write_document(out, size='256KB')
+        self.assertEqual(written, len(out.getvalue()))
+        self.assertEqual(out.getvalue(), ''.join(chunks))
+
+    # Sizes outside 1KB..500MB are rejected
+    def test_size_bounds(self):
+        with self.assertRaises(ValueError):
+            generate_document(size=10)
+        with self.assertRaises(ValueError):
+            generate_document(size='501MB')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+import copy
+import unittest
+
+from bs4 import BeautifulSoup, Tag
+from souptools.element import TrackedSoup, TrackedString, TrackedTag
+from souptools.index import IndexedSoup
+from tests import testsuite
+
+
+class IndexedSoupTest(unittest.TestCase):
+    html_text_gabe = testsuite.TreeFindTest.html_text_gabe
+    test_tree = testsuite.WhiteBoxTesting.test_tree
+
+    queries = [
+        (('a',), {}),
+        (('p',), {}),
+        (('aside:colon',), {}),
+        (('li',), {}),
+        ((), {'id': 'test_id'}),
+        ((), {'id': 'main_tag'}),
+        ((), {'class_': 'p_class1'}),
+        (('p',), {'class_': 'p_class2'}),
+        (('div',), {'id': 'test_id'}),
+        (('a',), {'id': 'test_id'}),
+        (('a',), {'limit': 2}),
+        (('a',), {'recursive': False}),
+        ((True,), {}),
+        ((), {'string': 'Find me!'}),
+        ((), {'href': 'https://www.google.com/'}),
+    ]
+
+    # Assert that every query gives the same answer as bs4's own tree walk
+    def assertSameResults(self, indexed):
+        for args, kwargs in self.queries:
+            kwargs = dict(kwargs)
+            expected = Tag.find_all(indexed, *args, **kwargs)
+            found = indexed.find_all(*args, **kwargs)
+            self.assertEqual([id(x) for x in found], [id(x) for x in expected], (args, kwargs))
+            kwargs.pop('limit', None)
+            self.assertIs(indexed.find(*args, **kwargs), Tag.find(indexed, *args, **kwargs))
+
+    # The tree is made of tracked elements
+    def test_tracked_classes(self):
+        soup = TrackedSoup(self.test_tree, 'html.parser')
+        self.assertIsInstance(soup.body, TrackedTag)
+        self.assertIsInstance(soup.title.string, TrackedString)
+        self.assertIsInstance(soup.new_tag('b'), TrackedTag)
+        soup.body.append('text')
+        self.assertIsInstance(soup.body.contents[-1], TrackedString)
+
+    # Mutations bump the generation of the root
+    def test_generation(self):
+        soup = TrackedSoup(self.test_tree, 'html.parser')
+        generation = soup._generation
+        soup.title.string.extract()
+        self.assertGreater(soup._generation, generation)
+        generation = soup._generation
+        soup.body.p['id'] = 'new'
+        self.assertGreater(soup._generation, generation)
+
+    def test_lookups(self):
+        soup = IndexedSoup(self.html_text_gabe, 'html.parser')
+        self.assertEqual(str(soup.find(id='test_id')), '<div id="test_id">Find me!</div>')
+        self.assertEqual(soup.find(id='main_tag').find('img')['width'], '200px')
+        self.assertEqual(len(soup.find_all('a')), 3)
+        self.assertEqual(soup.find('header'), None)
+        self.assertIs(soup.soup_index.by_id['test_id'][0], soup.div)
+        self.assertSameResults(soup)
+
+    # The index can be built at parse time
+    def test_build_index(self):
+        soup = IndexedSoup(self.html_text_gabe, 'html.parser', build_index=True)
+        self.assertFalse(soup.soup_index.stale)
+        self.assertEqual(len(soup.soup_index.by_name['a']), 3)
+
+    def test_insert(self):
+        soup = IndexedSoup(self.html_text_gabe, 'html.parser')
+        soup.find_all('a')
+        link = soup.new_tag('a', href='https://www.python.org/')
+        soup.body.insert(0, link)
+        self.assertIs(soup.find('a'), link)
+        soup.p.insert_after(BeautifulSoup('<p class="p_class1"><a id="x">x</a></p>', 'html.parser'))
+        self.assertEqual(soup.find(id='x').name, 'a')
+        self.assertSameResults(soup)
+
+    def test_extract_and_decompose(self):
+        soup = IndexedSoup(self.html_text_gabe, 'html.parser')
+        soup.find_all('a')
+        soup.find(id='test_id').extract()
+        self.assertIsNone(soup.find(id='test_id'))
+        soup.find('main').decompose()
+        self.assertEqual(soup.find_all('img'), [])
+        self.assertSameResults(soup)
+
+    # Children of the soup itself look up their position with soup.index()
+    def test_top_level_children(self):
+        soup = IndexedSoup('<p class="x">a</p><div id="x">b</div><a>c</a><b>d</b>', 'html.parser')
+        soup.find_all('p')
+        self.assertEqual(soup.index(soup.div), 1)
+        soup.div.extract()
+        self.assertIsNone(soup.find(id='x'))
+        new_tag = soup.new_tag('div', id='replacement')
+        soup.p.replace_with(new_tag)
+        self.assertIsNone(soup.find(class_='x'))
+        self.assertIs(soup.find(id='replacement'), new_tag)
+        soup.a.decompose()
+        self.assertEqual(soup.find_all('a'), [])
+        soup.b.insert_before(soup.new_tag('i'))
+        soup.b.insert_after('text')
+        self.assertEqual(str(soup), '<div id="replacement"></div><i></i><b>d</b>text')
+        self.assertSameResults(soup)
+
+    def test_replace_with(self):
+        soup = IndexedSoup(self.test_tree, 'html.parser')
+        soup.find_all('p')
+        new_tag = soup.new_tag('div', id='replacement')
+        soup.find(class_='p_class1').replace_with(new_tag)
+        self.assertIsNone(soup.find(class_='p_class1'))
+        self.assertIs(soup.find(id='replacement'), new_tag)
+        self.assertSameResults(soup)
+
+    def test_wrap_and_unwrap(self):
+        soup = IndexedSoup(self.test_tree, 'html.parser')
+        soup.find_all('section')
+        soup.a.wrap(soup.new_tag('section'))
+        self.assertEqual(soup.find('section').a.name, 'a')
+        soup.find('section').unwrap()
+        self.assertEqual(soup.find_all('section'), [])
+        self.assertSameResults(soup)
+
+    def test_clear(self):
+        soup = IndexedSoup(self.html_text_gabe, 'html.parser')
+        soup.find_all('a')
+        soup.body.clear()
+        self.assertEqual(soup.find_all('a'), [])
+        self.assertIsNone(soup.find(id='test_id'))
+        soup = IndexedSoup(self.html_text_gabe, 'html.parser')
+        soup.find_all('a')
+        soup.body.clear(decompose=True)
+        self.assertEqual(soup.find_all('p'), [])
+
+    # Changing attributes through the tag updates the id and class tables
+    def test_attribute_changes(self):
+        soup = IndexedSoup(self.test_tree, 'html.parser')
+        soup.find_all('p')
+        soup.a['id'] = 'link'
+        self.assertIs(soup.find(id='link'), soup.a)
+        del soup.a['id']
+        self.assertIsNone(soup.find(id='link'))
+        soup.a['class'] = ['p_class1']
+        self.assertEqual(len(soup.find_all(class_='p_class1')), 2)
+
+    # A copy of an indexed soup is indexed independently
+    def test_copy(self):
+        soup = IndexedSoup(self.html_text_gabe, 'html.parser')
+        soup.find_all('a')
+        clone = copy.copy(soup)
+        self.assertIsInstance(clone, IndexedSoup)
+        clone.a.decompose()
+        self.assertEqual(len(soup.find_all('a')), 3)
+        self.assertEqual(len(clone.find_all('a')), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
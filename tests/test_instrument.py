@@ -0,0 +1,116 @@
+import io
+import unittest
+
+from bs4 import BeautifulSoup, NavigableString, Tag
+from bs4.element import PageElement
+from souptools import instrument
+from souptools.bulk import detach_many, insert_many
+from souptools.clone import clone
+from souptools.output import write_to
+from souptools.query import compile_query, find_all_many
+from souptools.smooth import smooth
+from tests import testsuite
+
+
+class InstrumentTest(unittest.TestCase):
+    html_text_gabe = testsuite.TreeFindTest.html_text_gabe
+
+    def setUp(self):
+        instrument.reset()
+
+    def tearDown(self):
+        instrument.disable()
+        instrument.reset()
+
+    def test_disable_restores_bs4(self):
+        originals = [Tag.__dict__['__init__'], NavigableString.__dict__['__new__'],
+                     BeautifulSoup.__dict__['_feed'], PageElement.__dict__['_find_all'],
+                     Tag.__dict__['insert'], Tag.__dict__['decode']]
+        instrument.enable()
+        instrument.enable()
+        self.assertTrue(instrument.enabled)
+        self.assertIsNot(Tag.__dict__['__init__'], originals[0])
+        instrument.disable()
+        self.assertFalse(instrument.enabled)
+        self.assertEqual(originals, [Tag.__dict__['__init__'], NavigableString.__dict__['__new__'],
+                                     BeautifulSoup.__dict__['_feed'], PageElement.__dict__['_find_all'],
+                                     Tag.__dict__['insert'], Tag.__dict__['decode']])
+        # Nothing is counted while disabled
+        BeautifulSoup(self.html_text_gabe, 'html.parser').find_all('a')
+        self.assertEqual(sum(instrument.totals().values()), 0)
+
+    def test_parse(self):
+        with instrument.instrumented():
+            soup = BeautifulSoup('<p>one<b>two</b></p><p>three</p>', 'html.parser')
+        # The soup, three tags and three strings
+        self.assertEqual(instrument.counters['nodes_created'], 7)
+        report = instrument.as_dict()
+        self.assertGreater(report['seconds']['parse'], 0)
+        self.assertGreater(report['seconds']['tree_building'], 0)
+        self.assertAlmostEqual(report['seconds']['tokenize'],
+                               report['seconds']['parse'] - report['seconds']['tree_building'])
+        p = soup.find_all('p')[1]
+        with instrument.instrumented():
+            clone(p)
+        self.assertEqual(instrument.counters['nodes_created'], 2)
+
+    def test_find_all(self):
+        soup = BeautifulSoup(self.html_text_gabe, 'html.parser')
+        tested = len(list(soup.descendants))
+        with instrument.instrumented():
+            found = soup.find_all('a')
+        self.assertEqual(len(found), len(BeautifulSoup(self.html_text_gabe, 'html.parser').find_all('a')))
+        self.assertEqual(instrument.counters['find_all_calls'], 1)
+        self.assertEqual(instrument.counters['predicate_evaluations'], tested)
+        self.assertGreater(instrument.timers['find_all'], 0)
+
+        with instrument.instrumented():
+            compile_query('a').find_all(soup)
+            find_all_many(soup, ['a', 'p'])
+        self.assertEqual(instrument.counters['find_all_calls'], 3)
+        self.assertEqual(instrument.counters['predicate_evaluations'], 2 * tested)
+
+    def test_relinks(self):
+        soup = BeautifulSoup('<div><p>one</p><p>two</p></div>', 'html.parser')
+        with instrument.instrumented():
+            soup.div.append(soup.new_tag('hr'))
+            soup.div.p.extract()
+        self.assertEqual(instrument.counters['relinks'], 2)
+        with instrument.instrumented():
+            insert_many(soup.div, 0, ['a', 'b', 'c'])
+            detach_many(soup.find_all('p'))
+        self.assertEqual(instrument.counters['relinks'], 4)
+
+    def test_strings_merged(self):
+        for smoother in (Tag.smooth, smooth):
+            soup = BeautifulSoup('<div><p>a</p><p>b</p></div>', 'html.parser')
+            for p in soup.find_all('p'):
+                p.append('x')
+                p.append('y')
+            with instrument.instrumented():
+                smoother(soup)
+            self.assertEqual(instrument.counters['strings_merged'], 4)
+
+    def test_serialized(self):
+        soup = BeautifulSoup('<p>caf\xe9</p>', 'html.parser')
+        with instrument.instrumented():
+            soup.decode()
+            soup.encode('utf8')
+        self.assertEqual(instrument.counters['serialized_characters'], 2 * len(soup.decode()))
+        self.assertEqual(instrument.counters['serialized_bytes'], len(soup.encode('utf8')))
+        with instrument.instrumented():
+            write_to(soup, io.StringIO())
+            write_to(soup, io.BytesIO(), encoding='utf8')
+        self.assertEqual(instrument.counters['serialized_characters'], len(soup.decode()))
+        self.assertEqual(instrument.counters['serialized_bytes'], len(soup.encode('utf8')))
+
+    def test_to_prometheus(self):
+        instrument.counters['nodes_created'] = 12
+        text = instrument.to_prometheus()
+        self.assertIn('# TYPE souptools_nodes_created_total counter\nsouptools_nodes_created_total 12\n', text)
+        self.assertIn('souptools_parse_seconds_total 0', text)
+        for line in text.splitlines():
+            if not line.startswith('#'):
+                name, value = line.split(' ')
+                float(value)
+        self.assertTrue(instrument.to_prometheus('bs_').startswith('# HELP bs_nodes_created_total'))
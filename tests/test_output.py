@@ -0,0 +1,101 @@
+import io
+import socket
+import tracemalloc
+import unittest
+
+from bs4 import BeautifulSoup
+from souptools.generator import generate_document
+from souptools.output import iter_markup, write_to
+from tests import testsuite
+
+
+class _Sink(object):
+    # Throws the output away, remembering only how much there was.
+    def __init__(self):
+        self.written = 0
+        self.largest = 0
+
+    def write(self, data):
+        self.written += len(data)
+        self.largest = max(self.largest, len(data))
+
+
+class WriteToTest(unittest.TestCase):
+    fixtures = [
+        testsuite.TreeModificationTests.test_tree,
+        testsuite.TreeFindTest.html_text_gabe,
+        '<p>caf\xe9 &amp; <b>x</b><pre> keep\n  this </pre><textarea> and  this</textarea><!-- c --><br/></p>',
+        '<meta charset="latin-1"><p>☃</p>',
+    ]
+
+    def write(self, soup, **kwargs):
+        fp = io.BytesIO() if kwargs.get('encoding') else io.StringIO()
+        written = write_to(soup, fp, buffer_size=16, **kwargs)
+        self.assertEqual(written, len(fp.getvalue()))
+        return fp.getvalue()
+
+    # Same output as str(), prettify() and encode(), whatever the buffer size
+    def test_same_as_bs4(self):
+        for html in self.fixtures:
+            soup = BeautifulSoup(html, 'html.parser')
+            self.assertEqual(self.write(soup), str(soup))
+            self.assertEqual(self.write(soup, pretty=True), soup.prettify())
+            self.assertEqual(self.write(soup, formatter='html5'), soup.decode(formatter='html5'))
+            self.assertEqual(self.write(soup, encoding='latin-1'), soup.encode('latin-1'))
+            self.assertEqual(self.write(soup, pretty=True, encoding='utf-16'), soup.prettify('utf-16'))
+            self.assertEqual(self.write(soup.p), str(soup.p))
+            string = soup.find(string=True)
+            self.assertEqual(self.write(string), string.output_ready())
+
+    # As in TreeModificationTests.test_insert_before_empty_insert
+    def test_empty_insert(self):
+        tree = BeautifulSoup(testsuite.TreeModificationTests.test_tree, 'html.parser')
+        expected = BeautifulSoup(testsuite.TreeModificationTests.test_tree, 'html.parser')
+        tree.contents[0].insert_before()
+        self.assertEqual(self.write(tree, pretty=True), self.write(expected, pretty=True))
+
+    def test_xml_declaration(self):
+        soup = BeautifulSoup('<a><b>x</b></a>', 'html.parser')
+        soup.is_xml = True
+        self.assertEqual(self.write(soup), soup.decode())
+        self.assertEqual(self.write(soup, encoding='utf-8'), soup.encode('utf-8'))
+
+    def test_iter_markup(self):
+        soup = BeautifulSoup(testsuite.TreeFindTest.html_text_gabe, 'html.parser')
+        self.assertEqual(''.join(iter_markup(soup, indent_level=0)), soup.prettify())
+
+    def test_socket(self):
+        soup = BeautifulSoup(testsuite.TreeFindTest.html_text_gabe, 'html.parser')
+        sender, receiver = socket.socketpair()
+        with sender, receiver:
+            write_to(soup, sender, encoding='utf-8', buffer_size=64)
+            sender.shutdown(socket.SHUT_WR)
+            received = b''.join(iter(lambda: receiver.recv(4096), b''))
+        self.assertEqual(received, soup.encode('utf-8'))
+        # A socket takes bytes, so it gets them even without an encoding
+        sender, receiver = socket.socketpair()
+        with sender, receiver:
+            written = write_to(soup, sender, buffer_size=64)
+            sender.shutdown(socket.SHUT_WR)
+            received = b''.join(iter(lambda: receiver.recv(4096), b''))
+        self.assertEqual(received, soup.encode())
+        self.assertEqual(written, len(received))
+
+    # No write is much bigger than the buffer, and no copy of the whole
+    # document is ever made
+    def test_memory_is_bounded(self):
+        soup = BeautifulSoup(generate_document(size='256KB', seed=6), 'html.parser')
+        sink = _Sink()
+        tracemalloc.start()
+        try:
+            write_to(soup, sink, encoding='utf-8', buffer_size=4096)
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(sink.written, len(soup.encode('utf-8')))
+        self.assertLess(sink.largest, 8192)
+        self.assertLess(peak, 64 * 1024)
+
+
+if __name__ == '__main__':
+    unittest.main()
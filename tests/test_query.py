@@ -0,0 +1,132 @@
+import re
+import unittest
+
+from bs4 import BeautifulSoup
+from souptools.generator import generate_document
+from souptools.query import compile_query, find_all_many
+from tests import testsuite
+
+
+class CompiledQueryTest(unittest.TestCase):
+    documents = [
+        testsuite.TreeFindTest.html_text_gabe,
+        testsuite.TreeNavigationBlackboxTest.html_text,
+        '<div class="a b" id="x"><p class="a">one</p><p class="b a">two</p><svg:rect>r</svg:rect>'
+        '<p class="">three</p><p>Find me!</p><br/><p data-x="1">  </p></div>',
+    ]
+
+    # (args, kwargs) for find_all, covering every shape of rule
+    queries = [
+        (('a',), {}),
+        (('p',), {}),
+        (('aside:colon',), {}),
+        (('svg:rect',), {}),
+        (('rect',), {}),
+        ((['p', 'a'],), {}),
+        ((['p', 'svg:rect'],), {}),
+        ((True,), {}),
+        ((), {}),
+        ((re.compile('^a'),), {}),
+        ((lambda tag: tag.name == 'p' and tag.has_attr('class'),), {}),
+        ((), {'id': 'test_id'}),
+        ((), {'id': True}),
+        (('p',), {'class_': 'a'}),
+        (('p',), {'class_': 'b a'}),
+        (('p',), {'class_': ''}),
+        (('p',), {'class_': ['a', 'b']}),
+        (('p',), {'class_': None}),
+        (('p',), {'class_': False}),
+        (('p',), {'class_': re.compile('b')}),
+        ((), {'href': 'https://www.google.com/'}),
+        ((), {'href': re.compile('wikipedia')}),
+        ((), {'attrs': {'data-x': '1'}}),
+        ((), {'attrs': {'id': 'x', 'class': 'a'}}),
+        (('div',), {'class_': 'a', 'id': 'x'}),
+        (('p',), {'string': 'one'}),
+        (('p',), {'string': re.compile('t')}),
+        ((), {'string': 'Find me!'}),
+        ((), {'string': ['one', 'two']}),
+        ((), {'string': True}),
+        ((), {'string': re.compile('paragraph')}),
+        ((), {'string': lambda s: s.strip() == ''}),
+        ((), {'string': []}),
+        (('p',), {'id': []}),
+    ]
+
+    def test_same_results_as_find_all(self):
+        for markup in self.documents + [generate_document(size='16KB', seed=2)]:
+            soup = BeautifulSoup(markup, 'html.parser')
+            for args, kwargs in self.queries:
+                query = compile_query(*args, **kwargs)
+                for tag in [soup] + soup.find_all(True):
+                    for recursive in (True, False):
+                        expected = tag.find_all(*args, recursive=recursive, **kwargs)
+                        found = query.find_all(tag, recursive=recursive)
+                        self.assertEqual([id(x) for x in found], [id(x) for x in expected], (args, kwargs, tag.name, recursive))
+                        self.assertIs(query.find(tag, recursive), tag.find(*args, recursive=recursive, **kwargs))
+
+    def test_limit(self):
+        soup = BeautifulSoup(testsuite.TreeFindTest.html_text_gabe, 'html.parser')
+        query = compile_query('a')
+        self.assertEqual(query.find_all(soup, limit=2), soup.find_all('a', limit=2))
+        self.assertEqual(query.find_all(soup, limit=0), soup.find_all('a'))
+
+    def test_limit_stops_the_search(self):
+        soup = BeautifulSoup('<p>a</p><p>b</p><p>c</p>', 'html.parser')
+        seen = []
+
+        def spy(tag):
+            seen.append(tag)
+            return tag.name == 'p'
+        compile_query(spy).find_all(soup, limit=1)
+        self.assertEqual(seen, [soup.p])
+
+    def test_match_and_filter(self):
+        soup = BeautifulSoup(testsuite.TreeFindTest.html_text_gabe, 'html.parser')
+        query = compile_query('a', href=re.compile('facebook'))
+        self.assertTrue(query.match(soup.find_all('a')[1]))
+        self.assertFalse(query.match(soup.a))
+        self.assertFalse(query.match(soup.a.string))
+        self.assertEqual(list(query.filter(soup.a.next_siblings)), [soup.find_all('a')[1]])
+        strings = compile_query(string='Find me!')
+        self.assertTrue(strings.match(soup.div.string))
+        self.assertFalse(strings.match(soup.div))
+
+
+class FindAllManyTest(unittest.TestCase):
+    queries = CompiledQueryTest.queries
+
+    def test_same_results_as_find_all(self):
+        for markup in CompiledQueryTest.documents + [generate_document(size='16KB', seed=4)]:
+            soup = BeautifulSoup(markup, 'html.parser')
+            batch = [dict(kwargs, name=args[0]) if args else kwargs for args, kwargs in self.queries]
+            batch += [dict(name='p', limit=1), dict(string=True, limit=2), 'a', compile_query(id='test_id')]
+            for tag in [soup] + soup.find_all(True):
+                for recursive in (True, False):
+                    results = find_all_many(tag, batch, recursive=recursive)
+                    self.assertEqual(len(results), len(batch))
+                    for query, found in zip(batch, results):
+                        if isinstance(query, str):
+                            expected = tag.find_all(query, recursive=recursive)
+                        elif isinstance(query, dict):
+                            expected = tag.find_all(recursive=recursive, **query)
+                        else:
+                            expected = tag.find_all(id='test_id', recursive=recursive)
+                        self.assertEqual([id(x) for x in found], [id(x) for x in expected], query)
+
+    def test_stops_when_every_limit_is_reached(self):
+        soup = BeautifulSoup('<p>a</p><p>b</p><b>c</b><p>d</p>', 'html.parser')
+        seen = []
+
+        def spy(tag):
+            seen.append(tag)
+            return True
+        first_p, first_tag = find_all_many(soup, [dict(name='p', limit=1), dict(name=spy, limit=2)])
+        self.assertEqual(first_p, [soup.p])
+        self.assertEqual(first_tag, soup.find_all(True, limit=2))
+        self.assertEqual(len(seen), 2)
+
+    def test_recursive_is_not_a_query_argument(self):
+        soup = BeautifulSoup('<p>a</p>', 'html.parser')
+        with self.assertRaises(ValueError):
+            find_all_many(soup, [dict(name='p', recursive=False)])
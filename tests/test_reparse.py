@@ -0,0 +1,103 @@
+import random
+import unittest
+
+from bs4 import BeautifulSoup, Tag
+from souptools.element import TrackedSoup
+from souptools.generator import generate_document
+from souptools.reparse import apply_edit, reparse
+from tests import testsuite
+
+
+def positions(soup):
+    return [(type(element).__name__, element.name if isinstance(element, Tag) else str(element),
+             getattr(element, 'sourceline', None), getattr(element, 'sourcepos', None))
+            for element in soup.descendants]
+
+
+class ReparseTest(unittest.TestCase):
+    fixtures = [
+        testsuite.TreeFindTest.html_text_gabe,
+        generate_document(size='8KB', seed=1),
+        '<div><pre> x\n <b>y</b>  </pre><p>t<!--c--></p><script>a<b</script><template><i>z</i></template></div>\n<p>q</p>',
+    ]
+    pieces = ['x', '<b>', '</b>', '<p>', '</p>', '</div>', '<!--', '-->', '\n', '  ', '<br/>',
+              '<i>n</i>', '&amp;', '<', '>', '"', '<script>', '</script>']
+
+    def assertSameAsParse(self, soup, markup, soup_class=BeautifulSoup):
+        expected = soup_class(markup, 'html.parser')
+        self.assertEqual(soup.decode(), expected.decode())
+        self.assertEqual(positions(soup), positions(expected))
+
+    # Random edits, good and bad, always leave the tree a full parse builds
+    def test_random_edits(self):
+        rng = random.Random(0)
+        for trial in range(150):
+            old = rng.choice(self.fixtures)
+            soup = BeautifulSoup(old, 'html.parser')
+            for step in range(3):
+                start = rng.randint(0, len(old))
+                end = min(len(old), start + rng.choice([0, 1, 3, 10]))
+                new = old[:start] + ''.join(rng.choice(self.pieces) for i in range(rng.choice([1, 2]))) + old[end:]
+                reparse(soup, old, new)
+                self.assertSameAsParse(soup, new)
+                old = new
+
+    # A local edit replaces only the elements around it
+    def test_untouched_elements_are_kept(self):
+        old = testsuite.TreeFindTest.html_text_gabe
+        soup = BeautifulSoup(old, 'html.parser')
+        div = soup.find(id='test_id')
+        first_link = soup.a
+        new = old.replace('This is a paragraph.', 'This is\na longer paragraph.')
+        reparse(soup, old, new)
+        self.assertSameAsParse(soup, new)
+        self.assertIs(soup.find(id='test_id'), div)
+        self.assertIs(soup.a, first_link)
+
+    # An edit that closes a tag early affects the whole document
+    def test_edit_reaching_outside_the_region(self):
+        old = '<div><p>a</p><p>b</p></div><p>c</p>'
+        soup = BeautifulSoup(old, 'html.parser')
+        new = old.replace('<p>a', '</div><p>a')
+        reparse(soup, old, new)
+        self.assertSameAsParse(soup, new)
+
+    # An edit can finish a comment that was left open earlier on
+    def test_edit_finishing_earlier_comment(self):
+        old = '<p>a<!--b</p><i>c</i><i>d</i>'
+        soup = BeautifulSoup(old, 'html.parser')
+        new = old.replace('d', '-->d')
+        reparse(soup, old, new)
+        self.assertSameAsParse(soup, new)
+
+    def test_apply_edit(self):
+        old = '<body><p>one</p>\n<p>two</p>\n<p>three</p></body>'
+        soup = BeautifulSoup(old, 'html.parser')
+        start = old.index('two')
+        new = apply_edit(soup, old, start, start + 3, '2\n2')
+        self.assertEqual(new, old.replace('two', '2\n2'))
+        self.assertSameAsParse(soup, new)
+        self.assertRaises(ValueError, apply_edit, soup, new, 5, 2, '')
+        self.assertRaises(ValueError, apply_edit, soup, new, 0, len(new) + 1, '')
+
+    # Other tree builders are parsed again in full
+    def test_other_builder(self):
+        old = '<p>one</p><p>two</p>'
+        soup = BeautifulSoup(old, 'html.parser', store_line_numbers=False)
+        new = old.replace('two', 'three')
+        reparse(soup, old, new)
+        self.assertEqual(soup.decode(), BeautifulSoup(new, 'html.parser').decode())
+
+    # Tracked soups keep their element classes and text caches stay right
+    def test_tracked_soup(self):
+        old = testsuite.TreeFindTest.html_text_gabe
+        soup = TrackedSoup(old, 'html.parser')
+        soup.get_text()
+        new = old.replace('Find me!', 'Found <b>me</b>!')
+        reparse(soup, old, new)
+        self.assertSameAsParse(soup, new, TrackedSoup)
+        self.assertEqual(soup.get_text(), BeautifulSoup(new, 'html.parser').get_text())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import random
+import unittest
+
+from bs4 import BeautifulSoup, Comment, NavigableString, Tag
+from souptools.benchmark import growth_exponent, run_scaling
+from souptools.element import TrackedSoup, TrackedString
+from souptools.smooth import smooth
+from tests import testsuite
+
+
+class SmoothTest(unittest.TestCase):
+    html_text_gabe = testsuite.TreeFindTest.html_text_gabe
+
+    # A fixture with strings, comments and tags inserted at random places
+    def fragmented(self, soup_class=BeautifulSoup, seed=5):
+        soup = soup_class(self.html_text_gabe, 'html.parser')
+        tags = [soup] + soup.find_all(True)
+        rng = random.Random(seed)
+        for i in range(300):
+            tag = rng.choice(tags)
+            position = rng.randint(0, len(tag.contents))
+            kind = rng.random()
+            if kind < 0.6:
+                tag.insert(position, str(i))
+            elif kind < 0.7:
+                tag.insert(position, Comment('comment %d' % i))
+            else:
+                tag.insert(position, soup.new_tag('b'))
+        return soup
+
+    # Assert that every link in the tree agrees with its neighbours
+    def assertConsistent(self, soup):
+        elements = [soup] + list(soup.descendants)
+        for a, b in zip(elements[1:], elements[2:]):
+            self.assertIs(a.next_element, b)
+            self.assertIs(b.previous_element, a)
+        for element in elements:
+            if isinstance(element, Tag):
+                for a, b in zip(element.contents, element.contents[1:]):
+                    self.assertIs(a.next_sibling, b)
+                    self.assertIs(b.previous_sibling, a)
+                for child in element.contents:
+                    self.assertIs(child.parent, element)
+
+    def test_same_result_as_beautifulsoup(self):
+        for seed in range(5):
+            expected = self.fragmented(seed=seed)
+            expected.smooth()
+            soup = self.fragmented(seed=seed)
+            smooth(soup)
+            self.assertEqual(soup.decode(), expected.decode())
+            self.assertEqual([type(x) for x in soup.descendants], [type(x) for x in expected.descendants])
+            self.assertEqual(len(soup.find_all(string=True)), len(expected.find_all(string=True)))
+            self.assertConsistent(soup)
+
+    def test_comments_are_not_merged(self):
+        soup = BeautifulSoup('<div><h1>Title</h1></div>', 'html.parser')
+        soup.h1.append('Hej, jag heter Patrik')
+        soup.h1.append(Comment('Hello'))
+        soup.h1.append('!')
+        self.assertEqual(smooth(soup.div), [soup.h1])
+        self.assertEqual(soup.h1.contents, ['TitleHej, jag heter Patrik', 'Hello', '!'])
+        self.assertIsInstance(soup.h1.contents[1], Comment)
+
+    def test_many_fragments(self):
+        soup = BeautifulSoup('<h1>Useless heading 1</h1>', 'html.parser')
+        for i in range(1000):
+            soup.h1.append(str(i))
+        smooth(soup.h1)
+        self.assertEqual(len(soup.h1.contents), 1)
+        self.assertIs(type(soup.h1.string), NavigableString)
+        self.assertEqual(soup.h1.string, 'Useless heading 1' + ''.join(str(i) for i in range(1000)))
+        self.assertEqual(smooth(soup), [])
+
+    def test_tracked_smooth(self):
+        soup = self.fragmented(TrackedSoup)
+        expected = self.fragmented()
+        expected.smooth()
+        text = soup.get_text('|')
+        generation = soup._generation
+        soup.smooth()
+        self.assertEqual(soup.decode(), expected.decode())
+        self.assertEqual(soup.get_text('|'), expected.get_text('|'))
+        self.assertNotEqual(soup.get_text('|'), text)
+        self.assertGreater(soup._generation, generation)
+        merged = [s for s in soup.descendants if type(s) not in (TrackedString, Comment) and isinstance(s, NavigableString)]
+        self.assertEqual(merged, [])
+        self.assertConsistent(soup)
+
+
+class ScalingTest(unittest.TestCase):
+
+    def test_growth_exponent(self):
+        sizes = [1000, 2000, 4000]
+        self.assertAlmostEqual(growth_exponent(sizes, [n * 1e-6 for n in sizes]), 1.0)
+        self.assertAlmostEqual(growth_exponent(sizes, [n * n * 1e-9 for n in sizes]), 2.0)
+
+    def test_run_scaling(self):
+        report = run_scaling(['smooth'], sizes=[100, 200], repeat=1)
+        stats = report['operations']['smooth']
+        self.assertEqual(len(stats['seconds']), 2)
+        self.assertEqual(len(stats['us_per_item']), 2)
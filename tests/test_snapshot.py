@@ -0,0 +1,162 @@
+import os
+import sys
+import tempfile
+import unittest
+
+from bs4 import BeautifulSoup, Comment, NavigableString, Tag
+from bs4.element import Script
+from souptools.compact import CompactTree
+from souptools.element import TrackedSoup, TrackedString
+from souptools.generator import generate_document
+from souptools.snapshot import load_snapshot, load_soup, save_snapshot
+from tests import testsuite
+
+
+def links(element):
+    # Everything TreeNavigationBlackboxTest navigates by, as node positions.
+    elements = [element] + list(element.descendants)
+    number = dict((id(e), i) for i, e in enumerate(elements))
+    number[id(None)] = None
+
+    def n(e):
+        return number[id(e)]
+    return [(type(e).__name__, e.name if isinstance(e, Tag) else str(e), n(e.parent),
+             n(e.next_sibling), n(e.previous_sibling), n(e.next_element), n(e.previous_element),
+             getattr(e, 'sourceline', None), getattr(e, 'sourcepos', None),
+             dict(e.attrs) if isinstance(e, Tag) else None)
+            for e in elements]
+
+
+class SnapshotTest(unittest.TestCase):
+    fixtures = [
+        testsuite.TreeNavigationBlackboxTest.html_text,
+        testsuite.TreeFindTest.html_text_gabe,
+        '<p class="a  b" id=x>caf\xe9 \U0001f600<!-- c --><script>if (a < b) {}</script><br/><pre>\n x</pre></p>',
+        '',
+        generate_document(size='32KB', seed=7),
+    ]
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'soup.snapshot')
+
+    # A loaded soup is linked up exactly like the parsed one
+    def test_load_soup(self):
+        for html in self.fixtures:
+            soup = BeautifulSoup(html, 'html.parser')
+            save_snapshot(soup, self.path)
+            loaded = load_soup(self.path)
+            self.assertEqual(loaded.decode(), soup.decode())
+            self.assertEqual(links(loaded), links(soup))
+
+    # The loaded soup is a normal, mutable soup
+    def test_loaded_soup_works(self):
+        soup = BeautifulSoup(self.fixtures[2], 'html.parser')
+        save_snapshot(soup, self.path)
+        loaded = load_soup(self.path)
+        self.assertEqual(loaded.p['class'], ['a', 'b'])
+        self.assertIsInstance(loaded.find(string=' c '), Comment)
+        self.assertIsInstance(loaded.script.string, Script)
+        self.assertEqual(loaded.get_text(), soup.get_text())
+        self.assertTrue(loaded.br.is_empty_element)
+        loaded.p.append(loaded.new_tag('b'))
+        loaded.br.decompose()
+        self.assertEqual(str(loaded.p.contents[-1]), '<b></b>')
+        self.assertEqual(loaded.prettify(), BeautifulSoup(loaded.decode(), 'html.parser').prettify())
+
+    def test_tracked_soup(self):
+        html = testsuite.TreeFindTest.html_text_gabe
+        soup = TrackedSoup(html, 'html.parser')
+        save_snapshot(soup, self.path)
+        self.assertEqual(links(load_soup(self.path)), links(BeautifulSoup(html, 'html.parser')))
+        loaded = load_soup(self.path, TrackedSoup)
+        self.assertIsInstance(loaded.p.string, TrackedString)
+        self.assertEqual(loaded.get_text(), soup.get_text())
+
+    # The lazy tree navigates like a CompactTree of the same document
+    def test_load_snapshot(self):
+        html = testsuite.TreeFindTest.html_text_gabe
+        save_snapshot(BeautifulSoup(html, 'html.parser'), self.path)
+        tree = load_snapshot(self.path)
+        expected = CompactTree.parse(html)
+        self.assertEqual(len(tree), len(expected))
+        self.assertEqual([str(node) for node in tree.root.descendants],
+                         [str(node) for node in expected.root.descendants])
+        self.assertEqual(tree.root.find(id='test_id').string, 'Find me!')
+        self.assertEqual(tree.root.find('a')['href'], 'https://www.wikipedia.org/')
+        self.assertEqual(str(tree.root.body.next_sibling), str(expected.root.body.next_sibling))
+        self.assertEqual(tree.to_soup(tree.root.find('main').i).decode(),
+                         expected.to_soup(expected.root.find('main').i).decode())
+
+    # A CompactTree can be saved too; it has no source positions
+    def test_save_compact_tree(self):
+        html = testsuite.TreeFindTest.html_text_gabe
+        save_snapshot(CompactTree.parse(html), self.path)
+        loaded = load_soup(self.path)
+        self.assertEqual(loaded.decode(), BeautifulSoup(html, 'html.parser').decode())
+        self.assertIsNone(loaded.p.sourceline)
+
+    def test_close(self):
+        save_snapshot(BeautifulSoup(self.fixtures[2], 'html.parser'), self.path)
+        tree = load_snapshot(self.path)
+        self.assertEqual(tree.root.p['id'], 'x')
+        tree.close()
+        self.assertIsNone(tree._map)
+        self.assertRaises(ValueError, lambda: tree.kinds[0])
+        tree.close()
+        with load_snapshot(self.path) as tree:
+            self.assertEqual(tree.root.br.name, 'br')
+            mapped = tree._map
+        self.assertTrue(mapped.closed)
+        # A file that can be removed once nothing maps it any more
+        os.remove(self.path)
+
+    # Tag names and attribute names are interned; text isn't
+    def test_interning(self):
+        key = 'data-' + 'x' * 40
+        text = 'some text long enough that nothing else interns it ' * 2
+        soup = BeautifulSoup('<p %s="%s">%s</p>' % (key, text, text), 'html.parser')
+        save_snapshot(soup, self.path)
+        # Interned copies, which loaded strings are the same object as
+        # only if they were interned too.
+        key = sys.intern(''.join(key))
+        text = sys.intern(''.join(text))
+        loaded = load_soup(self.path)
+        self.assertIs(list(loaded.p.attrs)[0], key)
+        self.assertIs(loaded.p.name, 'p')
+        self.assertIsNot(loaded.p[key], text)
+        with load_snapshot(self.path) as tree:
+            self.assertIs(list(tree.root.p.attrs)[0], key)
+            self.assertIs(tree.root.p.name, 'p')
+            self.assertIsNot(tree.root.p.string, text)
+            self.assertIsNot(tree.root.p[key], text)
+
+    # The file names its string classes; only known ones are used
+    def test_tampered_string_class(self):
+        save_snapshot(BeautifulSoup('<p>print me</p>', 'html.parser'), self.path)
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        original = b'"bs4.element.NavigableString"'
+        tampered = b'"builtins.print"'
+        self.assertIn(original, data)
+        with open(self.path, 'wb') as f:
+            f.write(data.replace(original, tampered + b' ' * (len(original) - len(tampered))))
+        self.assertRaises(ValueError, load_soup, self.path)
+        self.assertRaises(ValueError, load_snapshot, self.path)
+
+    def test_unknown_string_class(self):
+        class Custom(NavigableString):
+            pass
+        soup = BeautifulSoup('<p>x</p>', 'html.parser')
+        soup.p.append(Custom('y'))
+        self.assertRaises(ValueError, save_snapshot, soup, self.path)
+
+    def test_not_a_snapshot(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'<html></html>' * 4)
+        self.assertRaises(ValueError, load_snapshot, self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
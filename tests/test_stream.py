@@ -0,0 +1,145 @@
+import gc
+import io
+import mmap
+import os
+import pathlib
+import tempfile
+import tracemalloc
+import unittest
+
+from bs4 import BeautifulSoup, SoupStrainer
+from souptools.feed import IncrementalParser, parse_chunks, parse_file
+from souptools.generator import generate_document
+from souptools.stream import StreamingSoup, iter_matches
+from tests import testsuite
+
+
+class IncrementalParserTest(unittest.TestCase):
+    fixtures = [
+        testsuite.TreeNavigationBlackboxTest.html_text,
+        testsuite.TreeFindTest.html_text_gabe,
+        testsuite.TreeModificationTests.test_tree,
+        '<p>café &amp; &eacute; <!-- comment --> <![CDATA[x]]></p><script>if (a < b) {}</script>',
+    ]
+
+    # Any chunking of a document gives the same tree as parsing it in one go
+    def test_same_tree_as_constructor(self):
+        for html in self.fixtures + [generate_document(size='64KB')]:
+            expected = BeautifulSoup(html, 'html.parser').decode()
+            for chunk_size in (1, 7, 4096):
+                self.assertEqual(parse_chunks(html, chunk_size=chunk_size).decode(), expected)
+                self.assertEqual(parse_chunks(html.encode('utf-8'), chunk_size=chunk_size).decode(), expected)
+
+    # Byte input is decoded with a declared or given encoding
+    def test_encodings(self):
+        html = '<meta charset="latin-1"><p>café</p>'
+        soup = parse_chunks(io.BytesIO(html.encode('latin-1')), chunk_size=3)
+        self.assertEqual(soup.p.string, 'café')
+        self.assertEqual(soup.original_encoding, 'latin-1')
+        soup = parse_chunks(html.encode('latin-1'), encoding='latin-1')
+        self.assertEqual(soup.p.string, 'café')
+        soup = parse_chunks(b'\xef\xbb\xbf<p>caf\xc3\xa9</p>', chunk_size=1)
+        self.assertEqual(soup.p.string, 'café')
+
+    def test_feed_after_close(self):
+        parser = IncrementalParser()
+        parser.feed('<p>Test</p>')
+        self.assertEqual(str(parser.close()), '<p>Test</p>')
+        with self.assertRaises(ValueError):
+            parser.feed('<p>')
+
+
+class FileInputTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write(self, data, name='doc.html'):
+        path = os.path.join(self.directory, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    # Paths and memory maps give the same tree as parsing the whole text
+    def test_same_tree_as_constructor(self):
+        html = generate_document(size='64KB', seed=3)
+        expected = BeautifulSoup(html, 'html.parser').decode()
+        path = self.write(html.encode('utf-8'))
+        self.assertEqual(parse_file(path, chunk_size=1000).decode(), expected)
+        self.assertEqual(parse_chunks(pathlib.Path(path)).decode(), expected)
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            self.assertEqual(parse_chunks(mapped, chunk_size=777).decode(), expected)
+
+    def test_encoding_and_empty_file(self):
+        path = self.write('<meta charset="latin-1"><p>café</p>'.encode('latin-1'))
+        soup = parse_file(path, chunk_size=4)
+        self.assertEqual(soup.p.string, 'café')
+        self.assertEqual(soup.original_encoding, 'latin-1')
+        self.assertEqual(parse_file(self.write(b'', 'empty.html')).decode(), '')
+
+    # Beyond the tree itself, parsing only needs about a chunk of memory
+    def test_memory_is_bounded(self):
+        path = self.write(generate_document(size='512KB', seed=4).encode('utf-8'))
+        gc.collect()
+        tracemalloc.start()
+        try:
+            soup = parse_file(path, chunk_size=16 * 1024)
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertLess(peak - current, 256 * 1024)
+        self.assertIsNotNone(soup.body)
+
+
+class StreamingStrainerTest(unittest.TestCase):
+    html_text_gabe = testsuite.TreeFindTest.html_text_gabe
+
+    # Streaming gives the same links as WhiteBoxTesting.test_find_all_soup_strainer
+    def test_links(self):
+        links = [str(link) for link in iter_matches(self.html_text_gabe, SoupStrainer('a'), chunk_size=16)]
+        self.assertEqual(links, [
+            '<a href="https://www.wikipedia.org/">This is a hyperlink to wikipedia!</a>',
+            '<a href="https://www.facebook.com/">This is a hyperlink to facebook!</a>',
+            '<a href="https://creativecommons.org/">Site goes under Creative Commons</a>'
+        ])
+
+    # Matches are complete detached subtrees
+    def test_matches_are_detached(self):
+        mains = list(iter_matches(self.html_text_gabe, 'main', chunk_size=5))
+        self.assertEqual(len(mains), 1)
+        self.assertIsNone(mains[0].parent)
+        self.assertEqual(mains[0].img['width'], '200px')
+
+    def test_strings_and_void_tags(self):
+        self.assertEqual(list(iter_matches(self.html_text_gabe, SoupStrainer(string='Find me!'))), ['Find me!'])
+        self.assertEqual(len(list(iter_matches(self.html_text_gabe, 'img', chunk_size=3))), 1)
+
+    # Matches nested in another match come out as part of the outer one
+    def test_nested_matches(self):
+        html = '<div><div>inner</div>outer</div><div>second</div>'
+        self.assertEqual([str(x) for x in iter_matches(html, 'div')],
+                         ['<div><div>inner</div>outer</div>', '<div>second</div>'])
+
+    # Same results as a full parse of a large document, byte chunks from a file
+    def test_large_document(self):
+        html = generate_document(size='256KB', seed=5)
+        expected = [str(x) for x in BeautifulSoup(html, 'html.parser').find_all('a')
+                    if x.find_parent('a') is None]
+        found = [str(x) for x in iter_matches(io.BytesIO(html.encode('utf-8')), 'a', chunk_size=1024)]
+        self.assertEqual(found, expected)
+
+    # Nothing is kept in the tree once a match has been handed over
+    def test_memory_is_bounded(self):
+        parser = IncrementalParser(StreamingSoup, parse_only=SoupStrainer('a'))
+        html = generate_document(size='64KB', seed=2)
+        for start in range(0, len(html), 512):
+            parser.feed(html[start:start + 512])
+            parser.soup.completed[:] = []
+            self.assertLessEqual(len(parser.soup.contents), 1)
+        parser.close()
+        self.assertEqual(parser.soup.contents, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
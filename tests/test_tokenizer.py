@@ -0,0 +1,59 @@
+import random
+import unittest
+
+from bs4 import BeautifulSoup
+from souptools.generator import generate_document
+from souptools.tokenizer import FastHTMLParserTreeBuilder
+from tests import testsuite
+from tests.test_snapshot import links
+
+
+class FastTokenizerTest(unittest.TestCase):
+    fixtures = [
+        testsuite.TreeNavigationBlackboxTest.html_text,
+        testsuite.TreeFindTest.html_text_gabe,
+        testsuite.TreeModificationTests.test_tree,
+        '<!DOCTYPE html><p class="a  b" id=x>caf\xe9 &amp; &#233;&#xe9;<!-- c --><script>if (a < b && c) {}</script>'
+        '<br/><pre>\n x</pre><?pi?><![CDATA[d]]></p>',
+        '<a href="?a=1&amp;b=2&c=3" title=\'x > y\' data-x=y/>Q & A &copy, &bogus; &#65 a&',
+        '',
+        generate_document(size='32KB', seed=9),
+    ]
+
+    # Pieces of markup html.parser reads in some surprising way
+    pieces = ['<div>', '</div>', '<p class="a b">', '<p class=x >', "<a href='u'>", '</a>', '<br/>', '<br>',
+              '</br>', 'text', ' ', '\n', '&amp;', '&#65;', '&#x41;', '&bogus;', '&', '&#', '&amp', '&#65 ',
+              '&copy,', '<', '>', '<!-- c -->', '<!--', '-->', '<!DOCTYPE html>', '<?pi?>', '<![CDATA[x]]>',
+              '<script>', '</script>', 'if (a<b) {}', '<style>', '</style>', '<title>', '</title>', '<img src=x/>',
+              '<a b=c/>', '<A HREF="X">', '</A>', '<x y>', '<x y= z>', '<x y="&amp;">', '<x y=">">', '</ x>',
+              '</x >', '<p\nid="1"\n>', '"', "'", '=', '/', '<a\xa0b>', '\xa0', '<a b="1" b="2">', '</p', '<p']
+
+    def assertSameTree(self, html):
+        expected = BeautifulSoup(html, 'html.parser')
+        soup = BeautifulSoup(html, builder=FastHTMLParserTreeBuilder)
+        self.assertEqual(soup.decode(), expected.decode(), html)
+        # links() includes every tag's sourceline and sourcepos
+        self.assertEqual(links(soup), links(expected), html)
+
+    def test_same_tree_as_html_parser(self):
+        for html in self.fixtures:
+            self.assertSameTree(html)
+            self.assertSameTree(html.encode('utf-8'))
+
+    def test_random_markup(self):
+        rnd = random.Random(20)
+        for i in range(1000):
+            self.assertSameTree(''.join(rnd.choice(self.pieces) for j in range(rnd.randint(1, 30))))
+
+    def test_builder_options(self):
+        html = '<p a="1" a="2">x</p><b>y</b>'
+        soup = BeautifulSoup(html, builder=FastHTMLParserTreeBuilder(on_duplicate_attribute='ignore'))
+        self.assertEqual(soup.p['a'], '1')
+        soup = BeautifulSoup(html, builder=FastHTMLParserTreeBuilder, store_line_numbers=False)
+        self.assertIsNone(soup.p.sourceline)
+        soup = BeautifulSoup(html, builder=FastHTMLParserTreeBuilder, parse_only=testsuite.SoupStrainer('b'))
+        self.assertEqual(soup.decode(), '<b>y</b>')
+
+
+if __name__ == '__main__':
+    unittest.main()
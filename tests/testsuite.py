@@ -1,7 +1,13 @@
+import inspect
+import io
+import pickle
+import sys
 import unittest
 from unittest.case import expectedFailure
 import bs4
 from bs4 import BeautifulSoup, diagnose, SoupStrainer, Comment
+import souptools
+from souptools.element import TrackedSoup
 
 class AppendClearTests(unittest.TestCase):
   def test_append_empty(self):
@@ -827,5 +833,98 @@ class WhiteBoxTesting(unittest.TestCase):
             tree.contents[0].insert_after(tree.contents[0])
 
 
+class DeepNestingTests(unittest.TestCase):
+    # Every tree algorithm run on a document nested far deeper than the
+    # recursion limit, with the limit lowered to a fixed number of frames
+    # above the caller: anything that recursed per level would fail.
+    depth = 10000
+    frames = 150
+
+    def deep_html(self, depth=None):
+        depth = depth or self.depth
+        return "<div>" * depth + "<b>x</b>y" + "</div>" * depth
+
+    def bounded(self, function, *args):
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(len(inspect.stack(0)) + self.frames)
+        try:
+            return function(*args)
+        finally:
+            sys.setrecursionlimit(limit)
+
+    def test_parse_and_navigate(self):
+        soup = self.bounded(BeautifulSoup, self.deep_html(), 'html.parser')
+        self.assertEqual(self.bounded(lambda: len(soup.find_all('div'))), self.depth)
+        self.assertEqual(self.bounded(lambda: sum(1 for _ in soup.descendants)), self.depth + 3)
+        self.assertEqual(self.bounded(soup.get_text), "xy")
+        self.assertEqual(len(list(self.bounded(lambda: list(soup.b.parents)))), self.depth + 1)
+
+    def test_serialize(self):
+        html = self.deep_html()
+        soup = BeautifulSoup(html, 'html.parser')
+        self.assertEqual(self.bounded(soup.decode), html)
+        self.assertEqual(self.bounded(soup.encode), html.encode('utf-8'))
+        self.assertEqual(self.bounded(soup.prettify).count("<div>"), self.depth)
+        out = io.StringIO()
+        self.bounded(souptools.write_to, soup, out)
+        self.assertEqual(out.getvalue(), html)
+
+    def test_smooth(self):
+        soup = BeautifulSoup(self.deep_html(), 'html.parser')
+        soup.b.append("z")
+        self.bounded(souptools.smooth, soup)
+        self.assertEqual(soup.b.contents, ["xz"])
+
+    # Tag.smooth and Tag.__eq__ recurse; the tracked tree's versions don't
+    def test_tracked_smooth_and_equality(self):
+        soup = TrackedSoup(self.deep_html(), 'html.parser')
+        other = TrackedSoup(self.deep_html(), 'html.parser')
+        soup.b.append("z")
+        self.bounded(soup.smooth)
+        self.assertEqual(soup.b.contents, ["xz"])
+        self.assertEqual(self.bounded(soup.get_text), "xzy")
+        self.assertFalse(self.bounded(lambda: soup == other))
+        other.b.string = "xz"
+        self.assertTrue(self.bounded(lambda: soup == other))
+        self.assertFalse(self.bounded(lambda: soup != other))
+        self.assertIn(soup.div, {soup.div})
+
+    def test_equality(self):
+        soup = BeautifulSoup(self.deep_html(), 'html.parser')
+        other = BeautifulSoup(self.deep_html(), 'html.parser')
+        self.assertTrue(self.bounded(souptools.tree_equal, soup, other))
+        other.b["class"] = "c"
+        self.assertFalse(self.bounded(souptools.tree_equal, soup, other))
+
+    # tree_equal answers exactly as Tag.__eq__ does on shallow trees
+    def test_equality_matches_tag_eq(self):
+        tags = BeautifulSoup(WhiteBoxTesting.html_text_gabe + WhiteBoxTesting.test_tree, 'html.parser').find_all(True)
+        tags += [Comment("Find me!"), "Find me!"]
+        for a in tags:
+            for b in tags:
+                self.assertEqual(souptools.tree_equal(a, b), a == b)
+
+    # copy.copy doesn't recurse either, but takes quadratic time this deep
+    def test_copy(self):
+        html = self.deep_html()
+        soup = BeautifulSoup(html, 'html.parser')
+        self.assertEqual(self.bounded(souptools.clone, soup).decode(), html)
+        self.assertEqual(self.bounded(lambda: pickle.loads(pickle.dumps(soup))).decode(), html)
+
+    def test_remove(self):
+        soup = BeautifulSoup(self.deep_html(), 'html.parser')
+        self.bounded(soup.div.div.decompose)
+        self.assertEqual(soup.decode(), "<div></div>")
+        soup = BeautifulSoup(self.deep_html(), 'html.parser')
+        self.bounded(soup.div.clear)
+        self.assertEqual(soup.decode(), "<div></div>")
+        soup = BeautifulSoup(self.deep_html(), 'html.parser')
+        self.bounded(souptools.decompose_many, [soup.div.div])
+        self.assertEqual(soup.decode(), "<div></div>")
+        soup = TrackedSoup(self.deep_html(), 'html.parser')
+        self.bounded(soup.div.decompose)
+        self.assertEqual(soup.decode(), "")
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file